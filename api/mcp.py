@@ -1,51 +1,166 @@
+"""
+HRFCO MCP Serverless Handler (Vercel)
+mcp_server.py와 같은 도구를 HTTP POST JSON-RPC로 제공
 
+클라이언트 풀/카탈로그/색인은 모듈 전역에 두어 웜 인보케이션에서 재사용하고,
+무거운 모듈은 첫 요청에서만 불러온다. 콜드 스타트/웜 지연 시간은 응답 헤더
+(Server-Timing, X-Cold-Start)와 GET 응답의 latency 항목으로 확인할 수 있다.
+"""
 import json
 import os
-from http.server import BaseHTTPRequestHandler
 import sys
+import time
+from http.server import BaseHTTPRequestHandler
+
+_MODULE_START = time.perf_counter()
+
 sys.path.append('/var/task')
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+MCP_MAX_CONCURRENCY = int(os.getenv('MCP_MAX_CONCURRENCY', '8'))
+LATENCY_SAMPLES = 200
+
+# 웜 인보케이션 간에 재사용하는 상태
+_state = {
+    "loop": None,
+    "client": None,
+    "invocations": 0,
+    "boot_ms": None,
+    "cold_start": None,
+    "warm_ms": [],
+}
+
+
+def _runtime():
+    """이벤트 루프와 HRFCO 클라이언트 (첫 요청에서 생성)
+
+    같은 이벤트 루프를 계속 쓰므로 upstream 커넥션 풀과 카탈로그 백그라운드 갱신도 이어진다.
+    """
+    if _state["loop"] is None:
+        started = time.perf_counter()
+        import asyncio
+        from mcp_server import HRFCOClient
+        _state["loop"] = asyncio.new_event_loop()
+        _state["client"] = HRFCOClient()
+        _state["boot_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return _state["loop"], _state["client"]
+
+
+def _error(request_id, code, message):
+    return {"jsonrpc": "2.0", "id": request_id, "error": {"code": code, "message": message}}
+
+
+async def _handle_one(request):
+    from mcp_server import handle_request
+    try:
+        return await handle_request(_state["client"], request)
+    except Exception as e:
+        return _error(request.get("id"), -32603, f"Internal error: {str(e)}")
+
+
+async def _handle(payload):
+    """단일 요청 또는 배치 배열 처리 (응답이 없으면 None)"""
+    if isinstance(payload, list):
+        from jsonrpc_batch import handle_batch
+        return await handle_batch(payload, _handle_one, MCP_MAX_CONCURRENCY)
+    if not isinstance(payload, dict):
+        return _error(None, -32600, "Invalid Request")
+    return await _handle_one(payload)
+
+
+def _record(elapsed_ms: float) -> bool:
+    """지연 시간 기록, 콜드 스타트 여부 반환"""
+    cold = _state["invocations"] == 0
+    _state["invocations"] += 1
+    if cold:
+        _state["cold_start"] = {
+            "import_ms": _IMPORT_MS,
+            "boot_ms": _state["boot_ms"],
+            "first_request_ms": round(elapsed_ms, 1),
+        }
+    else:
+        samples = _state["warm_ms"]
+        samples.append(elapsed_ms)
+        if len(samples) > LATENCY_SAMPLES:
+            del samples[0]
+    return cold
+
+
+def latency_stats():
+    samples = sorted(_state["warm_ms"])
+    warm = None
+    if samples:
+        warm = {
+            "count": len(samples),
+            "avg_ms": round(sum(samples) / len(samples), 1),
+            "p50_ms": round(samples[len(samples) // 2], 1),
+            "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 1),
+        }
+    return {"invocations": _state["invocations"], "cold_start": _state["cold_start"], "warm": warm}
 
-from mcp_server import HRFCOClient
 
 class handler(BaseHTTPRequestHandler):
+    def _send(self, status, body=None, extra_headers=None, content_type='application/json; charset=utf-8'):
+        self.send_response(status)
+        self.send_header('Access-Control-Allow-Origin', '*')
+        for key, value in (extra_headers or {}).items():
+            self.send_header(key, value)
+        if body is None:
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        data = body if isinstance(body, bytes) else json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path.split('?')[0].rstrip('/').endswith('/metrics'):
+            # 이 인스턴스(웜 컨테이너)의 지표, Prometheus 텍스트 형식
+            from metrics import CONTENT_TYPE, metrics
+            self._send(200, metrics.render().encode('utf-8'), content_type=CONTENT_TYPE)
+            return
+        self._send(200, {"status": "ok", "message": "MCP endpoint. Use POST JSON-RPC.",
+                         "latency": latency_stats()})
+
+    def do_OPTIONS(self):
+        self._send(204, None, {"Allow": "POST, GET, OPTIONS",
+                               "Access-Control-Allow-Methods": "POST, GET, OPTIONS",
+                               "Access-Control-Allow-Headers": "Content-Type"})
+
     def do_POST(self):
-        content_length = int(self.headers['Content-Length'])
+        started = time.perf_counter()
+        content_length = int(self.headers.get('Content-Length') or 0)
         post_data = self.rfile.read(content_length)
-        
+
         try:
-            request = json.loads(post_data.decode('utf-8'))
-            client = HRFCOClient()
-            
-            method = request.get("method")
-            if method == "tools/call":
-                params = request.get("params", {})
-                tool_name = params.get("name")
-                args = params.get("arguments", {})
-                
-                if tool_name == "get_observatories":
-                    result = await client.get_observatories(
-                        args.get("hydro_type", "waterlevel"),
-                        limit=5  # Netlify 응답 크기 제한
-                    )
-                else:
-                    result = {"error": f"Unknown tool: {tool_name}"}
-                
-                response = {
-                    "jsonrpc": "2.0",
-                    "id": request.get("id"),
-                    "result": {"content": [{"type": "text", "text": json.dumps(result, ensure_ascii=False)}]}
-                }
-            else:
-                response = {"jsonrpc": "2.0", "id": request.get("id"), "error": {"code": -32601, "message": "Method not found"}}
-            
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            self.wfile.write(json.dumps(response).encode())
-            
-        except Exception as e:
-            self.send_response(500)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            error_response = {"error": str(e)}
-            self.wfile.write(json.dumps(error_response).encode())
+            payload = json.loads(post_data.decode('utf-8'))
+        except (UnicodeDecodeError, json.JSONDecodeError) as e:
+            response = _error(None, -32700, f"Parse error: {str(e)}")
+        else:
+            try:
+                loop, _ = _runtime()
+                response = loop.run_until_complete(_handle(payload))
+                if response is not None:
+                    # tools/list, initialize는 미리 직렬화한 본문을 그대로 사용
+                    from tool_registry import encode_message
+                    response = encode_message(response)
+            except Exception as e:
+                self._send(500, {"error": str(e)})
+                return
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        cold = _record(elapsed_ms)
+        headers = {
+            "Server-Timing": f"handler;dur={elapsed_ms:.1f}",
+            "X-Cold-Start": "true" if cold else "false",
+        }
+        if cold:
+            print(f"🧊 cold start: import {_IMPORT_MS}ms, boot {_state['boot_ms']}ms, "
+                  f"first request {elapsed_ms:.1f}ms")
+        # 알림만 받은 경우 응답 본문 없음
+        self._send(202 if response is None else 200, response, headers)
+
+
+_IMPORT_MS = round((time.perf_counter() - _MODULE_START) * 1000, 1)
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Bulk Station Data
+여러 관측소 실시간 데이터 동시 조회 - 열 기반(columnar) 응답과 관측소별 상태
+"""
+import asyncio
+import os
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import upstream
+from catalog_cache import HRFCO_BASE_URL
+
+# 동시에 업스트림으로 보낼 관측소 요청 수 / 한 번에 받을 관측소 수 상한
+BULK_MAX_CONCURRENCY = int(os.getenv('HRFCO_BULK_CONCURRENCY', '8'))
+BULK_MAX_STATIONS = int(os.getenv('HRFCO_BULK_MAX_STATIONS', '100'))
+BULK_TIMEOUT = 15.0
+
+# 관측소 코드 필드 (obs_code 열로 대체)
+CODE_FIELDS = ("wlobscd", "rfobscd", "damcd")
+
+Fetcher = Callable[[str, str, str], Awaitable[List[Dict[str, Any]]]]
+
+
+async def fetch_station_records(obs_code: str, hydro_type: str = "waterlevel",
+                                time_type: str = "1H") -> List[Dict[str, Any]]:
+    """관측소 하나의 data.json 레코드 목록"""
+    api_key = os.getenv('HRFCO_API_KEY', '')
+    if not api_key:
+        raise ValueError("API 키가 필요합니다. HRFCO_API_KEY 환경변수를 설정해주세요.")
+    url = f"{HRFCO_BASE_URL}/{api_key}/{hydro_type}/data.json"
+    data = await upstream.fetch_json(url, params={"obs_code": obs_code, "time_type": time_type},
+                                     timeout=BULK_TIMEOUT)
+    content = data.get("content") if isinstance(data, dict) else None
+    if content is None:
+        raise ValueError(data.get("message", "content 없음") if isinstance(data, dict) else "잘못된 응답")
+    return content
+
+
+def normalize_codes(obs_codes: Any) -> List[str]:
+    """관측소 코드 목록 정리 (쉼표 구분 문자열 허용, 중복 제거, 순서 유지)"""
+    if isinstance(obs_codes, str):
+        obs_codes = obs_codes.split(",")
+    if not isinstance(obs_codes, (list, tuple)):
+        raise ValueError("obs_codes는 관측소 코드 목록이어야 합니다")
+    codes = list(dict.fromkeys(str(code).strip() for code in obs_codes if str(code).strip()))
+    if not codes:
+        raise ValueError("관측소 코드가 필요합니다")
+    if len(codes) > BULK_MAX_STATIONS:
+        raise ValueError(f"한 번에 최대 {BULK_MAX_STATIONS}개 관측소까지 조회할 수 있습니다")
+    return codes
+
+
+def to_columnar(codes: List[str], records: Dict[str, List[Dict[str, Any]]]) -> Dict[str, List[Any]]:
+    """관측소별 레코드를 열 하나당 배열 하나로 변환 (없는 값은 None)"""
+    fields: Dict[str, None] = {}
+    for code in codes:
+        for record in records.get(code, []):
+            fields.update((key, None) for key in record if key not in CODE_FIELDS)
+    columns: Dict[str, List[Any]] = {"obs_code": []}
+    columns.update((field, []) for field in fields)
+    for code in codes:
+        for record in records.get(code, []):
+            columns["obs_code"].append(code)
+            for field in fields:
+                columns[field].append(record.get(field))
+    return columns
+
+
+async def fetch_bulk(obs_codes: Any, hydro_type: str = "waterlevel", time_type: str = "1H",
+                     max_concurrency: int = BULK_MAX_CONCURRENCY,
+                     fetcher: Optional[Fetcher] = None) -> Dict[str, Any]:
+    """여러 관측소를 제한된 동시성으로 한꺼번에 조회
+
+    관측소 하나의 실패가 전체 응답을 막지 않도록 stations.status에 ok/empty/error를 기록한다.
+    같은 관측소 요청은 upstream 요청 병합으로 다른 호출과도 공유된다.
+    """
+    codes = normalize_codes(obs_codes)
+    fetcher = fetcher or fetch_station_records
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def fetch_one(code: str):
+        async with semaphore:
+            return await fetcher(code, hydro_type, time_type)
+
+    results = await asyncio.gather(*(fetch_one(code) for code in codes), return_exceptions=True)
+
+    records: Dict[str, List[Dict[str, Any]]] = {}
+    stations: Dict[str, List[Any]] = {"obs_code": codes, "status": [], "rows": [], "error": []}
+    for code, result in zip(codes, results):
+        if isinstance(result, Exception):
+            stations["status"].append("error")
+            stations["rows"].append(0)
+            stations["error"].append(str(result) or type(result).__name__)
+            continue
+        records[code] = result
+        stations["status"].append("ok" if result else "empty")
+        stations["rows"].append(len(result))
+        stations["error"].append(None)
+
+    return {
+        "hydro_type": hydro_type,
+        "time_type": time_type,
+        "stations": stations,
+        "data": to_columnar(codes, records),
+        "summary": {status: stations["status"].count(status) for status in ("ok", "empty", "error")},
+    }
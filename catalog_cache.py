@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Station Catalog Cache
+관측소 카탈로그(info.json) 공유 캐시 - hydro_type별 TTL, stale-while-revalidate
+"""
+import asyncio
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import station_snapshot
+import upstream
+from metrics import CACHE_REQUESTS
+
+HRFCO_BASE_URL = "http://api.hrfco.go.kr"
+
+# hydro_type별 TTL (초) - 관측소 목록은 거의 바뀌지 않음
+DEFAULT_TTL = float(os.getenv('HRFCO_CATALOG_TTL', str(6 * 3600)))
+CATALOG_TTL = {
+    "waterlevel": float(os.getenv('HRFCO_CATALOG_TTL_WATERLEVEL', DEFAULT_TTL)),
+    "rainfall": float(os.getenv('HRFCO_CATALOG_TTL_RAINFALL', DEFAULT_TTL)),
+    "dam": float(os.getenv('HRFCO_CATALOG_TTL_DAM', 12 * 3600)),
+}
+
+# 갱신 실패 시 백오프 (초)
+MIN_BACKOFF = 30.0
+MAX_BACKOFF = 900.0
+
+Loader = Callable[[str], Awaitable[List[Dict[str, Any]]]]
+Seed = Callable[[str], Optional[List[Dict[str, Any]]]]
+
+
+async def fetch_catalog(hydro_type: str) -> List[Dict[str, Any]]:
+    """업스트림에서 관측소 카탈로그 다운로드"""
+    api_key = os.getenv('HRFCO_API_KEY', '')
+    if not api_key:
+        raise ValueError("API 키가 필요합니다. HRFCO_API_KEY 환경변수를 설정해주세요.")
+    url = f"{HRFCO_BASE_URL}/{api_key}/{hydro_type}/info.json"
+    data = await upstream.fetch_json(url)
+    return data.get("content", [])
+
+
+class CatalogEntry:
+    """hydro_type 하나의 카탈로그 스냅샷과 파생 인덱스"""
+
+    def __init__(self, hydro_type: str, stations: List[Dict[str, Any]], ttl: float, version: int):
+        self.hydro_type = hydro_type
+        self.stations = stations
+        self.fetched_at = time.time()
+        self.expires_at = self.fetched_at + ttl
+        self.version = version
+        self.source = "upstream"
+        self._derived: Dict[str, Any] = {}
+
+    def is_fresh(self, now: Optional[float] = None) -> bool:
+        return (now or time.time()) < self.expires_at
+
+    def derived(self, name: str, builder: Callable[[List[Dict[str, Any]]], Any]) -> Any:
+        """카탈로그 버전별로 한 번만 계산되는 파생 데이터 (인덱스 등)"""
+        if name not in self._derived:
+            self._derived[name] = builder(self.stations)
+        return self._derived[name]
+
+
+class CatalogCache:
+    """모든 엔트리포인트가 공유하는 관측소 카탈로그 캐시
+
+    - 만료 전: 캐시에서 바로 반환
+    - 만료 후: 이전 데이터를 그대로 반환하고 백그라운드 갱신 1회만 실행
+    - 갱신 실패: 마지막 정상 데이터를 유지하고 지수 백오프 후 재시도
+    - 첫 조회: seed(번들 스냅샷)가 있으면 만료 상태로 바로 적재해 반환하고 업스트림과는 백그라운드로 맞춤
+    """
+
+    def __init__(self, loader: Optional[Loader] = None, ttl: Optional[Dict[str, float]] = None,
+                 min_backoff: float = MIN_BACKOFF, max_backoff: float = MAX_BACKOFF,
+                 seed: Optional[Seed] = None):
+        self.loader = loader or fetch_catalog
+        self.seed = seed
+        self.ttl = dict(CATALOG_TTL, **(ttl or {}))
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self._entries: Dict[str, CatalogEntry] = {}
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._failures: Dict[str, int] = {}
+        self._retry_at: Dict[str, float] = {}
+        self._last_error: Dict[str, Exception] = {}
+        self._builders: Dict[str, tuple] = {}
+        self._version = 0
+
+    def ttl_for(self, hydro_type: str) -> float:
+        return self.ttl.get(hydro_type, DEFAULT_TTL)
+
+    def register_builder(self, name: str, builder: Callable[..., Any], incremental: bool = False):
+        """카탈로그 적재 시마다 미리 계산할 파생 데이터 등록
+
+        incremental=True이면 갱신 시 builder(stations, previous)로 이전 버전의 결과를 넘겨
+        바뀐 관측소만 다시 계산할 수 있게 한다.
+        """
+        self._builders[name] = (builder, incremental)
+        for entry in self._entries.values():
+            entry.derived(name, builder)
+
+    def peek(self, hydro_type: str) -> Optional[CatalogEntry]:
+        """네트워크 없이 현재 엔트리 조회 (없으면 None)"""
+        return self._entries.get(hydro_type)
+
+    def put(self, hydro_type: str, stations: List[Dict[str, Any]]) -> CatalogEntry:
+        """카탈로그 저장 및 파생 데이터 재계산"""
+        self._version += 1
+        previous = self._entries.get(hydro_type)
+        entry = CatalogEntry(hydro_type, stations, self.ttl_for(hydro_type), self._version)
+        for name, (builder, incremental) in self._builders.items():
+            if incremental and previous is not None and name in previous._derived:
+                entry._derived[name] = builder(stations, previous._derived[name])
+            else:
+                entry.derived(name, builder)
+        self._entries[hydro_type] = entry
+        return entry
+
+    def invalidate(self, hydro_type: Optional[str] = None):
+        """엔트리 만료 처리 (데이터는 유지, 다음 조회 시 갱신)"""
+        targets = [hydro_type] if hydro_type else list(self._entries)
+        for name in targets:
+            entry = self._entries.get(name)
+            if entry is not None:
+                entry.expires_at = 0.0
+
+    def _seed_entry(self, hydro_type: str) -> Optional[CatalogEntry]:
+        """번들 스냅샷으로 엔트리 생성 (만료 상태로 두어 바로 업스트림 갱신이 시작되게 함)"""
+        stations = self.seed(hydro_type) if self.seed is not None else None
+        if not stations:
+            return None
+        entry = self.put(hydro_type, stations)
+        entry.source = "snapshot"
+        entry.expires_at = 0.0
+        return entry
+
+    async def get_entry(self, hydro_type: str = "waterlevel") -> CatalogEntry:
+        entry = self._entries.get(hydro_type) or self._seed_entry(hydro_type)
+        if entry is None:
+            CACHE_REQUESTS.inc(cache="catalog", result="miss")
+            return await self._load(hydro_type)
+        fresh = entry.is_fresh()
+        CACHE_REQUESTS.inc(cache="catalog", result="hit" if fresh else "stale")
+        if not fresh and time.time() >= self._retry_at.get(hydro_type, 0.0):
+            self._refresh_in_background(hydro_type)
+        return entry
+
+    async def get_stations(self, hydro_type: str = "waterlevel") -> List[Dict[str, Any]]:
+        """관측소 목록 반환 (만료된 경우에도 이전 데이터를 즉시 반환)"""
+        entry = await self.get_entry(hydro_type)
+        return entry.stations
+
+    def _refresh_in_background(self, hydro_type: str):
+        if hydro_type not in self._inflight:
+            self._start_load(hydro_type)
+
+    def _start_load(self, hydro_type: str) -> asyncio.Task:
+        task = asyncio.ensure_future(self._do_load(hydro_type))
+        self._inflight[hydro_type] = task
+        task.add_done_callback(lambda t: self._inflight.pop(hydro_type, None))
+        # 백그라운드 갱신에서 예외가 무시되었다는 경고 방지
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        return task
+
+    async def _load(self, hydro_type: str) -> CatalogEntry:
+        if hydro_type not in self._inflight and time.time() < self._retry_at.get(hydro_type, 0.0):
+            raise self._last_error[hydro_type]
+        task = self._inflight.get(hydro_type) or self._start_load(hydro_type)
+        return await asyncio.shield(task)
+
+    async def _do_load(self, hydro_type: str) -> CatalogEntry:
+        try:
+            stations = await self.loader(hydro_type)
+        except Exception as e:
+            failures = self._failures.get(hydro_type, 0) + 1
+            self._failures[hydro_type] = failures
+            backoff = min(self.max_backoff, self.min_backoff * (2 ** (failures - 1)))
+            self._retry_at[hydro_type] = time.time() + backoff
+            self._last_error[hydro_type] = e
+            raise
+        self._failures.pop(hydro_type, None)
+        self._retry_at.pop(hydro_type, None)
+        self._last_error.pop(hydro_type, None)
+        return self.put(hydro_type, stations)
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.time()
+        return {
+            hydro_type: {
+                "stations": len(entry.stations),
+                "age_seconds": round(now - entry.fetched_at, 1),
+                "fresh": entry.is_fresh(now),
+                "source": entry.source,
+                "refreshing": hydro_type in self._inflight,
+                "failures": self._failures.get(hydro_type, 0),
+            }
+            for hydro_type, entry in self._entries.items()
+        }
+
+
+# 프로세스 전역 인스턴스 (번들 스냅샷으로 콜드 스타트)
+catalog_cache = CatalogCache(seed=station_snapshot.load_stations)
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Catalog Pagination
+관측소 카탈로그 커서 페이지네이션 - 관측소 코드 순 정렬, 기관/지역(주소 앞부분)/수계 필터
+
+커서는 마지막으로 돌려준 관측소 코드와 필터를 담으므로(keyset) 카탈로그가 갱신되어도
+이미 받은 관측소를 다시 받거나 건너뛰지 않는다.
+"""
+import base64
+import binascii
+import bisect
+import json
+import os
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from catalog_cache import CatalogEntry
+from station_snapshot import CODE_FIELDS
+
+PAGE_SIZE = int(os.getenv('HRFCO_PAGE_SIZE', '50'))
+MAX_PAGE_SIZE = int(os.getenv('HRFCO_MAX_PAGE_SIZE', '500'))
+MAX_VIEWS = 64
+
+# 관측소 코드 첫 자리 → 수계
+BASINS = {"1": "한강", "2": "낙동강", "3": "금강", "4": "섬진강", "5": "영산강", "6": "제주"}
+
+# 도구 inputSchema에 덧붙이는 페이지네이션 인자
+PAGE_PROPERTIES = {
+    "limit": {"type": "integer", "description": f"페이지 크기 (최대 {MAX_PAGE_SIZE})"},
+    "cursor": {"type": "string", "description": "이전 응답의 next_cursor (다음 페이지)"},
+    "agency": {"type": "string", "description": "관리 기관 (예: 환경부, 한국수자원공사)"},
+    "region": {"type": "string", "description": "주소 앞부분 (예: 서울특별시, 경기도 가평군)"},
+    "basin": {"type": "string", "description": f"수계 ({', '.join(BASINS.values())})"},
+}
+
+Filters = Tuple[str, str, str]
+
+
+def station_code(station: Dict[str, Any], hydro_type: str) -> str:
+    return str(station.get(CODE_FIELDS.get(hydro_type, "")) or station.get("obs_code") or "")
+
+
+def basin_of(code: str) -> str:
+    return BASINS.get(code[:1], "")
+
+
+def normalize_basin(basin: Optional[str]) -> str:
+    """"한강", "한강 수계", "1" → "한강" (모르는 값이면 ValueError)"""
+    value = str(basin or "").replace(" ", "").replace("수계", "").replace("유역", "")
+    if not value:
+        return ""
+    if value in BASINS:
+        return BASINS[value]
+    for name in BASINS.values():
+        if value in (name, name.rstrip("강")):
+            return name
+    raise ValueError(f"알 수 없는 수계: {basin} (가능: {', '.join(BASINS.values())})")
+
+
+def encode_cursor(after: str, filters: Filters) -> str:
+    raw = json.dumps([after, *filters], ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, Filters]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        after, agency, region, basin = json.loads(raw.decode("utf-8"))
+        return str(after), (str(agency), str(region), str(basin))
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        raise ValueError("잘못된 커서입니다")
+
+
+class PageIndex:
+    """카탈로그 버전별 페이지 색인 (CatalogEntry.derived로 한 번만 생성)
+
+    필터 조합별 결과(코드 순 위치 목록)는 처음 요청 때 한 번 계산해 두고,
+    이후 페이지는 이분 탐색 + 페이지 크기만큼의 슬라이스로 응답한다.
+    """
+
+    def __init__(self, stations: List[Dict[str, Any]], hydro_type: str):
+        ordered = sorted(((station_code(s, hydro_type), s) for s in stations), key=lambda item: item[0])
+        self.codes = [code for code, _ in ordered]
+        self.stations = [station for _, station in ordered]
+        self._views: "OrderedDict[Filters, Tuple[List[str], List[int]]]" = OrderedDict()
+
+    def view(self, filters: Filters) -> Tuple[List[str], List[int]]:
+        """필터에 맞는 (코드 목록, 위치 목록), 코드 오름차순"""
+        if filters == ("", "", ""):
+            return self.codes, range(len(self.codes))
+        cached = self._views.get(filters)
+        if cached is None:
+            agency, region, basin = filters
+            positions = [
+                i for i, (code, station) in enumerate(zip(self.codes, self.stations))
+                if (not agency or agency in str(station.get("agcnm") or station.get("agency") or ""))
+                and (not region or str(station.get("addr") or station.get("address") or "").startswith(region))
+                and (not basin or basin_of(code) == basin)
+            ]
+            cached = self._views[filters] = ([self.codes[i] for i in positions], positions)
+            while len(self._views) > MAX_VIEWS:
+                self._views.popitem(last=False)
+        self._views.move_to_end(filters)
+        return cached
+
+    def page(self, filters: Filters, after: str = "", limit: int = PAGE_SIZE) -> Dict[str, Any]:
+        codes, positions = self.view(filters)
+        start = bisect.bisect_right(codes, after) if after else 0
+        selected = positions[start:start + limit]
+        items = [self.stations[i] for i in selected]
+        has_more = start + limit < len(codes)
+        return {
+            "observatories": items,
+            "total_count": len(codes),
+            "returned_count": len(items),
+            "next_cursor": encode_cursor(self.codes[selected[-1]], filters) if has_more and items else None,
+        }
+
+
+def _filters(agency: Optional[str], region: Optional[str], basin: Optional[str]) -> Filters:
+    return str(agency or "").strip(), str(region or "").strip(), normalize_basin(basin)
+
+
+def _index(entry: CatalogEntry) -> PageIndex:
+    return entry.derived("page_index", lambda stations: PageIndex(stations, entry.hydro_type))
+
+
+def paginate(entry: CatalogEntry, limit: Optional[int] = None, cursor: Optional[str] = None,
+             agency: Optional[str] = None, region: Optional[str] = None,
+             basin: Optional[str] = None) -> Dict[str, Any]:
+    """카탈로그 엔트리의 한 페이지 (커서가 있으면 커서에 담긴 필터를 이어서 사용)"""
+    filters = _filters(agency, region, basin)
+    after = ""
+    if cursor:
+        after, cursor_filters = decode_cursor(cursor)
+        for given, saved in zip(filters, cursor_filters):
+            if given and given != saved:
+                raise ValueError("커서와 필터 조건이 다릅니다")
+        filters = cursor_filters
+    limit = max(1, min(int(limit or PAGE_SIZE), MAX_PAGE_SIZE))
+    # source가 "snapshot"이면 업스트림 갱신 전의 번들 스냅샷 데이터
+    result = {"hydro_type": entry.hydro_type, "source": entry.source}
+    result.update(_index(entry).page(filters, after, limit))
+    result["filters"] = dict(zip(("agency", "region", "basin"), filters))
+    return result
+
+
+def iter_chunks(entry: CatalogEntry, chunk: int = PAGE_SIZE, agency: Optional[str] = None,
+                region: Optional[str] = None,
+                basin: Optional[str] = None) -> Iterator[Tuple[List[Dict[str, Any]], int, int]]:
+    """필터에 맞는 관측소를 chunk개씩 → (관측소 목록, 지금까지 보낸 수, 전체 수), 스트리밍 응답용"""
+    index = _index(entry)
+    _, positions = index.view(_filters(agency, region, basin))
+    total = len(positions)
+    for start in range(0, total, max(1, chunk)):
+        end = min(start + chunk, total)
+        yield [index.stations[i] for i in positions[start:end]], end, total
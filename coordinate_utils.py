@@ -1,3 +1,11 @@
+import math
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0  # 지구 반지름 (km)
+
+
 def dms_to_decimal(dms_str: str) -> float:
     """도-분-초를 십진도로 변환"""
     try:
@@ -11,16 +19,109 @@ def dms_to_decimal(dms_str: str) -> float:
 
 def calculate_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     """두 좌표 간 거리 계산 (km)"""
-    import math
-    
-    R = 6371  # 지구 반지름 (km)
-    
+    R = EARTH_RADIUS_KM
+
     lat1_rad = math.radians(lat1)
     lat2_rad = math.radians(lat2)
     delta_lat = math.radians(lat2 - lat1)
     delta_lon = math.radians(lon2 - lon1)
-    
+
     a = math.sin(delta_lat/2)**2 + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(delta_lon/2)**2
     c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
-    
+
     return R * c
+
+def dms_to_decimal_array(values: Sequence[Any]) -> np.ndarray:
+    """도-분-초 문자열 목록을 십진도 배열로 일괄 변환
+
+    숫자 값은 이미 십진도로 간주한다. 해석할 수 없는 값은 0.0 대신 NaN으로 남겨
+    좌표가 없는 관측소를 거리 계산에서 걸러낼 수 있게 한다.
+    """
+    parts = np.full((len(values), 3), np.nan)
+    for i, value in enumerate(values):
+        if isinstance(value, (int, float)):
+            parts[i] = (value, 0.0, 0.0)
+            continue
+        fields = str(value or "").strip().split('-')
+        try:
+            if len(fields) == 3:
+                parts[i] = [float(f) for f in fields]
+            elif len(fields) == 1 and fields[0]:
+                parts[i] = (float(fields[0]), 0.0, 0.0)
+        except ValueError:
+            pass
+    return parts @ np.array([1.0, 1 / 60, 1 / 3600])
+
+def haversine_distances(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """한 지점에서 여러 지점까지의 거리 (km) - 한 번의 벡터 연산"""
+    lat1 = np.radians(lat)
+    lat2 = np.radians(lats)
+    delta_lat = lat2 - lat1
+    delta_lon = np.radians(lons) - np.radians(lon)
+
+    a = np.sin(delta_lat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(delta_lon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+def distance_matrix(lats1: np.ndarray, lons1: np.ndarray,
+                    lats2: Optional[np.ndarray] = None, lons2: Optional[np.ndarray] = None) -> np.ndarray:
+    """두 좌표 집합 간 쌍별 거리 행렬 (km), 두 번째 집합 생략 시 자기 자신과의 거리"""
+    if lats2 is None or lons2 is None:
+        lats2, lons2 = lats1, lons1
+    lat1 = np.radians(np.asarray(lats1, dtype=np.float64))[:, None]
+    lon1 = np.radians(np.asarray(lons1, dtype=np.float64))[:, None]
+    lat2 = np.radians(np.asarray(lats2, dtype=np.float64))[None, :]
+    lon2 = np.radians(np.asarray(lons2, dtype=np.float64))[None, :]
+
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+class StationCoordinates:
+    """카탈로그 관측소 좌표 (연속 float64 배열, 카탈로그 버전별로 한 번 생성)"""
+
+    def __init__(self, stations: List[Dict[str, Any]], previous: Optional["StationCoordinates"] = None):
+        self.stations = stations
+        raw = [(s.get("lat"), s.get("lon")) for s in stations]
+        self.lat = np.full(len(stations), np.nan)
+        self.lon = np.full(len(stations), np.nan)
+
+        # 카탈로그 갱신 시 원본 좌표 문자열이 같은 관측소는 이전 변환 결과 재사용
+        known = previous.parsed() if previous is not None else {}
+        missing = []
+        for i, key in enumerate(raw):
+            hit = known.get(key)
+            if hit is None:
+                missing.append(i)
+            else:
+                self.lat[i], self.lon[i] = hit
+        if missing:
+            self.lat[missing] = dms_to_decimal_array([raw[i][0] for i in missing])
+            self.lon[missing] = dms_to_decimal_array([raw[i][1] for i in missing])
+        self._raw = raw
+        # 좌표 누락(NaN) 또는 (0, 0) 값은 위치 검색에서 제외
+        self.valid = np.isfinite(self.lat) & np.isfinite(self.lon) & (self.lat != 0) & (self.lon != 0)
+
+    def __len__(self) -> int:
+        return len(self.stations)
+
+    def parsed(self) -> Dict[tuple, tuple]:
+        """원본 (lat, lon) 값 → 변환된 십진도"""
+        return {key: (self.lat[i], self.lon[i]) for i, key in enumerate(self._raw)}
+
+    def distances(self, lat: float, lon: float) -> np.ndarray:
+        """모든 관측소까지의 거리 (좌표 없는 관측소는 inf)"""
+        distances = haversine_distances(lat, lon, self.lat, self.lon)
+        distances[~self.valid] = np.inf
+        return distances
+
+    def nearest(self, lat: float, lon: float, k: int = 5,
+                radius_km: Optional[float] = None) -> List[tuple]:
+        """가까운 관측소 k개 [(관측소 번호, 거리 km)]"""
+        distances = self.distances(lat, lon)
+        if radius_km is not None:
+            distances[distances > radius_km] = np.inf
+        k = min(k, int(np.isfinite(distances).sum()))
+        if k <= 0:
+            return []
+        top = np.argpartition(distances, k - 1)[:k]
+        top = top[np.argsort(distances[top], kind="stable")]
+        return [(int(i), float(distances[i])) for i in top]
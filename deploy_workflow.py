@@ -14,15 +14,18 @@ class MCPDeploymentWorkflow:
         self.config_file = self.project_root / "chatgpt_mcp_config.json"
         
     def optimize_response_size(self):
-        """MCP 응답 크기 최적화"""
+        """MCP 응답 크기 최적화 (도구별 결과 크기 예산 확인)"""
         print("🔧 MCP 응답 크기 최적화...")
         
-        # 이미 수정된 mcp_server.py 확인
-        server_file = self.project_root / "mcp_server.py"
-        if "limit: int = 10" in server_file.read_text():
-            print("✅ 응답 크기 제한 이미 적용됨")
+        from mcp_server import tools
+        budgets = tools.budgets()
+        for name, budget in budgets.items():
+            print(f"  {name}: {budget.max_bytes or '-'} bytes / {budget.max_tokens or '-'} tokens"
+                  f"{'' if budget.downsample else ' (솎아내기 없음)'}")
+        if budgets and all(budget.max_bytes or budget.max_tokens for budget in budgets.values()):
+            print("✅ 응답 크기 예산 적용됨")
         else:
-            print("❌ 응답 크기 제한 필요")
+            print("❌ 응답 크기 예산 필요 (MCP_RESPONSE_MAX_BYTES / MCP_RESPONSE_MAX_TOKENS)")
             return False
         return True
     
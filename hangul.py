@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Hangul Jamo Utilities
+한글 음절을 초성/중성/종성 자모로 분해하고 자모 단위 편집거리로 오타에 강한 비교를 제공
+"""
+from functools import lru_cache
+from typing import Dict, List
+
+HANGUL_BASE = 0xAC00
+HANGUL_LAST = 0xD7A3
+
+# 호환용 자모 (초성 질의 "ㅎㄱ"과 같은 문자 체계)
+CHOSUNG = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+JUNGSUNG = "ㅏㅐㅑㅒㅓㅔㅕㅖㅗㅘㅙㅚㅛㅜㅝㅞㅟㅠㅡㅢㅣ"
+# 받침 없는 음절은 채움 문자(U+3164 HANGUL FILLER)를 넣어 음절 경계를 유지 ("강"이 "가음"의 앞부분이 되지 않도록)
+JONGSUNG_FILLER = "\u3164"
+JONGSUNG = [JONGSUNG_FILLER, "ㄱ", "ㄲ", "ㄳ", "ㄴ", "ㄵ", "ㄶ", "ㄷ", "ㄹ", "ㄺ", "ㄻ", "ㄼ", "ㄽ", "ㄾ",
+            "ㄿ", "ㅀ", "ㅁ", "ㅂ", "ㅄ", "ㅅ", "ㅆ", "ㅇ", "ㅈ", "ㅊ", "ㅋ", "ㅌ", "ㅍ", "ㅎ"]
+
+_CONSONANTS = set(CHOSUNG) | set(JONGSUNG[1:])
+
+
+def _normalize(text: str) -> str:
+    return "".join(text.split()).lower()
+
+
+def decompose(text: str) -> str:
+    """음절을 자모열로 분해 ("한강" → "ㅎㅏㄴㄱㅏㅇ", 받침이 없으면 JONGSUNG_FILLER), 공백 제거"""
+    out: List[str] = []
+    for ch in _normalize(text):
+        code = ord(ch)
+        if HANGUL_BASE <= code <= HANGUL_LAST:
+            offset = code - HANGUL_BASE
+            out.append(CHOSUNG[offset // 588])
+            out.append(JUNGSUNG[(offset % 588) // 28])
+            out.append(JONGSUNG[offset % 28])
+        else:
+            out.append(ch)
+    return "".join(out)
+
+
+def chosung(text: str) -> str:
+    """초성열 ("한강대교" → "ㅎㄱㄷㄱ"), 한글이 아닌 문자는 그대로 유지"""
+    out: List[str] = []
+    for ch in _normalize(text):
+        code = ord(ch)
+        if HANGUL_BASE <= code <= HANGUL_LAST:
+            out.append(CHOSUNG[(code - HANGUL_BASE) // 588])
+        else:
+            out.append(ch)
+    return "".join(out)
+
+
+def is_chosung_query(text: str) -> bool:
+    """자음만으로 이루어진 초성 질의인지 여부"""
+    text = _normalize(text)
+    return bool(text) and all(ch in _CONSONANTS for ch in text)
+
+
+@lru_cache(maxsize=256)
+def _pattern_masks(pattern: str) -> Dict[str, int]:
+    """글자별 pattern 위치 비트마스크 - 한 질의로 여러 관측소를 비교하므로 질의마다 한 번만 만듦"""
+    peq: Dict[str, int] = {}
+    for i, ch in enumerate(pattern):
+        peq[ch] = peq.get(ch, 0) | (1 << i)
+    return peq
+
+
+def substring_distance(pattern: str, text: str) -> int:
+    """pattern과 text의 가장 가까운 부분 문자열 사이 편집거리
+
+    Myers 비트 병렬 알고리즘(근사 문자열 검색)으로 text 한 글자당 정수 연산 몇 번에 계산한다.
+    """
+    m = len(pattern)
+    if m == 0:
+        return 0
+    peq = _pattern_masks(pattern)
+    mask = (1 << m) - 1
+    high = 1 << (m - 1)
+    pv, mv = mask, 0
+    score = best = m
+    for ch in text:
+        eq = peq.get(ch, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = (mv | ~(xh | pv)) & mask
+        mh = pv & xh
+        if ph & high:
+            score += 1
+        elif mh & high:
+            score -= 1
+        # 검색 모드: 시작 위치가 자유로우므로 첫 행에 올림수를 넣지 않음
+        ph = (ph << 1) & mask
+        mh = (mh << 1) & mask
+        pv = (mh | ~(xv | ph)) & mask
+        mv = ph & xv
+        if score < best:
+            best = score
+            if best == 0:
+                break
+    return best
+
+
+# similarity() 구간 - 정확히 포함 > 앞부분 일치 > 중간 포함 > 편집거리 후보 순으로 겹치지 않게 나눔
+PREFIX_FLOOR = 0.85
+SUBSTRING_FLOOR = 0.7
+# 편집거리 후보로 인정하는 최소 일치율 (1 - 편집거리/질의 자모 수), 질의 자모 4개당 편집 1번까지
+FUZZY_MIN_LOCAL = 0.75
+
+
+def length_ratio(a: str, b: str) -> float:
+    """2·min(|a|,|b|)/(|a|+|b|) - 길이가 비슷할수록 1에 가까움"""
+    total = len(a) + len(b)
+    return 2.0 * min(len(a), len(b)) / total if total else 0.0
+
+
+def _banded(query: str, target: str, distance: int) -> float:
+    ratio = length_ratio(query, target)
+    if distance == 0:
+        if target == query:
+            return 1.0
+        if target.startswith(query):
+            return PREFIX_FLOOR + (1.0 - PREFIX_FLOOR) * ratio
+        return SUBSTRING_FLOOR + (PREFIX_FLOOR - SUBSTRING_FLOOR) * ratio
+    return _fuzzy(query, distance, ratio)
+
+
+def _fuzzy(query: str, distance: int, ratio: float) -> float:
+    """편집거리 후보 점수 - 정규화한 편집거리 순서가 먼저이고, 길이 비율은 같은 거리 안에서만 순서를 정함
+
+    길이 비율 감점은 최대 (1 - 거리/길이)/(2·길이)로 편집 한 번(1/길이)보다 작다.
+    일치율이 FUZZY_MIN_LOCAL보다 낮으면 후보가 아니다 (0).
+    """
+    m = len(query)
+    local = 1.0 - distance / m
+    if local < FUZZY_MIN_LOCAL:
+        return 0.0
+    return SUBSTRING_FLOOR * local * (1.0 - (1.0 - ratio) / (2 * m))
+
+
+def similarity(query: str, target: str) -> float:
+    """자모열 유사도 (0~1)
+
+    질의가 대상과 같으면 1, 대상의 앞부분이면 [PREFIX_FLOOR, 1), 중간에 그대로 포함되면
+    [SUBSTRING_FLOOR, PREFIX_FLOOR) 구간에서 길이가 비슷할수록 높다.
+    포함되지 않으면 정규화한 부분 편집거리 순으로 SUBSTRING_FLOOR 미만 값을 매기므로(길이 비율은 같은 거리끼리만 비교),
+    짧은 이름의 오타 후보("강창")가 질의를 그대로 포함한 긴 이름("평창군(...)")보다 앞서지 않고,
+    자모 하나 틀린 긴 이름("서울시(한강대교)")이 세 번 고쳐야 하는 짧은 이름("팔당대교")보다 앞선다.
+    """
+    if not query or not target:
+        return 0.0
+    return _banded(query, target, substring_distance(query, target))
+
+
+def similarity_bound(query: str, target: str, min_distance: int = 0) -> float:
+    """부분 편집거리가 min_distance 이상일 때 similarity()가 가질 수 있는 최대값"""
+    if not query or not target:
+        return 0.0
+    if min_distance == 0 and len(target) >= len(query):
+        if len(target) == len(query):
+            return 1.0
+        return PREFIX_FLOOR + (1.0 - PREFIX_FLOOR) * length_ratio(query, target)
+    return _fuzzy(query, min_distance, length_ratio(query, target))
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Hot Station Poller
+자주 조회되는 관측소 실시간 데이터를 업스트림 갱신 주기에 맞춰 미리 받아 두는 백그라운드 스케줄러
+"""
+import asyncio
+import math
+import os
+import random
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from metrics import CACHE_REQUESTS
+
+# 업스트림 관측 주기 (초) - 10분 자료는 10분마다, 1시간 자료는 매시 갱신
+CADENCE = {"10M": 600.0, "1H": 3600.0, "1D": 86400.0}
+PUBLISH_DELAY = float(os.getenv('HRFCO_HOT_PUBLISH_DELAY', '120'))   # 주기 경계 후 자료가 올라오기까지 여유
+JITTER = float(os.getenv('HRFCO_HOT_JITTER', '60'))                 # 갱신 시각 분산 (초)
+TOP_N = int(os.getenv('HRFCO_HOT_TOP_N', '20'))
+MIN_SCORE = float(os.getenv('HRFCO_HOT_MIN_SCORE', '2.5'))       # 최근 약 3회 이상 조회된 관측소
+HALF_LIFE = float(os.getenv('HRFCO_HOT_HALF_LIFE', '3600'))         # 조회 빈도 점수 반감기 (초)
+RATE_BUDGET = float(os.getenv('HRFCO_HOT_RATE_BUDGET', '30'))       # 분당 백그라운드 업스트림 호출 상한
+LATE_RETRY = float(os.getenv('HRFCO_HOT_LATE_RETRY', '60'))         # 게시가 늦은 자료를 다시 확인할 간격 (초)
+MAX_TRACKED = 2000
+TICK = 5.0
+
+# 관측 시각(ymdhm)은 한국 표준시 기준 - 1일 주기 경계도 KST 자정에 맞춤
+KST = timezone(timedelta(hours=9))
+UTC_OFFSET = 9 * 3600.0
+
+# (hydro_type, obs_code, time_type)
+StationKey = Tuple[str, str, str]
+Loader = Callable[[], Awaitable[Any]]
+
+
+class _Tracked:
+    __slots__ = ("score", "seen_at", "loader", "value", "fetched_at", "expires_at", "due_at", "failures")
+
+    def __init__(self):
+        self.score = 0.0
+        self.seen_at = 0.0
+        self.loader: Optional[Loader] = None
+        self.value: Any = None
+        self.fetched_at = 0.0
+        self.expires_at = 0.0
+        self.due_at = 0.0
+        self.failures = 0
+
+
+def next_publish(now: float, cadence: float, delay: float = PUBLISH_DELAY) -> float:
+    """now 이후 다음 자료 게시 예상 시각 (주기 경계 + 게시 지연)"""
+    boundary = math.floor((now + UTC_OFFSET - delay) / cadence) * cadence + cadence - UTC_OFFSET
+    return boundary + delay
+
+
+def latest_observation(value: Any) -> Optional[float]:
+    """응답 중 가장 최근 관측 시각 (epoch 초), 시각을 알 수 없으면 None
+
+    업스트림 응답(content 레코드의 ymdhm)과 시계열 응답(열 기반 ymdhm 목록)을 모두 읽는다.
+    """
+    if not isinstance(value, dict):
+        return None
+    if isinstance(value.get("ymdhm"), list):
+        stamps = [str(ts)[:12] for ts in value["ymdhm"] if ts]
+    elif isinstance(value.get("content"), list):
+        stamps = [str(r["ymdhm"])[:12] for r in value["content"] if isinstance(r, dict) and r.get("ymdhm")]
+    else:
+        return None
+    if not stamps:
+        return None
+    try:
+        return datetime.strptime(max(stamps), "%Y%m%d%H%M").replace(tzinfo=KST).timestamp()
+    except ValueError:
+        return None
+
+
+class HotStationPoller:
+    """조회 빈도 상위 관측소를 주기 경계마다 미리 갱신
+
+    - 요청마다 관측소 점수를 올리고(지수 감쇠), 다음 게시 시각까지는 메모리에서 응답
+    - 점수 상위 TOP_N 관측소는 다음 게시 시각 + 무작위 지연에 백그라운드로 갱신
+    - 백그라운드 호출은 토큰 버킷(분당 RATE_BUDGET회)으로 제한, 모자라면 다음 틱으로 미룸
+    - 받은 자료의 최근 관측 시각이 이미 게시됐어야 할 주기 경계보다 이르면(업스트림 게시 지연)
+      다음 경계까지 붙잡지 않고 LATE_RETRY 후 다시 받음
+    """
+
+    def __init__(self, top_n: int = TOP_N, min_score: float = MIN_SCORE, half_life: float = HALF_LIFE,
+                 rate_budget: float = RATE_BUDGET, jitter: float = JITTER,
+                 publish_delay: float = PUBLISH_DELAY, tick: float = TICK, late_retry: float = LATE_RETRY):
+        self.top_n = top_n
+        self.min_score = min_score
+        self.half_life = half_life
+        self.rate_budget = rate_budget
+        self.jitter = jitter
+        self.publish_delay = publish_delay
+        self.tick = tick
+        self.late_retry = late_retry
+        self._tracked: "OrderedDict[StationKey, _Tracked]" = OrderedDict()
+        self._tokens = rate_budget
+        self._tokens_at = time.time()
+        self._task: Optional[asyncio.Task] = None
+        self.counters = {"hits": 0, "misses": 0, "refreshes": 0, "refresh_errors": 0, "deferred": 0, "late": 0}
+
+    def _cadence(self, key: StationKey) -> float:
+        return CADENCE.get(key[2], CADENCE["1H"])
+
+    def _track(self, key: StationKey, now: float) -> _Tracked:
+        item = self._tracked.get(key)
+        if item is None:
+            item = self._tracked[key] = _Tracked()
+            while len(self._tracked) > MAX_TRACKED:
+                self._tracked.popitem(last=False)
+        self._tracked.move_to_end(key)
+        item.score = item.score * 0.5 ** ((now - item.seen_at) / self.half_life) + 1.0 if item.seen_at else 1.0
+        item.seen_at = now
+        return item
+
+    def _store(self, key: StationKey, item: _Tracked, value: Any, now: float):
+        item.value = value
+        item.fetched_at = now
+        item.failures = 0
+        cadence = self._cadence(key)
+        item.expires_at = next_publish(now, cadence, self.publish_delay)
+        # 지금쯤 게시돼 있어야 할 가장 최근 주기 경계
+        expected = item.expires_at - self.publish_delay - cadence
+        latest = latest_observation(value)
+        if latest is not None and latest < expected:
+            self.counters["late"] += 1
+            item.expires_at = min(item.expires_at, now + self.late_retry)
+            item.due_at = item.expires_at
+            return
+        item.due_at = item.expires_at + random.uniform(0, self.jitter)
+
+    async def serve(self, key: StationKey, loader: Loader) -> Any:
+        """관측소 데이터 조회 - 다음 게시 시각 전이면 메모리에서, 아니면 loader로 받아 저장"""
+        now = time.time()
+        item = self._track(key, now)
+        item.loader = loader
+        if item.fetched_at and now < item.expires_at:
+            self.counters["hits"] += 1
+            CACHE_REQUESTS.inc(cache="hot_station", result="hit")
+            return item.value
+        self.counters["misses"] += 1
+        CACHE_REQUESTS.inc(cache="hot_station", result="miss")
+        value = await loader()
+        self._store(key, item, value, time.time())
+        return value
+
+    def hot(self) -> List[StationKey]:
+        """현재 점수 기준 상위 관측소"""
+        now = time.time()
+        scored = []
+        for key, item in self._tracked.items():
+            score = item.score * 0.5 ** ((now - item.seen_at) / self.half_life)
+            if score >= self.min_score:
+                scored.append((score, key))
+        scored.sort(reverse=True)
+        return [key for _, key in scored[:self.top_n]]
+
+    def _take_token(self, now: float) -> bool:
+        self._tokens = min(self.rate_budget, self._tokens + (now - self._tokens_at) * self.rate_budget / 60.0)
+        self._tokens_at = now
+        if self._tokens < 1.0:
+            return False
+        self._tokens -= 1.0
+        return True
+
+    async def poll_once(self) -> int:
+        """갱신 시각이 된 인기 관측소를 예산 안에서 갱신, 갱신한 수 반환"""
+        now = time.time()
+        due = [key for key in self.hot()
+               if self._tracked[key].loader is not None and now >= self._tracked[key].due_at]
+        batch = []
+        for key in due:
+            if not self._take_token(now):
+                self.counters["deferred"] += len(due) - len(batch)
+                break
+            batch.append(key)
+        results = await asyncio.gather(*(self._tracked[key].loader() for key in batch), return_exceptions=True)
+        for key, result in zip(batch, results):
+            item = self._tracked.get(key)
+            if item is None:
+                continue
+            if isinstance(result, Exception):
+                self.counters["refresh_errors"] += 1
+                item.failures += 1
+                # 실패 시 다음 틱마다 재시도하지 않도록 주기의 일부만큼 물러남
+                item.due_at = time.time() + min(self._cadence(key), self.tick * 2 ** item.failures)
+            else:
+                self.counters["refreshes"] += 1
+                self._store(key, item, result, time.time())
+        return len(batch)
+
+    async def run(self):
+        while True:
+            try:
+                await self.poll_once()
+            except Exception:
+                pass
+            await asyncio.sleep(self.tick)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return dict(self.counters, tracked=len(self._tracked), hot=["/".join(key) for key in self.hot()],
+                    running=self._task is not None and not self._task.done())
+
+
+# 프로세스 전역 인스턴스
+hot_station_poller = HotStationPoller()
@@ -7,14 +7,14 @@ text/event-stream 헤더 요구 없이 일반 HTTP로 MCP 프로토콜 지원
 import os
 import sys
 import asyncio
-import json
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
-from typing import Dict, Any
+from typing import Any, AsyncIterator, Dict, List, Optional, Union
 
 # FastAPI 및 관련 라이브러리
 try:
-    from fastapi import FastAPI, HTTPException, Response, Body
-    from fastapi.responses import JSONResponse
+    from fastapi import FastAPI, HTTPException, Request, Response, Body
+    from fastapi.responses import JSONResponse, StreamingResponse
     from fastapi.middleware.cors import CORSMiddleware
     import httpx
     import uvicorn
@@ -24,13 +24,37 @@ except ImportError as e:
     print('pip install fastapi httpx uvicorn')
     sys.exit(1)
 
+import upstream
+from bulk_fetch import fetch_bulk
+from catalog_cache import catalog_cache
+from catalog_pages import iter_chunks, paginate
+from hot_stations import hot_station_poller
+from jsonrpc_batch import handle_batch, iter_batch
+from metrics import instrument_app
+from response_budget import Budget
+from timeseries_store import DEFAULT_HOURS, series_service
+from tool_registry import STREAM_CHUNK, ToolDispatcher, encode_message, mcp_tools
+
 # 환경변수 설정
 HRFCO_API_KEY = os.getenv('HRFCO_API_KEY', '')
 WEATHER_API_KEY = os.getenv('WEATHER_API_KEY', '')
 WAMIS_API_KEY = os.getenv('WAMIS_API_KEY', '')
 
+# 배치 요청에서 동시에 실행할 호출 수 상한
+MCP_MAX_CONCURRENCY = int(os.getenv('MCP_MAX_CONCURRENCY', '8'))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """앱 수명주기: 인기 관측소 백그라운드 갱신 시작, 종료 시 업스트림 커넥션 풀 정리"""
+    hot_station_poller.start()
+    yield
+    await hot_station_poller.stop()
+    await upstream.close_client()
+
 # FastAPI 앱 생성
-app = FastAPI(title="HRFCO HTTP MCP Server", version="1.1.0")
+app = FastAPI(title="HRFCO HTTP MCP Server", version="1.1.0", lifespan=lifespan)
+# 요청/도구/업스트림 지표 (GET /metrics, Prometheus 텍스트 형식)
+instrument_app(app)
 
 # CORS 허용 (ChatGPT 등 외부에서 사전요청/검증 가능하도록)
 app.add_middleware(
@@ -48,37 +72,48 @@ class HRFCOClient:
         self.api_key = api_key
         self.base_url = "http://api.hrfco.go.kr"
     
-    async def get_observatories(self, hydro_type: str = "waterlevel") -> Dict[str, Any]:
-        """관측소 정보 조회"""
+    async def get_observatories(self, hydro_type: str = "waterlevel", limit: Optional[int] = None,
+                                cursor: Optional[str] = None, agency: Optional[str] = None,
+                                region: Optional[str] = None, basin: Optional[str] = None) -> Dict[str, Any]:
+        """관측소 정보 조회 (페이지/필터 인자가 있으면 한 페이지씩, 없으면 전체 목록)"""
         if not self.api_key:
             raise ValueError("API 키가 필요합니다. HRFCO_API_KEY 환경변수를 설정해주세요.")
             
         try:
-            url = f"http://api.hrfco.go.kr/{self.api_key}/{hydro_type}/info.json"
-            async with httpx.AsyncClient() as client:
-                response = await client.get(url, timeout=30.0)
-                response.raise_for_status()
-                return response.json()
+            if limit or cursor or agency or region or basin:
+                return paginate(await catalog_cache.get_entry(hydro_type), limit, cursor, agency, region, basin)
+            entry = await catalog_cache.get_entry(hydro_type)
+            return {"content": entry.stations, "source": entry.source}
         except Exception as e:
             raise Exception(f"홍수통제소 API 호출 실패: {str(e)}")
     
-    async def get_waterlevel_data(self, obs_code: str, time_type: str = "1H") -> Dict[str, Any]:
-        """수위 데이터 조회"""
+    async def get_waterlevel_data(self, obs_code: str, time_type: str = "1H",
+                                  hours: Optional[float] = None, aggregate: Optional[str] = None,
+                                  downsample: Optional[int] = None,
+                                  rate_of_change: bool = False) -> Dict[str, Any]:
+        """수위 데이터 조회 (hours/집계 옵션 지정 시 시계열 저장소에서 최근 구간, 누락분만 업스트림 조회)"""
         if not self.api_key:
             raise ValueError("API 키가 필요합니다. HRFCO_API_KEY 환경변수를 설정해주세요.")
             
         try:
-            url = f"http://api.hrfco.go.kr/{self.api_key}/waterlevel/data.json"
-            params = {
-                "obs_code": obs_code,
-                "time_type": time_type
-            }
-            async with httpx.AsyncClient() as client:
-                response = await client.get(url, params=params, timeout=30.0)
-                response.raise_for_status()
-                return response.json()
+            if hours or aggregate or downsample or rate_of_change:
+                return await series_service.get_series(obs_code, "waterlevel", time_type,
+                                                       float(hours or DEFAULT_HOURS), aggregate, downsample,
+                                                       bool(rate_of_change))
+            # 옵션이 없으면 최근 DEFAULT_HOURS시간, 자주 조회되는 관측소는 다음 게시 시각까지 메모리에서 응답
+            return await hot_station_poller.serve(
+                ("waterlevel", obs_code, time_type),
+                lambda: series_service.get_series(obs_code, "waterlevel", time_type, DEFAULT_HOURS)
+            )
         except Exception as e:
             raise Exception(f"수위 데이터 조회 실패: {str(e)}")
+    
+    async def get_waterlevel_data_bulk(self, obs_codes: List[str], time_type: str = "1H") -> Dict[str, Any]:
+        """여러 관측소 수위 데이터 동시 조회"""
+        if not self.api_key:
+            raise ValueError("API 키가 필요합니다. HRFCO_API_KEY 환경변수를 설정해주세요.")
+        
+        return await fetch_bulk(obs_codes, "waterlevel", time_type)
 
 class WeatherClient:
     """기상청 API 클라이언트"""
@@ -104,10 +139,7 @@ class WeatherClient:
                 "nx": nx,
                 "ny": ny
             }
-            async with httpx.AsyncClient() as client:
-                response = await client.get(url, params=params, timeout=30.0)
-                response.raise_for_status()
-                return response.json()
+            return await upstream.fetch_json(url, params=params, timeout=30.0)
         except Exception as e:
             raise Exception(f"기상청 API 호출 실패: {str(e)}")
 
@@ -115,6 +147,93 @@ class WeatherClient:
 hrfco_client = HRFCOClient(HRFCO_API_KEY)
 weather_client = WeatherClient(WEATHER_API_KEY)
 
+# 도구 처리 함수 (인자는 스키마 검사를 통과한 뒤 전달됨)
+tools = ToolDispatcher(mcp_tools)
+
+# 관측소 목록은 솎아내면 의미가 없으므로 예산 초과 시 바로 요약 + 커서
+@tools.tool("get_observatories", budget=Budget(downsample=False))
+async def observatories_tool(client: HRFCOClient, args: Dict[str, Any]) -> Dict[str, Any]:
+    return await client.get_observatories(
+        hydro_type=args.get("hydro_type", "waterlevel"),
+        limit=args.get("limit"),
+        cursor=args.get("cursor"),
+        agency=args.get("agency"),
+        region=args.get("region"),
+        basin=args.get("basin")
+    )
+
+@tools.tool("get_waterlevel_data")
+async def waterlevel_tool(client: HRFCOClient, args: Dict[str, Any]) -> Dict[str, Any]:
+    return await client.get_waterlevel_data(
+        obs_code=args["obs_code"],
+        time_type=args.get("time_type", "1H"),
+        hours=args.get("hours"),
+        aggregate=args.get("aggregate"),
+        downsample=args.get("downsample"),
+        rate_of_change=args.get("rate_of_change", False)
+    )
+
+@tools.tool("get_waterlevel_data_bulk", timeout=60, max_concurrency=2)
+async def waterlevel_bulk_tool(client: HRFCOClient, args: Dict[str, Any]) -> Dict[str, Any]:
+    return await client.get_waterlevel_data_bulk(
+        obs_codes=args["obs_codes"],
+        time_type=args.get("time_type", "1H")
+    )
+
+@tools.tool("get_weather_data")
+async def weather_tool(client: HRFCOClient, args: Dict[str, Any]) -> Dict[str, Any]:
+    return await weather_client.get_weather_data(nx=args["nx"], ny=args["ny"])
+
+@tools.tool("recommend_nearby_stations", timeout=20)
+async def nearby_stations_tool(client: HRFCOClient, args: Dict[str, Any]) -> Dict[str, Any]:
+    from smart_water_search import search_engine
+    return await search_engine.recommend_nearby_stations(
+        args["location"],
+        args.get("radius", 20),
+        limit=args.get("limit", 5),
+        data_type=args.get("data_type")
+    )
+
+# 스트리밍 전송(/mcp, Accept: text/event-stream · application/x-ndjson) 시 결과를 STREAM_CHUNK개씩 나눠 보냄
+@tools.stream("get_observatories")
+async def observatories_stream(client: HRFCOClient, args: Dict[str, Any]):
+    if args.get("limit") or args.get("cursor"):
+        # 페이지를 지정한 호출은 그 페이지 하나
+        yield await observatories_tool(client, args), 1, 1
+        return
+    if not client.api_key:
+        raise ValueError("API 키가 필요합니다. HRFCO_API_KEY 환경변수를 설정해주세요.")
+    hydro_type = args.get("hydro_type", "waterlevel")
+    entry = await catalog_cache.get_entry(hydro_type)
+    for stations, sent, total in iter_chunks(entry, STREAM_CHUNK, args.get("agency"),
+                                             args.get("region"), args.get("basin")):
+        yield {"hydro_type": hydro_type, "source": entry.source, "observatories": stations,
+               "sent_count": sent, "total_count": total}, sent, total
+        # 조각 사이에 이벤트 루프 양보 (다른 요청이 굶지 않도록)
+        await asyncio.sleep(0)
+
+@tools.stream("get_waterlevel_data")
+async def waterlevel_stream(client: HRFCOClient, args: Dict[str, Any]):
+    if not args.get("hours") or args.get("aggregate") or args.get("downsample") or args.get("rate_of_change"):
+        # 집계/축약한 결과는 이미 작으므로 한 조각
+        yield await waterlevel_tool(client, args), 1, 1
+        return
+    if not client.api_key:
+        raise ValueError("API 키가 필요합니다. HRFCO_API_KEY 환경변수를 설정해주세요.")
+    async for part in series_service.iter_series(args["obs_code"], "waterlevel", args.get("time_type", "1H"),
+                                                 float(args["hours"]), STREAM_CHUNK):
+        yield part
+
+# tools/list · /tools · initialize 응답은 시작 시 한 번만 직렬화
+TOOLS_LIST = tools.tools_list()
+INITIALIZE = mcp_tools.initialize("hrfco-http-mcp", "1.1.0", {
+    # 서버가 도중에 도구 목록 변경 알림을 보낼 수 있는지 여부
+    "tools": {"listChanged": False},
+    # 일부 클라이언트가 키 존재를 기대할 수 있으므로 명시
+    "resources": {},
+    "prompts": {}
+})
+
 @app.get("/")
 async def root():
     """루트 엔드포인트"""
@@ -124,7 +243,8 @@ async def root():
         "endpoints": {
             "mcp": "/mcp",
             "health": "/health",
-            "tools": "/tools"
+            "tools": "/tools",
+            "metrics": "/metrics"
         }
     }
 
@@ -138,7 +258,8 @@ async def health():
             "hrfco": bool(HRFCO_API_KEY),
             "weather": bool(WEATHER_API_KEY),
             "wamis": bool(WAMIS_API_KEY)
-        }
+        },
+        "hot_stations": hot_station_poller.stats()
     }
 
 @app.get("/.well-known/mcp")
@@ -155,63 +276,9 @@ async def mcp_well_known():
     }
 
 @app.get("/tools")
-async def list_tools():
-    """사용 가능한 도구 목록"""
-    return {
-        "tools": [
-            {
-                "name": "get_observatories",
-                "description": "홍수통제소 관측소 정보 조회",
-                "inputSchema": {
-                    "type": "object",
-                    "properties": {
-                        "hydro_type": {
-                            "type": "string",
-                            "description": "수문 유형 (waterlevel, flow 등)",
-                            "default": "waterlevel"
-                        }
-                    }
-                }
-            },
-            {
-                "name": "get_waterlevel_data",
-                "description": "수위 데이터 조회",
-                "inputSchema": {
-                    "type": "object",
-                    "properties": {
-                        "obs_code": {
-                            "type": "string",
-                            "description": "관측소 코드"
-                        },
-                        "time_type": {
-                            "type": "string",
-                            "description": "시간 유형 (1H, 1D 등)",
-                            "default": "1H"
-                        }
-                    },
-                    "required": ["obs_code"]
-                }
-            },
-            {
-                "name": "get_weather_data",
-                "description": "날씨 데이터 조회",
-                "inputSchema": {
-                    "type": "object",
-                    "properties": {
-                        "nx": {
-                            "type": "integer",
-                            "description": "격자 X 좌표"
-                        },
-                        "ny": {
-                            "type": "integer",
-                            "description": "격자 Y 좌표"
-                        }
-                    },
-                    "required": ["nx", "ny"]
-                }
-            }
-        ]
-    }
+async def list_tools(request: Request):
+    """사용 가능한 도구 목록 (tools/list 결과와 같음, ETag로 재검증)"""
+    return TOOLS_LIST.http_response(request.headers.get("if-none-match"))
 
 @app.get("/mcp")
 async def mcp_probe():
@@ -227,9 +294,8 @@ async def mcp_head():
 async def mcp_options():
     return Response(status_code=204, headers={"Allow": "POST, GET, HEAD, OPTIONS"})
 
-@app.post("/mcp")
-async def mcp_endpoint(payload: Dict[str, Any] = Body(...)):
-    """MCP 프로토콜 엔드포인트"""
+async def handle_rpc(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """JSON-RPC 요청 하나 처리"""
     try:
         # JSON-RPC 요청 처리
         method = payload.get("method")
@@ -238,158 +304,17 @@ async def mcp_endpoint(payload: Dict[str, Any] = Body(...)):
 
         # MCP initialize 핸드셰이크 지원 (OpenAI Platform 호환)
         if method == "initialize":
-            result = {
-                "protocolVersion": "2024-11-05",
-                "capabilities": {
-                    "tools": {
-                        # 서버가 도중에 도구 목록 변경 알림을 보낼 수 있는지 여부
-                        "listChanged": False
-                    },
-                    # 일부 클라이언트가 키 존재를 기대할 수 있으므로 명시
-                    "resources": {},
-                    "prompts": {}
-                },
-                "serverInfo": {
-                    "name": "hrfco-http-mcp",
-                    "version": "1.1.0"
-                }
-            }
-            return {"jsonrpc": "2.0", "id": request_id, "result": result}
+            return {"jsonrpc": "2.0", "id": request_id, "result": INITIALIZE.data}
 
         # 무시 가능한 알림/핑 처리
         if method in ("notifications/initialized", "ping"):
             return {"jsonrpc": "2.0", "id": request_id, "result": {"ok": True}}
 
         if method == "tools/list":
-            return {
-                "jsonrpc": "2.0",
-                "id": request_id,
-                "result": {
-                    "tools": [
-                        {
-                            "name": "get_observatories",
-                            "description": "홍수통제소 관측소 정보 조회",
-                            "inputSchema": {
-                                "type": "object",
-                                "properties": {
-                                    "hydro_type": {
-                                        "type": "string",
-                                        "description": "수문 유형 (waterlevel, flow 등)",
-                                        "default": "waterlevel"
-                                    }
-                                },
-                                "additionalProperties": False
-                            }
-                        },
-                        {
-                            "name": "get_waterlevel_data",
-                            "description": "수위 데이터 조회",
-                            "inputSchema": {
-                                "type": "object",
-                                "properties": {
-                                    "obs_code": {
-                                        "type": "string",
-                                        "description": "관측소 코드"
-                                    },
-                                    "time_type": {
-                                        "type": "string",
-                                        "description": "시간 유형 (1H, 1D 등)",
-                                        "default": "1H"
-                                    }
-                                },
-                                "additionalProperties": False,
-                                "required": ["obs_code"]
-                            }
-                        },
-                        {
-                            "name": "get_weather_data",
-                            "description": "날씨 데이터 조회",
-                            "inputSchema": {
-                                "type": "object",
-                                "properties": {
-                                    "nx": {
-                                        "type": "integer",
-                                        "description": "격자 X 좌표"
-                                    },
-                                    "ny": {
-                                        "type": "integer",
-                                        "description": "격자 Y 좌표"
-                                    }
-                                },
-                                "additionalProperties": False,
-                                "required": ["nx", "ny"]
-                            }
-                        }
-                    ]
-                }
-            }
+            return {"jsonrpc": "2.0", "id": request_id, "result": TOOLS_LIST.data}
         
         elif method == "tools/call":
-            tool_name = params.get("name")
-            arguments = params.get("arguments", {})
-            
-            if tool_name == "get_observatories":
-                result = await hrfco_client.get_observatories(
-                    hydro_type=arguments.get("hydro_type", "waterlevel")
-                )
-                return {
-                    "jsonrpc": "2.0",
-                    "id": request_id,
-                    "result": {
-                        "content": [
-                            {
-                                "type": "text",
-                                "text": json.dumps(result, ensure_ascii=False, indent=2)
-                            }
-                        ]
-                    }
-                }
-            
-            elif tool_name == "get_waterlevel_data":
-                result = await hrfco_client.get_waterlevel_data(
-                    obs_code=arguments.get("obs_code"),
-                    time_type=arguments.get("time_type", "1H")
-                )
-                return {
-                    "jsonrpc": "2.0",
-                    "id": request_id,
-                    "result": {
-                        "content": [
-                            {
-                                "type": "text",
-                                "text": json.dumps(result, ensure_ascii=False, indent=2)
-                            }
-                        ]
-                    }
-                }
-            
-            elif tool_name == "get_weather_data":
-                result = await weather_client.get_weather_data(
-                    nx=arguments.get("nx"),
-                    ny=arguments.get("ny")
-                )
-                return {
-                    "jsonrpc": "2.0",
-                    "id": request_id,
-                    "result": {
-                        "content": [
-                            {
-                                "type": "text",
-                                "text": json.dumps(result, ensure_ascii=False, indent=2)
-                            }
-                        ]
-                    }
-                }
-            
-            else:
-                return {
-                    "jsonrpc": "2.0",
-                    "id": request_id,
-                    "error": {
-                        "code": -32601,
-                        "message": f"Unknown tool: {tool_name}"
-                    }
-                }
+            return await tools.call(hrfco_client, request_id, params)
         
         else:
             return {
@@ -411,6 +336,81 @@ async def mcp_endpoint(payload: Dict[str, Any] = Body(...)):
             }
         }
 
+# 스트리밍 응답 형식 (Accept 헤더로 선택)
+STREAM_MEDIA_TYPES = ("text/event-stream", "application/x-ndjson")
+
+def stream_media_type(accept: str) -> Optional[str]:
+    """Accept에서 가장 선호하는 형식이 스트리밍 형식일 때만 그 형식 (q가 같으면 먼저 적은 쪽)
+
+    표준 MCP 클라이언트의 "application/json, text/event-stream"은 JSON을 먼저 적었으므로
+    결과 크기 예산이 적용되는 일반 응답을 받는다.
+    """
+    best, best_q = None, -1.0
+    for part in accept.split(","):
+        media, *options = [item.strip() for item in part.split(";")]
+        if not media:
+            continue
+        q = 1.0
+        for option in options:
+            if option.startswith("q="):
+                try:
+                    q = float(option[2:])
+                except ValueError:
+                    q = 0.0
+        if q > best_q:
+            best, best_q = media.lower(), q
+    return best if best in STREAM_MEDIA_TYPES and best_q > 0 else None
+
+async def stream_rpc(payload: Dict[str, Any]) -> AsyncIterator[Union[Dict[str, Any], str]]:
+    """JSON-RPC 요청 하나를 메시지 단위로 처리 (tools/call은 청크별 진행 알림 후 완료 응답)"""
+    params = payload.get("params")
+    if payload.get("method") == "tools/call" and isinstance(params, dict):
+        async for message in tools.iter_call(hrfco_client, payload.get("id"), params):
+            yield message
+        return
+    yield await handle_rpc(payload)
+
+async def stream_payload(payload: Union[Dict[str, Any], List[Any]]) -> AsyncIterator[Union[Dict[str, Any], str]]:
+    if isinstance(payload, list):
+        # 배치는 끝나는 순서대로 응답 하나씩
+        async for response in iter_batch(payload, handle_rpc, MCP_MAX_CONCURRENCY):
+            yield response
+        return
+    async for message in stream_rpc(payload):
+        yield message
+
+async def frame_sse(messages: AsyncIterator[Union[Dict[str, Any], str]]) -> AsyncIterator[bytes]:
+    """SSE 프레임: 메시지 하나 = event 하나 (받는 즉시 파싱 가능)"""
+    async for message in messages:
+        yield b"event: message\ndata: " + encode_message(message) + b"\n\n"
+
+async def frame_ndjson(messages: AsyncIterator[Union[Dict[str, Any], str]]) -> AsyncIterator[bytes]:
+    """NDJSON 프레임: 메시지 하나 = 한 줄"""
+    async for message in messages:
+        yield encode_message(message) + b"\n"
+
+@app.post("/mcp")
+async def mcp_endpoint(request: Request, payload: Union[Dict[str, Any], List[Any]] = Body(...)):
+    """MCP 프로토콜 엔드포인트 (단일 요청 또는 JSON-RPC 배치 배열)
+
+    Accept에서 text/event-stream 또는 application/x-ndjson을 가장 선호하면 메시지를 만드는 대로 전송
+    (스트리밍 도구는 청크마다 진행 알림 하나, 마지막에 보낸 양만 담은 응답)
+    """
+    media_type = stream_media_type(request.headers.get("accept", ""))
+    if media_type is not None:
+        frame = frame_sse if media_type == "text/event-stream" else frame_ndjson
+        return StreamingResponse(frame(stream_payload(payload)), media_type=media_type,
+                                 headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+    if isinstance(payload, list):
+        responses = await handle_batch(payload, handle_rpc, MCP_MAX_CONCURRENCY)
+        if responses is None:
+            # 알림만 담긴 배치는 응답 본문 없음
+            return Response(status_code=202)
+    else:
+        responses = await handle_rpc(payload)
+    return Response(encode_message(responses), media_type="application/json")
+
 if __name__ == "__main__":
     print("🌐 HTTP MCP 서버를 시작합니다...")
     print("📡 URL: http://0.0.0.0:8000")
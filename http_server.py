@@ -3,13 +3,13 @@
 HTTP MCP Server for ChatGPT API
 """
 import os
-import json
 import asyncio
+from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import Dict, Any
+from typing import Any, Dict, List, Optional, Union
 
 try:
-    from fastapi import FastAPI, HTTPException, Body
+    from fastapi import FastAPI, HTTPException, Response, Body
     from fastapi.middleware.cors import CORSMiddleware
     import httpx
     import uvicorn
@@ -17,10 +17,28 @@ except ImportError as e:
     print(f"필수 패키지 설치: pip install fastapi httpx uvicorn")
     exit(1)
 
+import upstream
+from bulk_fetch import fetch_bulk
+from catalog_cache import catalog_cache
+from catalog_pages import paginate
+from jsonrpc_batch import handle_batch
+from metrics import instrument_app
+from response_budget import Budget
+from timeseries_store import DEFAULT_HOURS, series_service
+from tool_registry import ToolDispatcher, encode_message, mcp_tools
+
 # 환경변수
 HRFCO_API_KEY = os.getenv('HRFCO_API_KEY', '')
+MCP_MAX_CONCURRENCY = int(os.getenv('MCP_MAX_CONCURRENCY', '8'))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    await upstream.close_client()
 
-app = FastAPI(title="HRFCO HTTP MCP Server", version="1.0.0")
+app = FastAPI(title="HRFCO HTTP MCP Server", version="1.0.0", lifespan=lifespan)
+# 요청/도구/업스트림 지표 (GET /metrics, Prometheus 텍스트 형식)
+instrument_app(app)
 
 app.add_middleware(
     CORSMiddleware,
@@ -35,29 +53,69 @@ class HRFCOClient:
         self.base_url = "http://api.hrfco.go.kr"
         self.api_key = HRFCO_API_KEY
     
-    async def get_observatories(self, hydro_type: str = "waterlevel"):
+    async def get_observatories(self, hydro_type: str = "waterlevel", limit: Optional[int] = None,
+                                cursor: Optional[str] = None, agency: Optional[str] = None,
+                                region: Optional[str] = None, basin: Optional[str] = None):
+        if not self.api_key:
+            raise ValueError("API 키가 필요합니다")
+        
+        # 페이지/필터 인자가 있으면 한 페이지씩, 없으면 전체 목록
+        if limit or cursor or agency or region or basin:
+            return paginate(await catalog_cache.get_entry(hydro_type), limit, cursor, agency, region, basin)
+        entry = await catalog_cache.get_entry(hydro_type)
+        return {"content": entry.stations, "source": entry.source}
+    
+    async def get_waterlevel_data(self, obs_code: str, time_type: str = "1H", hours: Optional[float] = None,
+                                  aggregate: Optional[str] = None, downsample: Optional[int] = None,
+                                  rate_of_change: bool = False):
         if not self.api_key:
             raise ValueError("API 키가 필요합니다")
         
-        url = f"{self.base_url}/{self.api_key}/{hydro_type}/info.json"
-        async with httpx.AsyncClient(timeout=30) as client:
-            response = await client.get(url)
-            response.raise_for_status()
-            return response.json()
+        # hours를 생략하면 최근 DEFAULT_HOURS시간 (저장소에 없는 구간만 업스트림에서 받음)
+        return await series_service.get_series(obs_code, "waterlevel", time_type,
+                                               float(hours or DEFAULT_HOURS), aggregate, downsample,
+                                               bool(rate_of_change))
     
-    async def get_waterlevel_data(self, obs_code: str, time_type: str = "1H"):
+    async def get_waterlevel_data_bulk(self, obs_codes, time_type: str = "1H"):
         if not self.api_key:
             raise ValueError("API 키가 필요합니다")
         
-        url = f"{self.base_url}/{self.api_key}/waterlevel/data.json"
-        params = {"obs_code": obs_code, "time_type": time_type}
-        async with httpx.AsyncClient(timeout=30) as client:
-            response = await client.get(url, params=params)
-            response.raise_for_status()
-            return response.json()
+        return await fetch_bulk(obs_codes, "waterlevel", time_type)
 
 client = HRFCOClient()
 
+# 도구 처리 함수 (인자는 스키마 검사를 통과한 뒤 전달됨)
+tools = ToolDispatcher(mcp_tools)
+
+# 관측소 목록은 솎아내면 의미가 없으므로 예산 초과 시 바로 요약 + 커서
+@tools.tool("get_observatories", budget=Budget(downsample=False))
+async def observatories_tool(client: HRFCOClient, args: Dict[str, Any]):
+    return await client.get_observatories(args.get("hydro_type", "waterlevel"), args.get("limit"),
+                                          args.get("cursor"), args.get("agency"),
+                                          args.get("region"), args.get("basin"))
+
+@tools.tool("get_waterlevel_data")
+async def waterlevel_tool(client: HRFCOClient, args: Dict[str, Any]):
+    return await client.get_waterlevel_data(args["obs_code"], args.get("time_type", "1H"),
+                                            args.get("hours"), args.get("aggregate"),
+                                            args.get("downsample"), args.get("rate_of_change", False))
+
+@tools.tool("get_waterlevel_data_bulk", timeout=60, max_concurrency=2)
+async def waterlevel_bulk_tool(client: HRFCOClient, args: Dict[str, Any]):
+    return await client.get_waterlevel_data_bulk(args["obs_codes"], args.get("time_type", "1H"))
+
+@tools.tool("recommend_nearby_stations", timeout=20)
+async def nearby_stations_tool(client: HRFCOClient, args: Dict[str, Any]):
+    from smart_water_search import search_engine
+    return await search_engine.recommend_nearby_stations(
+        args["location"], args.get("radius", 20),
+        limit=args.get("limit", 5), data_type=args.get("data_type")
+    )
+
+# tools/list · initialize 응답은 시작 시 한 번만 직렬화
+TOOLS_LIST = tools.tools_list()
+INITIALIZE = mcp_tools.initialize("hrfco-http-mcp", "1.0.0")
+
 @app.get("/")
 async def root():
     return {"message": "HRFCO HTTP MCP Server", "version": "1.0.0"}
@@ -66,76 +124,20 @@ async def root():
 async def health():
     return {"status": "healthy", "timestamp": datetime.now().isoformat()}
 
-@app.post("/mcp")
-async def mcp_endpoint(payload: Dict[str, Any] = Body(...)):
+async def handle_rpc(payload: Dict[str, Any]) -> Dict[str, Any]:
     try:
         method = payload.get("method")
         params = payload.get("params", {})
         request_id = payload.get("id")
 
         if method == "initialize":
-            return {
-                "jsonrpc": "2.0",
-                "id": request_id,
-                "result": {
-                    "protocolVersion": "2024-11-05",
-                    "capabilities": {"tools": {}},
-                    "serverInfo": {"name": "hrfco-http-mcp", "version": "1.0.0"}
-                }
-            }
-
+            return {"jsonrpc": "2.0", "id": request_id, "result": INITIALIZE.data}
+        
         elif method == "tools/list":
-            return {
-                "jsonrpc": "2.0",
-                "id": request_id,
-                "result": {
-                    "tools": [
-                        {
-                            "name": "get_observatories",
-                            "description": "홍수통제소 관측소 정보 조회",
-                            "inputSchema": {
-                                "type": "object",
-                                "properties": {
-                                    "hydro_type": {"type": "string", "default": "waterlevel"}
-                                }
-                            }
-                        },
-                        {
-                            "name": "get_waterlevel_data",
-                            "description": "수위 데이터 조회",
-                            "inputSchema": {
-                                "type": "object",
-                                "properties": {
-                                    "obs_code": {"type": "string"},
-                                    "time_type": {"type": "string", "default": "1H"}
-                                },
-                                "required": ["obs_code"]
-                            }
-                        }
-                    ]
-                }
-            }
+            return {"jsonrpc": "2.0", "id": request_id, "result": TOOLS_LIST.data}
         
         elif method == "tools/call":
-            tool_name = params.get("name")
-            args = params.get("arguments", {})
-            
-            if tool_name == "get_observatories":
-                result = await client.get_observatories(args.get("hydro_type", "waterlevel"))
-            elif tool_name == "get_waterlevel_data":
-                result = await client.get_waterlevel_data(args.get("obs_code"), args.get("time_type", "1H"))
-            else:
-                return {
-                    "jsonrpc": "2.0",
-                    "id": request_id,
-                    "error": {"code": -32601, "message": f"Unknown tool: {tool_name}"}
-                }
-            
-            return {
-                "jsonrpc": "2.0",
-                "id": request_id,
-                "result": {"content": [{"type": "text", "text": json.dumps(result, ensure_ascii=False)}]}
-            }
+            return await tools.call(client, request_id, params)
         
         else:
             return {
@@ -151,6 +153,16 @@ async def mcp_endpoint(payload: Dict[str, Any] = Body(...)):
             "error": {"code": -32603, "message": f"Internal error: {str(e)}"}
         }
 
+@app.post("/mcp")
+async def mcp_endpoint(payload: Union[Dict[str, Any], List[Any]] = Body(...)):
+    if isinstance(payload, list):
+        responses = await handle_batch(payload, handle_rpc, MCP_MAX_CONCURRENCY)
+        if responses is None:
+            return Response(status_code=202)
+    else:
+        responses = await handle_rpc(payload)
+    return Response(encode_message(responses), media_type="application/json")
+
 if __name__ == "__main__":
     print("🌐 HTTP MCP 서버 시작...")
     print("📡 URL: http://0.0.0.0:8000")
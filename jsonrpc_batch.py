@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+JSON-RPC Batch
+JSON-RPC 2.0 배치 배열 처리 - 모든 MCP 엔드포인트 공용
+"""
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+Handler = Callable[[Dict[str, Any]], Awaitable[Optional[Dict[str, Any]]]]
+
+
+def error_response(request_id: Any, code: int, message: str) -> Dict[str, Any]:
+    return {"jsonrpc": "2.0", "id": request_id, "error": {"code": code, "message": message}}
+
+
+async def handle_batch(requests: List[Any], handler: Handler,
+                       max_concurrency: Optional[int] = None) -> Optional[List[Dict[str, Any]]]:
+    """배치 배열의 요청을 동시에 처리해 응답 배열 하나로 반환
+
+    같은 관측소/파라미터를 묻는 호출은 upstream의 요청 병합으로 업스트림 호출 한 번을 공유한다.
+    응답은 요청 순서대로 담고 알림(id 없음)의 응답은 뺀다. 돌려줄 응답이 없으면 None.
+    """
+    if not requests:
+        return [error_response(None, -32600, "Invalid Request: empty batch")]
+    run = _runner(handler, max_concurrency)
+    responses = await asyncio.gather(*(run(request) for request in requests))
+    return [response for response in responses if response is not None] or None
+
+
+async def iter_batch(requests: List[Any], handler: Handler,
+                     max_concurrency: Optional[int] = None) -> AsyncIterator[Dict[str, Any]]:
+    """배치 배열을 동시에 처리하며 응답을 끝나는 순서대로 하나씩 내보냄 (스트리밍 전송용)"""
+    if not requests:
+        yield error_response(None, -32600, "Invalid Request: empty batch")
+        return
+    run = _runner(handler, max_concurrency)
+    pending = [asyncio.ensure_future(run(request)) for request in requests]
+    try:
+        for done in asyncio.as_completed(pending):
+            response = await done
+            if response is not None:
+                yield response
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+def _runner(handler: Handler, max_concurrency: Optional[int]) -> Callable[[Any], Awaitable[Optional[Dict[str, Any]]]]:
+    """배치 요청 하나 처리 함수 (동시 실행 상한 적용, 알림이면 None)"""
+    semaphore = asyncio.Semaphore(max_concurrency) if max_concurrency else None
+
+    async def run(request: Any) -> Optional[Dict[str, Any]]:
+        if not isinstance(request, dict):
+            return error_response(None, -32600, "Invalid Request")
+        try:
+            if semaphore is None:
+                response = await handler(request)
+            else:
+                async with semaphore:
+                    response = await handler(request)
+        except Exception as e:
+            response = error_response(request.get("id"), -32603, f"Internal error: {str(e)}")
+        return response if "id" in request else None
+
+    return run
@@ -6,10 +6,22 @@ HRFCO MCP Server for ChatGPT API
 import asyncio
 import json
 import os
+import signal
 import sys
 from pathlib import Path
-import httpx
 from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Set, Union
+
+import upstream
+from bulk_fetch import fetch_bulk
+from catalog_cache import catalog_cache
+from catalog_pages import paginate
+from jsonrpc_batch import handle_batch
+from metrics import CONTENT_TYPE, metrics
+from response_budget import Budget
+from stdio_transport import MessageTooLarge, StdioTransport
+from timeseries_store import DEFAULT_HOURS, series_service
+from tool_registry import ToolDispatcher, encode_message, mcp_tools
 
 # 환경변수 로드 (dotenv 사용)
 try:
@@ -20,6 +32,9 @@ except ImportError:
 
 HRFCO_API_KEY = os.getenv('HRFCO_API_KEY', '')
 
+# 동시에 실행할 요청 수 상한
+MCP_MAX_CONCURRENCY = int(os.getenv('MCP_MAX_CONCURRENCY', '8'))
+
 class HRFCOClient:
     """홍수통제소 API 클라이언트"""
     
@@ -27,145 +42,258 @@ class HRFCOClient:
         self.base_url = "http://api.hrfco.go.kr"
         self.api_key = HRFCO_API_KEY
     
-    async def get_observatories(self, hydro_type: str = "waterlevel", limit: int = 10):
-        """관측소 정보 조회 (응답 크기 제한)"""
+    async def get_observatories(self, hydro_type: str = "waterlevel", limit: int = 10,
+                                cursor: Optional[str] = None, agency: Optional[str] = None,
+                                region: Optional[str] = None, basin: Optional[str] = None):
+        """관측소 정보 조회 (한 페이지씩, 다음 페이지는 next_cursor로)"""
         if not self.api_key:
             return {"error": "API 키가 필요합니다", "demo": True}
         
         try:
-            url = f"{self.base_url}/{self.api_key}/{hydro_type}/info.json"
-            async with httpx.AsyncClient(timeout=30) as client:
-                response = await client.get(url)
-                response.raise_for_status()
-                data = response.json()
-                content = data.get("content", [])
-                
-                # 응답 크기 제한 (최대 limit개)
-                limited_content = content[:limit]
-                
-                return {
-                    "observatories": limited_content,
-                    "total_count": len(content),
-                    "returned_count": len(limited_content),
-                    "note": f"Showing first {limit} of {len(content)} observatories to prevent response overflow"
-                }
+            entry = await catalog_cache.get_entry(hydro_type)
+            return paginate(entry, limit, cursor, agency, region, basin)
+        except ValueError as e:
+            return {"error": str(e)}
         except Exception as e:
             return {"error": f"API 호출 실패: {str(e)}"}
     
-    async def get_waterlevel_data(self, obs_code: str, time_type: str = "1H"):
-        """수위 데이터 조회"""
+    async def get_waterlevel_data(self, obs_code: str, time_type: str = "1H", hours: Optional[float] = None,
+                                  aggregate: Optional[str] = None, downsample: Optional[int] = None,
+                                  rate_of_change: bool = False):
+        """수위 데이터 조회 (hours/집계 옵션 지정 시 시계열 저장소에서 최근 구간, 누락분만 업스트림 조회)"""
         if not self.api_key:
             return {"error": "API 키가 필요합니다", "demo": True}
         
         try:
+            if hours or aggregate or downsample or rate_of_change:
+                return await series_service.get_series(obs_code, "waterlevel", time_type,
+                                                       float(hours or DEFAULT_HOURS), aggregate, downsample,
+                                                       bool(rate_of_change))
             url = f"{self.base_url}/{self.api_key}/waterlevel/data.json"
             params = {"obs_code": obs_code, "time_type": time_type}
-            async with httpx.AsyncClient(timeout=30) as client:
-                response = await client.get(url, params=params)
-                response.raise_for_status()
-                data = response.json()
-                return data.get("content", [])
+            data = await upstream.fetch_json(url, params=params)
+            return data.get("content", [])
         except Exception as e:
             return {"error": f"수위 데이터 조회 실패: {str(e)}"}
+    
+    async def get_waterlevel_data_bulk(self, obs_codes: List[str], time_type: str = "1H"):
+        """여러 관측소 수위 데이터 동시 조회"""
+        if not self.api_key:
+            return {"error": "API 키가 필요합니다", "demo": True}
+        
+        try:
+            return await fetch_bulk(obs_codes, "waterlevel", time_type)
+        except ValueError as e:
+            return {"error": str(e)}
+
+# 도구 처리 함수 (인자는 스키마 검사를 통과한 뒤 전달됨)
+tools = ToolDispatcher(mcp_tools)
+
+# 관측소 목록은 솎아내면 의미가 없으므로 예산 초과 시 바로 요약 + 커서
+@tools.tool("get_observatories", budget=Budget(downsample=False))
+async def observatories_tool(client: HRFCOClient, args: Dict[str, Any]):
+    return await client.get_observatories(args.get("hydro_type", "waterlevel"), args.get("limit", 10),
+                                          args.get("cursor"), args.get("agency"),
+                                          args.get("region"), args.get("basin"))
+
+@tools.tool("get_waterlevel_data")
+async def waterlevel_tool(client: HRFCOClient, args: Dict[str, Any]):
+    return await client.get_waterlevel_data(args["obs_code"], args.get("time_type", "1H"),
+                                            args.get("hours"), args.get("aggregate"),
+                                            args.get("downsample"), args.get("rate_of_change", False))
+
+@tools.tool("get_waterlevel_data_bulk", timeout=60, max_concurrency=2)
+async def waterlevel_bulk_tool(client: HRFCOClient, args: Dict[str, Any]):
+    return await client.get_waterlevel_data_bulk(args["obs_codes"], args.get("time_type", "1H"))
+
+@tools.tool("recommend_nearby_stations", timeout=20)
+async def nearby_stations_tool(client: HRFCOClient, args: Dict[str, Any]):
+    from smart_water_search import search_engine
+    return await search_engine.recommend_nearby_stations(
+        args["location"], args.get("radius", 20),
+        limit=args.get("limit", 5), data_type=args.get("data_type")
+    )
+
+# tools/list · initialize 응답은 시작 시 한 번만 직렬화
+TOOLS_LIST = tools.tools_list()
+INITIALIZE = mcp_tools.initialize("hrfco-mcp", "1.0.0")
 
 # MCP 서버 구현
-async def handle_mcp_request():
-    """MCP 요청 처리"""
-    client = HRFCOClient()
+async def handle_request(client: HRFCOClient, request: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """JSON-RPC 요청 하나 처리 (알림이면 None)"""
+    method = request.get("method") or ""
+    params = request.get("params", {})
+    request_id = request.get("id")
+    
+    if method == "initialize":
+        response = {"jsonrpc": "2.0", "id": request_id, "result": INITIALIZE.data}
+    
+    elif method == "tools/list":
+        response = {"jsonrpc": "2.0", "id": request_id, "result": TOOLS_LIST.data}
+    
+    elif method == "tools/call":
+        response = await tools.call(client, request_id, params)
+    
+    elif method == "metrics":
+        # stdio에는 /metrics가 없으므로 같은 내용을 요청으로 내보냄
+        response = {"jsonrpc": "2.0", "id": request_id, "result": {
+            "contentType": CONTENT_TYPE, "text": metrics.render(), "summary": metrics.snapshot()
+        }}
+    
+    elif method.startswith("notifications/"):
+        return None
+    
+    else:
+        response = {
+            "jsonrpc": "2.0",
+            "id": request_id,
+            "error": {"code": -32601, "message": f"Unknown method: {method}"}
+        }
+    
+    return response
+
+class StdioDispatcher:
+    """stdin으로 들어온 요청을 요청별 태스크로 동시에 처리
+
+    느린 도구 호출이 뒤따르는 요청을 막지 않도록 각 요청을 별도 태스크로 실행하고,
+    완료된 순서대로(요청 순서와 무관하게) 쓰기 잠금 아래에서 응답한다.
+    notifications/cancelled를 받으면 해당 요청 태스크를 취소하고 응답하지 않는다.
+    배치 배열은 항목별로 동시에 처리한 뒤 응답 배열 하나로 쓴다.
+    """
+    
+    def __init__(self, client: HRFCOClient, max_concurrency: int = MCP_MAX_CONCURRENCY,
+                 transport: Optional[StdioTransport] = None):
+        self.client = client
+        self.transport = transport or StdioTransport()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._write_lock = asyncio.Lock()
+        self._by_id: Dict[Any, asyncio.Task] = {}
+        self._pending: Set[asyncio.Task] = set()
+    
+    async def write(self, response: Union[Dict[str, Any], List[Dict[str, Any]]]):
+        data = encode_message(response) + b"\n"
+        async with self._write_lock:
+            await self.transport.write(data)
     
-    while True:
+    def dispatch(self, line: str):
+        """입력 한 줄을 파싱해 처리 태스크 생성"""
         try:
-            line = await asyncio.get_event_loop().run_in_executor(None, sys.stdin.readline)
-            if not line:
-                break
-            
-            request = json.loads(line.strip())
-            method = request.get("method")
-            params = request.get("params", {})
-            request_id = request.get("id")
-            
-            if method == "initialize":
-                response = {
-                    "jsonrpc": "2.0",
-                    "id": request_id,
-                    "result": {
-                        "protocolVersion": "2024-11-05",
-                        "capabilities": {"tools": {}},
-                        "serverInfo": {"name": "hrfco-mcp", "version": "1.0.0"}
-                    }
-                }
-            
-            elif method == "tools/list":
-                response = {
-                    "jsonrpc": "2.0",
-                    "id": request_id,
-                    "result": {
-                        "tools": [
-                            {
-                                "name": "get_observatories",
-                                "description": "홍수통제소 관측소 정보 조회",
-                                "inputSchema": {
-                                    "type": "object",
-                                    "properties": {
-                                        "hydro_type": {
-                                            "type": "string",
-                                            "description": "수문 유형 (waterlevel, flow 등)",
-                                            "default": "waterlevel"
-                                        }
-                                    }
-                                }
-                            },
-                            {
-                                "name": "get_waterlevel_data",
-                                "description": "수위 데이터 조회",
-                                "inputSchema": {
-                                    "type": "object",
-                                    "properties": {
-                                        "obs_code": {"type": "string", "description": "관측소 코드"},
-                                        "time_type": {"type": "string", "description": "시간 유형", "default": "1H"}
-                                    },
-                                    "required": ["obs_code"]
-                                }
-                            }
-                        ]
-                    }
-                }
-            
-            elif method == "tools/call":
-                tool_name = params.get("name")
-                args = params.get("arguments", {})
-                
-                if tool_name == "get_observatories":
-                    result = await client.get_observatories(args.get("hydro_type", "waterlevel"))
-                elif tool_name == "get_waterlevel_data":
-                    result = await client.get_waterlevel_data(args.get("obs_code"), args.get("time_type", "1H"))
-                else:
-                    result = {"error": f"Unknown tool: {tool_name}"}
-                
-                response = {
-                    "jsonrpc": "2.0",
-                    "id": request_id,
-                    "result": {
-                        "content": [{"type": "text", "text": json.dumps(result, ensure_ascii=False)}]
-                    }
-                }
-            
-            else:
-                response = {
-                    "jsonrpc": "2.0",
-                    "id": request_id,
-                    "error": {"code": -32601, "message": f"Unknown method: {method}"}
-                }
-            
-            print(json.dumps(response), flush=True)
+            request = json.loads(line)
+        except json.JSONDecodeError as e:
+            self._spawn(self.write({
+                "jsonrpc": "2.0",
+                "id": None,
+                "error": {"code": -32700, "message": f"Parse error: {str(e)}"}
+            }))
+            return
+        if isinstance(request, list):
+            self._spawn(self._run_batch(request))
+            return
+        if not isinstance(request, dict):
+            self._spawn(self.write({
+                "jsonrpc": "2.0",
+                "id": None,
+                "error": {"code": -32600, "message": "Invalid Request"}
+            }))
+            return
         
+        if request.get("method") == "notifications/cancelled":
+            self.cancel(request.get("params", {}).get("requestId"))
+            return
+        
+        task = self._spawn(self._run(request))
+        if request.get("id") is not None:
+            self._by_id[request["id"]] = task
+            task.add_done_callback(lambda t, rid=request["id"]: self._by_id.pop(rid, None))
+    
+    def cancel(self, request_id: Any) -> bool:
+        task = self._by_id.get(request_id)
+        if task is None or task.done():
+            return False
+        task.cancel()
+        return True
+    
+    def _spawn(self, coro) -> asyncio.Task:
+        task = asyncio.ensure_future(coro)
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+        return task
+    
+    async def _handle(self, request: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        async with self._semaphore:
+            return await handle_request(self.client, request)
+    
+    async def _run(self, request: Dict[str, Any]):
+        try:
+            response = await self._handle(request)
+        except asyncio.CancelledError:
+            # 취소된 요청에는 응답하지 않음
+            return
         except Exception as e:
-            error_response = {
+            response = {
                 "jsonrpc": "2.0",
-                "id": request.get("id") if 'request' in locals() else None,
+                "id": request.get("id"),
                 "error": {"code": -32603, "message": f"Internal error: {str(e)}"}
             }
-            print(json.dumps(error_response), flush=True)
+        if response is not None and "id" in request:
+            await self.write(response)
+    
+    async def _run_batch(self, requests: List[Any]):
+        """배치 배열은 항목별로 동시에 처리하고 응답 배열 하나로 씀"""
+        try:
+            responses = await handle_batch(requests, self._handle)
+        except asyncio.CancelledError:
+            return
+        if responses is not None:
+            await self.write(responses)
+    
+    async def drain(self):
+        """진행 중인 요청이 모두 끝날 때까지 대기"""
+        while self._pending:
+            await asyncio.gather(*list(self._pending), return_exceptions=True)
+
+async def handle_mcp_request():
+    """MCP 요청 처리"""
+    transport = await StdioTransport.open()
+    dispatcher = StdioDispatcher(HRFCOClient(), transport=transport)
+    
+    try:
+        while True:
+            try:
+                line = await transport.read_line()
+            except MessageTooLarge as e:
+                await dispatcher.write({
+                    "jsonrpc": "2.0",
+                    "id": None,
+                    "error": {"code": -32600, "message": f"Invalid Request: {str(e)}"}
+                })
+                continue
+            if line is None:
+                break
+            text = line.decode("utf-8", errors="replace").strip()
+            if text:
+                dispatcher.dispatch(text)
+        
+        await dispatcher.drain()
+    finally:
+        await transport.close()
+
+def dump_metrics():
+    """지표를 Prometheus 텍스트 형식으로 stderr에 출력 (stdout은 JSON-RPC 전용)"""
+    sys.stderr.write(metrics.render())
+    sys.stderr.flush()
+
+async def main():
+    """stdio MCP 서버 실행 (종료 시 업스트림 풀 정리, SIGUSR1을 받으면 지표 출력)"""
+    try:
+        asyncio.get_running_loop().add_signal_handler(signal.SIGUSR1, dump_metrics)
+    except (AttributeError, NotImplementedError, RuntimeError):
+        # Windows 등 시그널 처리를 지원하지 않는 환경
+        pass
+    try:
+        await handle_mcp_request()
+    finally:
+        await upstream.close_client()
 
 if __name__ == "__main__":
-    asyncio.run(handle_mcp_request())
+    asyncio.run(main())
@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Metrics
+프로세스 내 지표 - 카운터/게이지/히스토그램을 모아 Prometheus 텍스트 형식(0.0.4)으로 내보냄
+
+외부 의존성 없이 동작한다. HTTP 서버는 GET /metrics, stdio 서버는 metrics 메서드나 SIGUSR1(stderr 출력)로
+같은 내용을 낸다. 라벨 값은 도구 이름/엔드포인트처럼 종류가 적은 값만 쓴다 (관측소 코드, API 키 금지).
+"""
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+from urllib.parse import unquote, urlsplit
+
+# 지연 시간(초) / 응답 크기(바이트) 버킷
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> LabelValues:
+        if set(labels) != set(self.labels):
+            raise ValueError(f"{self.name}: 라벨은 {self.labels}이어야 합니다 (받은 값: {tuple(labels)})")
+        return tuple(str(labels[name]) for name in self.labels)
+
+    def _label_text(self, values: LabelValues, extra: Optional[Tuple[str, str]] = None) -> str:
+        pairs = list(zip(self.labels, values))
+        if extra is not None:
+            pairs.append(extra)
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """단조 증가 값"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        super().__init__(name, help_text, labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: Any):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: Any) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> List[str]:
+        return [f"{self.name}{self._label_text(key)} {_format_value(value)}"
+                for key, value in sorted(self._values.items())]
+
+    def snapshot(self) -> Dict[str, float]:
+        return {",".join(key): value for key, value in sorted(self._values.items())}
+
+
+class Gauge(Counter):
+    """증감하는 현재 값 (진행 중 요청 수 등)"""
+
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels: Any):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: Any):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    @contextmanager
+    def track(self, **labels: Any) -> Iterator[None]:
+        """블록 실행 동안 1 증가"""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(_Metric):
+    """버킷별 누적 개수 + 합계/개수"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+        # 라벨 값 → [버킷별 개수..., +Inf 개수, 합계]
+        self._values: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, **labels: Any):
+        key = self._key(labels)
+        with self._lock:
+            slots = self._values.get(key)
+            if slots is None:
+                slots = self._values[key] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    slots[i] += 1
+                    break
+            else:
+                slots[len(self.buckets)] += 1
+            slots[-1] += value
+
+    @contextmanager
+    def time(self, **labels: Any) -> Iterator[None]:
+        """블록 실행 시간(초) 기록 (예외가 나도 기록)"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels: Any) -> int:
+        slots = self._values.get(self._key(labels))
+        return int(sum(slots[:-1])) if slots else 0
+
+    def _samples(self) -> List[str]:
+        lines = []
+        for key, slots in sorted(self._values.items()):
+            cumulative = 0.0
+            for bound, count in zip(self.buckets + (float("inf"),), slots[:-1]):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{self._label_text(key, ('le', _format_value(bound)))} "
+                             f"{_format_value(cumulative)}")
+            lines.append(f"{self.name}_sum{self._label_text(key)} {_format_value(slots[-1])}")
+            lines.append(f"{self.name}_count{self._label_text(key)} {_format_value(cumulative)}")
+        return lines
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        result = {}
+        for key, slots in sorted(self._values.items()):
+            count = sum(slots[:-1])
+            result[",".join(key)] = {"count": count, "sum": round(slots[-1], 6),
+                                     "avg": round(slots[-1] / count, 6) if count else 0.0}
+        return result
+
+
+class MetricsRegistry:
+    """지표 모음 - 이름이 같으면 같은 지표를 돌려줌"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _get(self, cls, name: str, help_text: str, labels: Sequence[str], **kwargs) -> Any:
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = self._metrics[name] = cls(name, help_text, labels, **kwargs)
+        elif not isinstance(metric, cls) or metric.labels != tuple(labels):
+            raise ValueError(f"{name}: 다른 종류/라벨로 이미 등록된 지표")
+        return metric
+
+    def counter(self, name: str, help_text: str, labels: Sequence[str] = ()) -> Counter:
+        return self._get(Counter, name, help_text, labels)
+
+    def gauge(self, name: str, help_text: str, labels: Sequence[str] = ()) -> Gauge:
+        return self._get(Gauge, name, help_text, labels)
+
+    def histogram(self, name: str, help_text: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._get(Histogram, name, help_text, labels, buckets=buckets)
+
+    def render(self) -> str:
+        """Prometheus 텍스트 형식"""
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> Dict[str, Any]:
+        """JSON으로 보기 쉬운 요약 (히스토그램은 개수/합계/평균)"""
+        return {name: metric.snapshot() for name, metric in self._metrics.items()}
+
+
+# Prometheus 텍스트 형식 Content-Type
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# 경로 첫 조각이 API 키인 업스트림 호스트 (http://api.hrfco.go.kr/{키}/waterlevel/...)
+KEYED_HOSTS = ("api.hrfco.go.kr",)
+# 관측소 코드, 조회 시각 스탬프 (확장자가 붙은 "1018683.json", "202610171030.json" 포함)
+_CODE_SEGMENT = re.compile(r"^\d+(\.\w+)?$")
+
+
+def endpoint_label(url: str) -> str:
+    """업스트림 URL → 지표 라벨 (호스트 + 경로, API 키와 숫자 코드는 자리표시자로)
+
+    키는 모양으로 추측하지 않고, KEYED_HOSTS의 첫 경로 조각과 설정된 HRFCO_API_KEY 값과 같은 조각을 가린다.
+    """
+    parts = urlsplit(url)
+    api_key = os.getenv('HRFCO_API_KEY', '')
+    keyed = parts.hostname in KEYED_HOSTS
+    segments = []
+    for i, segment in enumerate(parts.path.split("/")):
+        if (keyed and i == 1) or (api_key and unquote(segment) == api_key):
+            segment = "{key}"
+        elif _CODE_SEGMENT.match(segment):
+            segment = "{code}"
+        segments.append(segment)
+    return parts.netloc + "/".join(segments)
+
+
+# 프로세스 전역 인스턴스와 공용 지표
+metrics = MetricsRegistry()
+
+TOOL_LATENCY = metrics.histogram("mcp_tool_duration_seconds", "MCP 도구 실행 시간", ("tool",))
+TOOL_ERRORS = metrics.counter("mcp_tool_errors_total", "MCP 도구 오류 수 (오류 종류별)", ("tool", "error"))
+IGNORED_ARGUMENTS = metrics.counter("mcp_tool_ignored_arguments_total", "스키마에 없어 버린 도구 인자 수", ("tool",))
+TOOL_IN_FLIGHT = metrics.gauge("mcp_tool_in_flight", "실행 중인 MCP 도구 호출 수", ("tool",))
+TOOL_RESPONSE_BYTES = metrics.histogram("mcp_tool_response_bytes", "MCP 도구 결과 크기 (바이트)", ("tool",),
+                                        buckets=SIZE_BUCKETS)
+UPSTREAM_LATENCY = metrics.histogram("hrfco_upstream_duration_seconds", "업스트림 요청 시간", ("endpoint",))
+UPSTREAM_ERRORS = metrics.counter("hrfco_upstream_errors_total", "업스트림 오류 수 (오류 종류별)",
+                                  ("endpoint", "error"))
+SINGLE_FLIGHT = metrics.counter("hrfco_single_flight_total", "동일 요청 병합 (leader: 새 요청, join: 진행 중 요청 공유)",
+                                ("result",))
+CACHE_REQUESTS = metrics.counter("hrfco_cache_requests_total", "캐시 조회 결과 (hit, stale, partial, miss)",
+                                 ("cache", "result"))
+HTTP_IN_FLIGHT = metrics.gauge("http_requests_in_flight", "처리 중인 HTTP 요청 수")
+HTTP_LATENCY = metrics.histogram("http_request_duration_seconds", "HTTP 요청 처리 시간", ("method", "path"))
+
+
+def instrument_app(app: Any, path: str = "/metrics"):
+    """FastAPI 앱에 HTTP 지표 미들웨어와 GET /metrics 추가
+
+    경로 라벨은 등록된 라우트만 그대로 쓰고 나머지는 "other"로 묶는다 (임의 경로로 라벨이 늘지 않도록).
+    스트리밍 응답은 헤더를 보낼 때까지의 시간만 잰다.
+    """
+    from fastapi import Request, Response
+
+    # 등록된 라우트 경로 (라우트 수가 바뀔 때만 다시 모음)
+    cached: Dict[str, Any] = {"count": -1, "routes": frozenset()}
+
+    @app.middleware("http")
+    async def record_http_metrics(request: Request, call_next):
+        if cached["count"] != len(app.routes):
+            cached["routes"] = frozenset(getattr(route, "path", None) for route in app.routes)
+            cached["count"] = len(app.routes)
+        routes = cached["routes"]
+        label = request.url.path if request.url.path in routes else "other"
+        started = time.perf_counter()
+        HTTP_IN_FLIGHT.inc()
+        try:
+            return await call_next(request)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            HTTP_LATENCY.observe(time.perf_counter() - started, method=request.method, path=label)
+
+    @app.get(path, include_in_schema=False)
+    async def metrics_endpoint():
+        return Response(metrics.render(), media_type=CONTENT_TYPE)
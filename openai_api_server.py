@@ -5,11 +5,13 @@ HRFCO REST API for OpenAI Function Calling
 import asyncio
 import json
 import os
+from contextlib import asynccontextmanager
 from datetime import datetime
 from typing import Dict, Any, Optional
 
 try:
-    from fastapi import FastAPI, HTTPException
+    from fastapi import FastAPI, HTTPException, Request
+    from fastapi.responses import JSONResponse
     from fastapi.middleware.cors import CORSMiddleware
     import httpx
     import uvicorn
@@ -20,9 +22,37 @@ except ImportError:
 from dotenv import load_dotenv
 load_dotenv()
 
+import upstream
+from bulk_fetch import fetch_bulk
+from catalog_cache import catalog_cache
+from catalog_pages import paginate
+from metrics import instrument_app
+from smart_water_search import search_engine
+from tool_registry import openai_functions
+
 HRFCO_API_KEY = os.getenv('HRFCO_API_KEY', '')
 
-app = FastAPI(title="HRFCO OpenAI API", version="1.0.0")
+# /openai/functions 응답은 시작 시 한 번만 직렬화
+OPENAI_FUNCTIONS = openai_functions.openai_functions(extra={
+    "api_endpoints": {
+        "search_station": "http://localhost:8000/search/station",
+        "water_info": "http://localhost:8000/search/water-info",
+        "waterlevel_bulk": "http://localhost:8000/waterlevel/bulk",
+        "nearby_stations": "http://localhost:8000/search/nearby"
+    }
+})
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 카탈로그/색인 워밍업은 백그라운드로 진행하고 /ready로 완료 여부를 알림
+    warmup = asyncio.ensure_future(search_engine.warm_up())
+    yield
+    warmup.cancel()
+    await upstream.close_client()
+
+app = FastAPI(title="HRFCO OpenAI API", version="1.0.0", lifespan=lifespan)
+# 요청/도구/업스트림 지표 (GET /metrics, Prometheus 텍스트 형식)
+instrument_app(app)
 
 app.add_middleware(
     CORSMiddleware,
@@ -37,23 +67,15 @@ class HRFCOClient:
         self.base_url = "http://api.hrfco.go.kr"
         self.api_key = HRFCO_API_KEY
     
-    async def get_observatories(self, hydro_type: str = "waterlevel", limit: int = 5):
+    async def get_observatories(self, hydro_type: str = "waterlevel", limit: int = 5,
+                                cursor: Optional[str] = None, agency: Optional[str] = None,
+                                region: Optional[str] = None, basin: Optional[str] = None):
         if not self.api_key:
             return {"error": "API key required"}
         
         try:
-            url = f"{self.base_url}/{self.api_key}/{hydro_type}/info.json"
-            async with httpx.AsyncClient(timeout=15) as client:
-                response = await client.get(url)
-                response.raise_for_status()
-                data = response.json()
-                content = data.get("content", [])
-                
-                return {
-                    "observatories": content[:limit],
-                    "total_count": len(content),
-                    "returned_count": min(limit, len(content))
-                }
+            entry = await catalog_cache.get_entry(hydro_type)
+            return paginate(entry, limit, cursor, agency, region, basin)
         except Exception as e:
             return {"error": str(e)}
 
@@ -67,10 +89,18 @@ async def root():
 async def health():
     return {"status": "healthy", "timestamp": datetime.now().isoformat()}
 
+@app.get("/ready")
+async def ready():
+    """검색 엔진 워밍업 완료 여부 (완료 전 503)"""
+    status = search_engine.readiness()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
 @app.get("/observatories")
-async def get_observatories(hydro_type: str = "waterlevel", limit: int = 5):
-    """Get Korean water observatories data"""
-    result = await client.get_observatories(hydro_type, limit)
+async def get_observatories(hydro_type: str = "waterlevel", limit: int = 5, cursor: Optional[str] = None,
+                            agency: Optional[str] = None, region: Optional[str] = None,
+                            basin: Optional[str] = None):
+    """Get Korean water observatories data (next page: pass next_cursor as cursor)"""
+    result = await client.get_observatories(hydro_type, limit, cursor, agency, region, basin)
     if "error" in result:
         raise HTTPException(status_code=500, detail=result["error"])
     return result
@@ -79,113 +109,33 @@ async def get_observatories(hydro_type: str = "waterlevel", limit: int = 5):
 async def search_station_by_name(location_name: str, data_type: str = "waterlevel", 
                                 auto_fetch_data: bool = False, limit: int = 5):
     """지역명으로 관측소 검색"""
-    from smart_water_search import SmartWaterSearch
-    search_engine = SmartWaterSearch()
     return await search_engine.search_stations_by_name(location_name, data_type, auto_fetch_data, limit)
 
 @app.get("/search/water-info")
 async def get_water_info_by_location(query: str, limit: int = 5):
     """원스톱 수문 정보 조회"""
-    from smart_water_search import SmartWaterSearch
-    search_engine = SmartWaterSearch()
     return await search_engine.get_water_info_by_location(query, limit)
 
 @app.get("/search/nearby")
-async def recommend_nearby_stations(location: str, radius: int = 20, priority: str = "distance"):
+async def recommend_nearby_stations(location: str, radius: int = 20, priority: str = "distance",
+                                    limit: int = 5, data_type: Optional[str] = None):
     """주변 관측소 추천"""
-    from smart_water_search import SmartWaterSearch
-    search_engine = SmartWaterSearch()
-    return await search_engine.recommend_nearby_stations(location, radius, priority)
+    return await search_engine.recommend_nearby_stations(location, radius, priority, limit, data_type)
+
+@app.get("/waterlevel/bulk")
+async def get_waterlevel_data_bulk(obs_codes: str, time_type: str = "1H"):
+    """여러 관측소 수위 데이터 동시 조회 (obs_codes: 쉼표로 구분한 관측소 코드)"""
+    if not HRFCO_API_KEY:
+        raise HTTPException(status_code=500, detail="API key required")
+    try:
+        return await fetch_bulk(obs_codes, "waterlevel", time_type)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @app.get("/openai/functions")
-async def get_function_definitions():
-    """OpenAI Function Calling definitions"""
-    return {
-        "functions": [
-            {
-                "name": "search_water_station_by_name",
-                "description": "지역명이나 강 이름으로 관측소를 검색하고 실시간 데이터까지 조회",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "location_name": {
-                            "type": "string",
-                            "description": "서울, 한강, 낙동강, 부산 등 자연어 입력"
-                        },
-                        "data_type": {
-                            "type": "string",
-                            "enum": ["waterlevel", "rainfall", "dam"],
-                            "description": "waterlevel 또는 rainfall",
-                            "default": "waterlevel"
-                        },
-                        "auto_fetch_data": {
-                            "type": "boolean",
-                            "description": "검색 후 자동으로 실시간 데이터 조회 여부",
-                            "default": False
-                        },
-                        "limit": {
-                            "type": "integer",
-                            "minimum": 1,
-                            "maximum": 10,
-                            "default": 5
-                        }
-                    },
-                    "required": ["location_name"]
-                }
-            },
-            {
-                "name": "get_water_info_by_location",
-                "description": "한 번의 요청으로 지역 검색부터 실시간 데이터까지 모든 것을 처리",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "query": {
-                            "type": "string",
-                            "description": "한강 수위, 서울 강우량, 부산 낙동강 등 자연어 질의"
-                        },
-                        "limit": {
-                            "type": "integer",
-                            "minimum": 1,
-                            "maximum": 10,
-                            "description": "결과 개수 제한",
-                            "default": 5
-                        }
-                    },
-                    "required": ["query"]
-                }
-            },
-            {
-                "name": "recommend_nearby_stations",
-                "description": "입력된 지역 주변의 관련 관측소들을 추천",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "location": {
-                            "type": "string",
-                            "description": "기준 위치 (지명)"
-                        },
-                        "radius": {
-                            "type": "integer",
-                            "description": "반경 (km)",
-                            "default": 20
-                        },
-                        "priority": {
-                            "type": "string",
-                            "enum": ["distance", "data_quality"],
-                            "description": "distance(거리순) 또는 data_quality(데이터 품질순)",
-                            "default": "distance"
-                        }
-                    },
-                    "required": ["location"]
-                }
-            }
-        ],
-        "api_endpoints": {
-            "search_station": "http://localhost:8000/search/station",
-            "water_info": "http://localhost:8000/search/water-info",
-            "nearby_stations": "http://localhost:8000/search/nearby"
-        }
-    }
+async def get_function_definitions(request: Request):
+    """OpenAI Function Calling definitions (ETag로 재검증)"""
+    return OPENAI_FUNCTIONS.http_response(request.headers.get("if-none-match"))
 
 if __name__ == "__main__":
     print("🌐 HRFCO OpenAI API Server")
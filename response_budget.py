@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Response Budget
+도구 결과 크기 예산 - 결과가 도구별 예산(바이트/토큰)을 넘으면 정해진 순서로 줄인다
+
+  1. columnar: 행 객체 배열 → 필드별 배열 (내용 손실 없음)
+  2. downsample: 긴 배열을 고른 간격으로 솎아냄 (같은 길이의 배열은 같은 위치를 남겨 시각/값 정렬 유지)
+  3. summary: 원본에서 가장 긴 배열(과 길이가 같은 나란한 배열)의 앞부분만 남기고 요약 통계 + result_cursor를 붙임
+
+단계마다 크기를 재서 보고서(JSON-RPC result._meta.budget)로 돌려준다.
+result_cursor로 다시 호출하면 같은 배열의 다음 부분부터 (솎아내기 없이) 이어서 받는다.
+"""
+import base64
+import json
+import math
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+from response_encoding import dumps
+
+# 도구 결과 기본 예산 - LLM 컨텍스트/서버리스 응답 크기 한도보다 충분히 작게
+MAX_BYTES = int(os.getenv('MCP_RESPONSE_MAX_BYTES', '100000'))
+MAX_TOKENS = int(os.getenv('MCP_RESPONSE_MAX_TOKENS', '25000'))
+# 솎아내거나 요약할 때 배열에 최소한 남기는 행 수
+MIN_ROWS = 2
+
+# tools/list 스키마에 덧붙이는 공통 인자
+RESULT_CURSOR_PROPERTY = {
+    "type": "string",
+    "description": "예산 초과로 요약된 결과의 다음 부분 (이전 응답 _meta.budget.next_cursor)",
+}
+
+Path = Tuple[str, ...]
+
+
+class Budget:
+    """도구 하나의 결과 크기 예산 (0 또는 None이면 그 기준은 검사하지 않음)"""
+
+    __slots__ = ("max_bytes", "max_tokens", "downsample")
+
+    def __init__(self, max_bytes: Optional[int] = MAX_BYTES, max_tokens: Optional[int] = MAX_TOKENS,
+                 downsample: bool = True):
+        self.max_bytes = max_bytes
+        self.max_tokens = max_tokens
+        # 관측소 목록처럼 솎아내면 의미가 없는 결과는 False (바로 요약 + 커서)
+        self.downsample = downsample
+
+    def fits(self, size: Dict[str, int]) -> bool:
+        return ((not self.max_bytes or size["bytes"] <= self.max_bytes)
+                and (not self.max_tokens or size["tokens"] <= self.max_tokens))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"max_bytes": self.max_bytes, "max_tokens": self.max_tokens, "downsample": self.downsample}
+
+
+def estimate_tokens(chars: int, size: int) -> int:
+    """토큰 수 추정 - ASCII는 4글자당 1토큰, 한글 등 멀티바이트 문자는 1글자당 1토큰
+
+    UTF-8 길이(size)와 글자 수(chars)만으로 계산한다 (한글은 3바이트이므로 (size - chars) / 2가 멀티바이트 글자 수).
+    """
+    wide = max(0, (size - chars) // 2)
+    return math.ceil((chars - wide) / 4) + wide
+
+
+def measure(text: str) -> Dict[str, int]:
+    size = len(text.encode("utf-8"))
+    return {"bytes": size, "tokens": estimate_tokens(len(text), size)}
+
+
+def encode_cursor(path: Path, offset: int) -> str:
+    raw = json.dumps([list(path), offset], separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Path, int]:
+    """result_cursor → (배열 경로, 시작 위치), 잘못된 값이면 ValueError"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        path, offset = json.loads(raw.decode("utf-8"))
+        if not isinstance(offset, int) or offset < 0 or not all(isinstance(key, str) for key in path):
+            raise ValueError
+    except (ValueError, TypeError):
+        raise ValueError(f"잘못된 result_cursor: {cursor}")
+    return tuple(path), offset
+
+
+def _row_lists(value: Any, path: Path = ()) -> List[Tuple[Path, list]]:
+    """dict를 따라 내려가며 MIN_ROWS보다 긴 배열 → [(경로, 배열)] (배열 안쪽은 보지 않음)"""
+    if isinstance(value, dict):
+        found = []
+        for key, item in value.items():
+            found.extend(_row_lists(item, path + (str(key),)))
+        return found
+    if isinstance(value, list) and len(value) > MIN_ROWS:
+        return [(path, value)]
+    return []
+
+
+def _get(value: Any, path: Path) -> Any:
+    for key in path:
+        value = value[key]
+    return value
+
+
+def _replace(value: Any, path: Path, new: Any) -> Any:
+    """경로의 값만 바꾼 얕은 사본 (원본은 캐시와 공유하므로 수정하지 않음)"""
+    if not path:
+        return new
+    copied = dict(value)
+    copied[path[0]] = _replace(value[path[0]], path[1:], new)
+    return copied
+
+
+def _headroom(budget: Budget, size: Dict[str, int]) -> float:
+    """예산 / 현재 크기 (가장 많이 넘은 기준)"""
+    ratios = [limit / size[key] for key, limit in (("bytes", budget.max_bytes), ("tokens", budget.max_tokens))
+              if limit and size[key]]
+    return min(ratios) if ratios else 1.0
+
+
+def _thin(value: Any, ratio: float) -> Any:
+    """긴 배열마다 ratio만큼 고른 간격으로 남김 (처음/마지막 행 포함)"""
+    if isinstance(value, dict):
+        return {key: _thin(item, ratio) for key, item in value.items()}
+    if isinstance(value, list) and len(value) > MIN_ROWS:
+        n = len(value)
+        keep = max(MIN_ROWS, math.ceil(n * ratio))
+        if keep >= n:
+            return value
+        step = (n - 1) / (keep - 1)
+        return [value[round(i * step)] for i in range(keep)]
+    return value
+
+
+def _number(value: Any) -> Optional[float]:
+    if isinstance(value, bool) or value is None:
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if math.isfinite(number) else None
+
+
+def summarize(rows: list) -> Dict[str, Any]:
+    """배열 요약 통계 - 숫자(숫자 문자열 포함) 값/필드별 min, max, mean"""
+    def stats(numbers: List[float]) -> Dict[str, float]:
+        return {"min": min(numbers), "max": max(numbers), "mean": round(sum(numbers) / len(numbers), 4)}
+
+    summary: Dict[str, Any] = {"count": len(rows)}
+    if rows and all(isinstance(row, dict) for row in rows):
+        columns: Dict[str, List[float]] = {}
+        for row in rows:
+            for key, item in row.items():
+                number = _number(item)
+                if number is not None:
+                    columns.setdefault(key, []).append(number)
+        fields = {key: stats(numbers) for key, numbers in columns.items() if numbers}
+        if fields:
+            summary["fields"] = fields
+    else:
+        numbers = [n for n in (_number(row) for row in rows) if n is not None]
+        if numbers:
+            summary.update(stats(numbers))
+    return summary
+
+
+def _slice_aligned(value: Any, length: int, start: int, stop: Optional[int] = None) -> Any:
+    """길이가 length인 배열을 모두 [start:stop]으로 자름 (시각/값처럼 나란한 배열의 정렬 유지)"""
+    if isinstance(value, dict):
+        return {key: _slice_aligned(item, length, start, stop) for key, item in value.items()}
+    if isinstance(value, list) and len(value) == length:
+        return value[start:stop]
+    return value
+
+
+def _with_summary(value: Any, length: int, count: int, summary: Dict[str, Any]) -> Any:
+    body = _slice_aligned(value, length, 0, count)
+    if isinstance(body, dict):
+        return dict(body, _summary=summary)
+    return {"rows": body, "_summary": summary}
+
+
+def fit(result: Any, encoding: str, budget: Budget,
+        cursor: Optional[str] = None) -> Tuple[str, Optional[Dict[str, Any]]]:
+    """결과를 예산 안으로 직렬화 → (텍스트, 보고서), 줄이지 않았고 커서도 없으면 보고서는 None
+
+    cursor가 있으면 해당 배열(과 길이가 같은 나란한 배열)을 그 위치부터 잘라 시작하고 솎아내기는 건너뛴다.
+    """
+    report: Dict[str, Any] = {"limit": budget.to_dict(), "steps": []}
+    steps = report["steps"]
+    if cursor:
+        path, offset = decode_cursor(cursor)
+        try:
+            rows = _get(result, path)
+        except (KeyError, TypeError):
+            raise ValueError(f"결과에 result_cursor 경로가 없습니다: {'.'.join(path)}")
+        if not isinstance(rows, list):
+            raise ValueError(f"결과에 result_cursor 경로가 없습니다: {'.'.join(path)}")
+        result = _slice_aligned(result, len(rows), offset)
+        report["cursor"] = {"path": list(path), "offset": offset}
+        target: Optional[Tuple[Path, list, int]] = (path, rows[offset:], offset)
+    else:
+        target = None
+
+    text = dumps(result, encoding)
+    size = measure(text)
+    steps.append(dict({"step": "encode", "encoding": encoding}, **size))
+    if budget.fits(size):
+        report["fits"] = True
+        return text, (report if cursor else None)
+
+    # 1. columnar
+    if encoding != "columnar":
+        text = dumps(result, "columnar")
+        size = measure(text)
+        steps.append(dict({"step": "columnar"}, **size))
+        if budget.fits(size):
+            report["fits"] = True
+            return text, report
+
+    lists = _row_lists(result)
+    if not lists:
+        report["fits"] = False
+        return text, report
+
+    # 2. downsample - 크기 비율로 남길 비율을 잡고, 넘으면 20%씩 더 줄임
+    if budget.downsample and not cursor:
+        ratio, attempts = 1.0, 0
+        longest = max(len(rows) for _, rows in lists)
+        while longest * ratio > MIN_ROWS:
+            ratio *= min(0.8, 0.95 * _headroom(budget, size))
+            attempts += 1
+            thinned = _thin(result, ratio)
+            text = dumps(thinned, "columnar")
+            size = measure(text)
+            if budget.fits(size):
+                break
+        kept = len(max(_row_lists(thinned) or [((), [])], key=lambda item: len(item[1]))[1])
+        steps.append(dict({"step": "downsample", "ratio": ratio, "attempts": attempts,
+                           "rows": kept, "of": longest}, **size))
+        if budget.fits(size):
+            report["fits"] = True
+            return text, report
+
+    # 3. summary + cursor - 원본(솎아내기 전)에서 가장 긴 배열과 나란한 배열들의 앞부분 중 들어가는 만큼
+    if target is None:
+        path, rows = max(lists, key=lambda item: len(item[1]))
+        target = (path, rows, 0)
+    path, rows, offset = target
+    summary = summarize(rows)
+    summary["path"] = ".".join(path)
+    aligned = {".".join(other): summarize(values) for other, values in _row_lists(result)
+               if other != path and len(values) == len(rows)}
+    if aligned:
+        summary["aligned"] = aligned
+
+    def attempt(count: int) -> Tuple[str, Dict[str, int]]:
+        marked = dict(summary, offset=offset, returned=count)
+        if count < len(rows):
+            marked["next_cursor"] = encode_cursor(path, offset + count)
+        candidate = dumps(_with_summary(result, len(rows), count, marked), "columnar")
+        return candidate, measure(candidate)
+
+    low, high = 0, len(rows)
+    text, size = attempt(0)
+    while low < high:
+        middle = (low + high + 1) // 2
+        candidate, candidate_size = attempt(middle)
+        if budget.fits(candidate_size):
+            low, text, size = middle, candidate, candidate_size
+        else:
+            high = middle - 1
+    steps.append(dict({"step": "summary", "rows": low, "of": len(rows)}, **size))
+    if low < len(rows):
+        report["next_cursor"] = encode_cursor(path, offset + low)
+    report["fits"] = budget.fits(size)
+    return text, report
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Response Encoding
+MCP 도구 결과 직렬화 - compact(공백 없는 JSON), columnar(행 객체 배열 → 필드별 배열), pretty(들여쓰기)
+
+서버 기본값은 MCP_RESPONSE_ENCODING, 도구 호출마다 arguments.encoding으로 바꿀 수 있다.
+orjson이 설치되어 있으면 더 빠른 orjson으로 직렬화한다 (출력 형식은 같음).
+"""
+import json
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+ENCODINGS = ("compact", "columnar", "pretty")
+RESPONSE_ENCODING = os.getenv('MCP_RESPONSE_ENCODING', 'compact').strip().lower()
+if RESPONSE_ENCODING not in ENCODINGS:
+    RESPONSE_ENCODING = "compact"
+
+# tools/list 스키마에 덧붙이는 공통 인자
+ENCODING_PROPERTY = {
+    "type": "string",
+    "enum": list(ENCODINGS),
+    "description": "결과 형식 (compact: 공백 없는 JSON, columnar: 필드별 배열, pretty: 들여쓰기)",
+    "default": RESPONSE_ENCODING,
+}
+
+
+def resolve(mode: Optional[str]) -> str:
+    """요청한 형식 (없거나 모르는 값이면 서버 기본값)"""
+    mode = str(mode or "").strip().lower()
+    return mode if mode in ENCODINGS else RESPONSE_ENCODING
+
+
+def columnar(value: Any) -> Any:
+    """같은 모양의 객체가 반복되는 배열을 {"count", "columns": {필드: [값...]}}로 변환 (중첩 포함)
+
+    필드 이름이 행마다 반복되지 않으므로 관측소 목록/관측값처럼 긴 배열에서 크기가 크게 줄어든다.
+    """
+    if isinstance(value, dict):
+        return {key: columnar(item) for key, item in value.items()}
+    if isinstance(value, list):
+        if len(value) > 1 and all(isinstance(row, dict) for row in value):
+            fields: Dict[str, None] = {}
+            for row in value:
+                fields.update((key, None) for key in row)
+            return {
+                "count": len(value),
+                "columns": {field: [columnar(row.get(field)) for row in value] for field in fields},
+            }
+        return [columnar(item) for item in value]
+    return value
+
+
+def dumps(value: Any, mode: Optional[str] = None) -> str:
+    """형식에 맞춰 JSON 문자열로 직렬화 (한글은 이스케이프하지 않음)"""
+    mode = resolve(mode)
+    if mode == "columnar":
+        value = columnar(value)
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if mode == "pretty" else 0)
+        try:
+            return orjson.dumps(value, option=option).decode("utf-8")
+        except TypeError:
+            pass
+    if mode == "pretty":
+        return json.dumps(value, ensure_ascii=False, indent=2)
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def pop_encoding(arguments: Optional[Dict[str, Any]]) -> Tuple[Dict[str, Any], str]:
+    """도구 인자에서 encoding을 분리 → (나머지 인자, 형식)"""
+    arguments = dict(arguments or {})
+    return arguments, resolve(arguments.pop("encoding", None))
+
+
+def with_encoding(tools: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """도구 정의마다 inputSchema.properties에 encoding 인자 추가 (원본은 그대로)"""
+    result = []
+    for tool in tools:
+        schema = dict(tool.get("inputSchema") or {"type": "object"})
+        schema["properties"] = dict(schema.get("properties") or {}, encoding=ENCODING_PROPERTY)
+        result.append(dict(tool, inputSchema=schema))
+    return result
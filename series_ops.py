@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Series Operations
+관측 시계열 서버측 집계 - 구간별 min/max/mean, LTTB 다운샘플링, 변화율 (numpy 벡터 연산)
+"""
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+def to_minutes(timestamps: np.ndarray) -> np.ndarray:
+    """yyyymmddHHMM 정수 배열 → 1970-01-01 기준 분 (int64)"""
+    ts = np.asarray(timestamps, dtype=np.int64)
+    year, month = ts // 100000000, ts // 1000000 % 100
+    day, hour, minute = ts // 10000 % 100, ts // 100 % 100, ts % 100
+    months = ((year - 1970) * 12 + month - 1).astype("datetime64[M]")
+    days = months.astype("datetime64[D]") + (day - 1).astype("timedelta64[D]")
+    return days.astype(np.int64) * 1440 + hour * 60 + minute
+
+
+def from_minutes(minutes: np.ndarray) -> np.ndarray:
+    """1970-01-01 기준 분 → yyyymmddHHMM 정수 배열"""
+    minutes = np.asarray(minutes, dtype=np.int64)
+    days = (minutes // 1440).astype("datetime64[D]")
+    months = days.astype("datetime64[M]")
+    years = months.astype("datetime64[Y]")
+    year = years.astype(np.int64) + 1970
+    month = (months - years).astype(np.int64) + 1
+    day = (days - months).astype(np.int64) + 1
+    rest = minutes % 1440
+    return (((year * 100 + month) * 100 + day) * 100 + rest // 60) * 100 + rest % 60
+
+
+def parse_window(window: str) -> int:
+    """"10M", "1H", "3H", "1D" 같은 구간 문자열 → 분"""
+    match = re.fullmatch(r"\s*(\d+)\s*([MHD])\s*", str(window).upper())
+    if not match or int(match.group(1)) <= 0:
+        raise ValueError(f"잘못된 집계 구간: {window} (예: 30M, 1H, 1D)")
+    return int(match.group(1)) * {"M": 1, "H": 60, "D": 1440}[match.group(2)]
+
+
+def aggregate(minutes: np.ndarray, values: np.ndarray, window_minutes: int) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """구간별 min/max/mean/count (시각 오름차순 입력, NaN 제외) → (구간 시작 분, 통계)"""
+    if len(minutes) == 0:
+        empty = np.empty((0, values.shape[1]))
+        return np.empty(0, dtype=np.int64), {"min": empty, "max": empty, "mean": empty, "count": empty}
+    buckets = minutes // window_minutes * window_minutes
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    valid = ~np.isnan(values)
+    count = np.add.reduceat(valid, starts, axis=0)
+    total = np.add.reduceat(np.where(valid, values, 0.0), starts, axis=0)
+    low = np.minimum.reduceat(np.where(valid, values, np.inf), starts, axis=0)
+    high = np.maximum.reduceat(np.where(valid, values, -np.inf), starts, axis=0)
+    empty = count == 0
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = total / count
+    for stat in (low, high, mean):
+        stat[empty] = np.nan
+    return buckets[starts], {"min": low, "max": high, "mean": mean, "count": count.astype(np.float64)}
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets 다운샘플링 - 선택된 점의 인덱스 (NaN 점은 제외)
+
+    각 구간에서 앞서 고른 점과 다음 구간 평균점이 이루는 삼각형 넓이가 가장 큰 점을 고르므로
+    첨두(피크)와 급변 구간이 보존된다. 구간 안의 넓이 계산은 벡터 연산.
+    """
+    finite = np.flatnonzero(~np.isnan(y))
+    n = len(finite)
+    if threshold >= n or threshold < 3:
+        return finite if threshold >= n else finite[np.linspace(0, n - 1, max(threshold, 0), dtype=np.int64)]
+    xs, ys = x[finite].astype(np.float64), y[finite]
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_lo, next_hi = hi, edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = xs[next_lo:next_hi].mean() if next_hi > next_lo else xs[-1]
+        avg_y = ys[next_lo:next_hi].mean() if next_hi > next_lo else ys[-1]
+        area = np.abs((xs[previous] - avg_x) * (ys[lo:hi] - ys[previous])
+                      - (xs[previous] - xs[lo:hi]) * (avg_y - ys[previous]))
+        previous = lo + int(np.argmax(area))
+        selected[i + 1] = previous
+    return finite[selected]
+
+
+def rate_of_change(minutes: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """시간당 변화율 (첫 점은 NaN)"""
+    rate = np.full(values.shape, np.nan)
+    if len(minutes) > 1:
+        elapsed = np.diff(minutes).astype(np.float64)[:, None] / 60.0
+        with np.errstate(invalid="ignore", divide="ignore"):
+            rate[1:] = np.diff(values, axis=0) / elapsed
+    return rate
+
+
+def _column(values: np.ndarray, digits: int = 4) -> List[Optional[float]]:
+    return [None if np.isnan(v) else v for v in np.round(values, digits).tolist()]
+
+
+def transform(timestamps: np.ndarray, values: np.ndarray, fields: Sequence[str],
+              aggregate_window: Optional[str] = None, downsample: Optional[int] = None,
+              include_rate: bool = False) -> Dict[str, object]:
+    """시계열 응답 본문 생성 (집계/다운샘플/변화율 옵션 적용)
+
+    - aggregate_window: 구간별 min/max/mean으로 원시 값을 대체
+    - downsample: 첫 번째 필드 기준 LTTB로 N개 점만 남김 (다른 필드는 같은 시각 값)
+    - include_rate: 시간당 변화율 열 추가
+    """
+    if downsample is not None and downsample < 3:
+        # LTTB는 처음/끝 점과 구간 하나 이상이 필요
+        raise ValueError(f"downsample은 3 이상이어야 합니다: {downsample}")
+    minutes = to_minutes(timestamps)
+    body: Dict[str, object] = {}
+    if aggregate_window:
+        window = parse_window(aggregate_window)
+        starts, stats = aggregate(minutes, values, window)
+        body["window"] = aggregate_window.upper()
+        body["ymdhm"] = [str(ts) for ts in from_minutes(starts).tolist()]
+        body["values"] = {
+            field: {name: _column(stat[:, i]) for name, stat in stats.items() if name != "count"}
+            for i, field in enumerate(fields)
+        }
+        body["counts"] = stats["count"][:, 0].astype(np.int64).tolist() if len(fields) else []
+        if include_rate:
+            body["rate_per_hour"] = {field: _column(column)
+                                     for field, column in zip(fields, rate_of_change(starts, stats["mean"]).T)}
+        return body
+
+    if downsample and len(fields) and downsample < len(timestamps):
+        keep = np.sort(lttb(minutes, values[:, 0], int(downsample)))
+        body["downsampled_from"] = len(timestamps)
+        timestamps, values, minutes = timestamps[keep], values[keep], minutes[keep]
+    body["ymdhm"] = [str(ts) for ts in timestamps.tolist()]
+    body["values"] = {field: _column(values[:, i]) for i, field in enumerate(fields)}
+    if include_rate:
+        body["rate_per_hour"] = {field: _column(column)
+                                 for field, column in zip(fields, rate_of_change(minutes, values).T)}
+    return body
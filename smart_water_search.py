@@ -4,21 +4,43 @@ AI-Friendly Water Data Search System
 자연어 질의를 통한 지능형 수문 데이터 검색
 """
 import asyncio
+import heapq
 import json
 import re
+import time
 from typing import Dict, List, Any, Optional
-from difflib import SequenceMatcher
-import httpx
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 import os
 
+import upstream
+from catalog_cache import catalog_cache
+from hot_stations import hot_station_poller
+from station_index import JAMO_NGRAM_SIZES, StationIndex, ngrams
+from spatial_index import SpatialIndex
+import hangul
+
 load_dotenv()
 
+# auto_fetch_data 실시간 데이터 조회 마감 시간 (초) - 넘긴 관측소는 partial로 표시
+AUTO_FETCH_DEADLINE = float(os.getenv('HRFCO_AUTO_FETCH_DEADLINE', '8'))
+
+# 서버 시작 시 미리 적재할 카탈로그
+WARMUP_HYDRO_TYPES = ("waterlevel", "rainfall", "dam")
+
+# 질의를 이름/주소에 그대로 포함하는 관측소의 최저 점수 - 편집거리 후보는 힌트 점수가 높아도 이 값을 넘지 않음
+MATCH_TIER = 0.5
+# 편집거리 후보 점수에서 힌트 점수 몫 - 편집 한 번 차이를 뒤집지 못하도록 작게 (거의 같은 후보끼리 순서만 정함)
+FUZZY_HINT_WEIGHT = 0.02
+
 class SmartWaterSearch:
     def __init__(self):
         self.api_key = os.getenv('HRFCO_API_KEY', '')
         self.base_url = "http://api.hrfco.go.kr"
-        self.stations_cache = {}
+        self.catalog = catalog_cache
+        # 카탈로그 적재/갱신 시 관측소 이름 색인을 함께 생성
+        self.catalog.register_builder("name_index", StationIndex)
+        self.catalog.register_builder("spatial_index", SpatialIndex, incremental=True)
         
         # 한국 주요 지역/강 매핑
         self.location_mapping = {
@@ -41,24 +63,70 @@ class SmartWaterSearch:
         }
         
         self.river_keywords = ["한강", "낙동강", "금강", "영산강", "섬진강", "임진강"]
+        self.warmup: Dict[str, Any] = {"started_at": None, "finished_at": None, "catalogs": {}}
     
-    async def get_all_stations(self, hydro_type: str = "waterlevel") -> List[Dict]:
-        """모든 관측소 데이터 캐싱"""
-        if hydro_type in self.stations_cache:
-            return self.stations_cache[hydro_type]
+    async def warm_up(self, hydro_types=WARMUP_HYDRO_TYPES) -> Dict[str, Any]:
+        """카탈로그와 검색 색인 미리 적재 (서버 시작 시 1회)
+
+        색인은 카탈로그 적재 시 등록된 빌더로 함께 만들어지므로 카탈로그만 불러오면 된다.
+        """
+        self.warmup = {"started_at": time.time(), "finished_at": None, "catalogs": {}}
+        
+        async def load(hydro_type: str) -> Dict[str, Any]:
+            try:
+                entry = await self.catalog.get_entry(hydro_type)
+                return {"status": "ok", "stations": len(entry.stations)}
+            except Exception as e:
+                return {"status": "error", "error": str(e)}
         
+        results = await asyncio.gather(*(load(hydro_type) for hydro_type in hydro_types))
+        self.warmup["catalogs"] = dict(zip(hydro_types, results))
+        self.warmup["finished_at"] = time.time()
+        return self.readiness()
+    
+    def readiness(self) -> Dict[str, Any]:
+        """준비 상태 - 워밍업이 끝났고 대상 카탈로그가 모두 업스트림에서 적재되었으면 ready
+
+        워밍업 때 실패한 카탈로그도 이후 요청에서 적재되면 ready로 바뀐다.
+        번들 스냅샷으로만 응답 중인 카탈로그는 loaded가 아니며 degraded로 따로 표시한다.
+        """
+        started_at, finished_at = self.warmup["started_at"], self.warmup["finished_at"]
+        catalogs = {}
+        for hydro_type, status in self.warmup["catalogs"].items():
+            entry = self.catalog.peek(hydro_type)
+            source = entry.source if entry is not None else None
+            catalogs[hydro_type] = dict(status, loaded=source == "upstream", source=source)
+        return {
+            "ready": finished_at is not None and all(c["loaded"] for c in catalogs.values()),
+            "degraded": any(c["source"] == "snapshot" for c in catalogs.values()),
+            "warming_up": started_at is not None and finished_at is None,
+            "warmup_seconds": round(finished_at - started_at, 3) if finished_at else None,
+            "catalogs": catalogs,
+        }
+    
+    async def get_all_stations(self, hydro_type: str = "waterlevel") -> List[Dict]:
+        """모든 관측소 데이터 (공유 카탈로그 캐시, TTL 만료 시 백그라운드 갱신)"""
         try:
-            url = f"{self.base_url}/{self.api_key}/{hydro_type}/info.json"
-            async with httpx.AsyncClient(timeout=30) as client:
-                response = await client.get(url)
-                response.raise_for_status()
-                data = response.json()
-                stations = data.get("content", [])
-                self.stations_cache[hydro_type] = stations
-                return stations
+            return await self.catalog.get_stations(hydro_type)
         except Exception as e:
             return []
     
+    async def get_station_index(self, hydro_type: str = "waterlevel") -> Optional[StationIndex]:
+        """카탈로그 버전별 관측소 이름 색인"""
+        try:
+            entry = await self.catalog.get_entry(hydro_type)
+        except Exception as e:
+            return None
+        return entry.derived("name_index", StationIndex)
+    
+    async def get_spatial_index(self, hydro_type: str = "waterlevel") -> Optional[SpatialIndex]:
+        """카탈로그 버전별 관측소 좌표 격자 색인"""
+        try:
+            entry = await self.catalog.get_entry(hydro_type)
+        except Exception as e:
+            return None
+        return entry.derived("spatial_index", SpatialIndex)
+    
     def normalize_query(self, query: str) -> Dict[str, Any]:
         """자연어 질의 정규화"""
         query = query.strip().replace(" ", "")
@@ -81,93 +149,225 @@ class SmartWaterSearch:
             if river in query:
                 location_hints.append(river)
         
+        clean_query = re.sub(r'(수위|강우|비|강수|댐)', '', query)
+        is_chosung = hangul.is_chosung_query(clean_query)
+        
         return {
             "original": query,
             "data_type": data_type,
             "location_hints": list(set(location_hints)),
-            "clean_query": re.sub(r'(수위|강우|비|강수|댐)', '', query)
+            "clean_query": clean_query,
+            # 자모 비교용 질의 (초성 질의는 초성열끼리 비교)
+            "chosung": is_chosung,
+            "query_form": hangul.chosung(clean_query) if is_chosung else hangul.decompose(clean_query)
         }
     
-    def calculate_similarity(self, station: Dict, query_info: Dict) -> float:
+    def station_forms(self, station: Dict, query_info: Dict) -> tuple:
+        """질의와 비교할 관측소명/주소의 자모열 (색인이 없을 때 사용)"""
+        form = hangul.chosung if query_info["chosung"] else hangul.decompose
+        return form(station.get("obsnm", "") or ""), form(station.get("addr", "") or "")
+    
+    def combine_score(self, text_similarity: float, hint_score: float) -> float:
+        """자모 유사도 + 힌트 점수 → 최종 점수 (두 값 모두에 대해 단조 증가)
+
+        질의를 그대로 포함(hangul.SUBSTRING_FLOOR 이상)한 관측소는 [MATCH_TIER, 1],
+        편집거리 후보는 [MATCH_TIER/2, MATCH_TIER), 힌트만 맞는 관측소는 [0, MATCH_TIER/2)에 둔다.
+        편집거리 후보는 자모 유사도(편집거리) 순이 먼저이고 힌트 점수는 FUZZY_HINT_WEIGHT만큼만 더한다.
+        힌트 점수는 상한으로 자르지 않고 h/(h+1)로 눌러서 힌트가 많은 관측소끼리도 같은 점수로 묶이지 않게 한다.
+        """
+        hints = hint_score / (hint_score + 1.0)
+        if text_similarity >= hangul.SUBSTRING_FLOOR:
+            return MATCH_TIER + (1.0 - MATCH_TIER) * (text_similarity * 0.4 + hints * 0.6)
+        if text_similarity > 0:
+            text = text_similarity / hangul.SUBSTRING_FLOOR
+            return MATCH_TIER * (0.5 + 0.5 * ((1.0 - FUZZY_HINT_WEIGHT) * text + FUZZY_HINT_WEIGHT * hints))
+        return MATCH_TIER * 0.5 * hints
+    
+    def calculate_similarity(self, station: Dict, query_info: Dict, forms: Optional[tuple] = None) -> float:
         """관측소와 질의 간 유사도 계산"""
-        score = 0.0
-        station_name = station.get("obsnm", "")
-        station_addr = station.get("addr", "")
+        hint_score = 0.0
+        station_name = station.get("obsnm", "") or ""
+        station_addr = station.get("addr", "") or ""
         
         # 관측소명 직접 매칭
         for hint in query_info["location_hints"]:
             if hint in station_name:
-                score += 0.5
+                hint_score += 0.5
             if hint in station_addr:
-                score += 0.3
+                hint_score += 0.3
         
-        # 문자열 유사도
-        name_similarity = SequenceMatcher(None, query_info["clean_query"], station_name).ratio()
-        addr_similarity = SequenceMatcher(None, query_info["clean_query"], station_addr).ratio()
+        # 자모 단위 문자열 유사도
+        name_form, addr_form = forms or self.station_forms(station, query_info)
+        name_similarity = hangul.similarity(query_info["query_form"], name_form)
+        addr_similarity = hangul.similarity(query_info["query_form"], addr_form)
         
-        score += max(name_similarity, addr_similarity) * 0.4
+        return self.combine_score(max(name_similarity, addr_similarity), hint_score)
+    
+    def rank_stations(self, index: StationIndex, query_info: Dict, limit: int,
+                      threshold: float = 0.1) -> List[tuple]:
+        """색인으로 후보를 좁힌 뒤 상위 limit개만 유사도 계산
+
+        후보는 힌트 문자열을 포함하거나, 질의와 n-gram 또는 자모 3-gram을 공유하는 관측소로
+        한정한다 (초성 질의는 초성열 포함 여부, 한 글자 질의는 글자 색인). 후보별 점수 상한(힌트 점수와,
+        필드별 3-gram 공유 수로 구한 편집거리 하한의 자모 유사도 상한을 combine_score로 합친 값)이
+        현재 limit번째 점수보다 낮아지면 편집거리 계산을 멈춘다.
+        """
+        if limit <= 0:
+            return []
+        query_form = query_info["query_form"]
+        hints = query_info["location_hints"]
+        forms = index.chosung if query_info["chosung"] else index.jamo
         
-        return min(score, 1.0)
+        shared: Dict[tuple, int] = {}
+        query_grams = 0
+        if query_info["chosung"]:
+            candidates = index.lookup_chosung(query_form)
+        else:
+            # 한 필드에서 자모 3-gram을 절반 이상 공유하면 오타 후보로 포함
+            shared = index.jamo_overlap(query_form)
+            query_grams = len(ngrams(query_form, JAMO_NGRAM_SIZES))
+            needed = max(1, query_grams // 2)
+            clean_query = query_info["clean_query"]
+            candidates = set(index.overlap(clean_query))
+            candidates.update(i for (i, _), count in shared.items() if count >= needed)
+            if len(clean_query) < 2:
+                # 한 글자 질의는 n-gram이 없으므로 글자 색인으로 포함 여부 확인
+                candidates.update(index.lookup(clean_query))
+        # 힌트 점수는 색인 조회 결과로 바로 누적 (이름 0.5, 주소 0.3)
+        hint_scores: Dict[int, float] = {}
+        for hint in hints:
+            for weight, field in ((0.5, 0), (0.3, 1)):
+                for station_id in index.lookup(hint, field):
+                    hint_scores[station_id] = hint_scores.get(station_id, 0.0) + weight
+        candidates.update(hint_scores)
+        
+        bounded = []
+        for station_id in candidates:
+            field_bounds = []
+            for field, form in enumerate(forms[station_id]):
+                # 편집 한 번은 3-gram을 최대 3개 없애므로 필드별로 빠진 3-gram 수로 편집거리 하한을 구함
+                min_distance = -(-(query_grams - shared.get((station_id, field), 0)) // 3)
+                field_bounds.append((hangul.similarity_bound(query_form, form, min_distance), form))
+            field_bounds.sort(key=lambda x: -x[0])
+            hint_score = hint_scores.get(station_id, 0.0)
+            bounded.append((self.combine_score(field_bounds[0][0], hint_score), station_id, hint_score, field_bounds))
+        bounded.sort(key=lambda x: (-x[0], x[1]))
+        
+        top: List[tuple] = []  # (score, -station_id) 최소 힙
+        for upper, station_id, hint_score, field_bounds in bounded:
+            if upper <= threshold:
+                break
+            floor = 0.0
+            if len(top) >= limit:
+                # 이후 후보는 현재 limit번째를 넘을 수 없음 (동점은 카탈로그 순서가 앞선 쪽 우선)
+                kth_score, kth_neg_id = top[0]
+                if upper < kth_score or (upper == kth_score and station_id > -kth_neg_id):
+                    break
+                floor = kth_score
+            # calculate_similarity와 같은 값을 필드별로 계산하되, 상한이 이미 얻은 값(또는 limit번째 점수)보다
+            # 낮은 필드(주로 긴 주소)는 편집거리를 계산하지 않음
+            text_similarity = 0.0
+            for bound, form in field_bounds:
+                if bound <= text_similarity or self.combine_score(bound, hint_score) < floor:
+                    break
+                text_similarity = max(text_similarity, hangul.similarity(query_form, form))
+            similarity = self.combine_score(text_similarity, hint_score)
+            if similarity > threshold:  # 최소 임계값
+                item = (similarity, -station_id)
+                if len(top) < limit:
+                    heapq.heappush(top, item)
+                elif item > top[0]:
+                    heapq.heapreplace(top, item)
+        
+        top.sort(reverse=True)
+        return [(index.stations[-neg_id], score) for score, neg_id in top]
     
     async def search_stations_by_name(self, location_name: str, data_type: str = "waterlevel", 
-                                    auto_fetch_data: bool = False, limit: int = 5) -> Dict[str, Any]:
+                                    auto_fetch_data: bool = False, limit: int = 5,
+                                    deadline: Optional[float] = None) -> Dict[str, Any]:
         """지역명으로 관측소 검색"""
         query_info = self.normalize_query(location_name)
-        stations = await self.get_all_stations(query_info["data_type"])
+        index = await self.get_station_index(query_info["data_type"])
         
-        if not stations:
+        if index is None or not len(index):
             return {"error": "관측소 데이터를 가져올 수 없습니다"}
         
-        # 유사도 계산 및 정렬
-        scored_stations = []
-        for station in stations:
-            similarity = self.calculate_similarity(station, query_info)
-            if similarity > 0.1:  # 최소 임계값
-                scored_stations.append((station, similarity))
-        
-        # 점수순 정렬
-        scored_stations.sort(key=lambda x: x[1], reverse=True)
-        top_stations = [station for station, score in scored_stations[:limit]]
+        top_stations = [station for station, score in self.rank_stations(index, query_info, limit)]
         
         result = {
             "query": location_name,
             "data_type": query_info["data_type"],
             "found_stations": len(top_stations),
-            "total_available": len(stations),
-            "stations": []
+            "total_available": len(index),
+            "stations": [self.station_summary(station) for station in top_stations]
         }
         
-        for station in top_stations:
-            station_info = {
-                "code": station.get("wlobscd") or station.get("rfobscd") or station.get("damcd"),
-                "name": station.get("obsnm"),
-                "address": station.get("addr"),
-                "agency": station.get("agcnm")
-            }
-            
-            # 자동 데이터 조회
-            if auto_fetch_data and station_info["code"]:
-                try:
-                    data = await self.get_station_data(station_info["code"], query_info["data_type"])
-                    station_info["current_data"] = data
-                except:
-                    station_info["current_data"] = "데이터 조회 실패"
-            
-            result["stations"].append(station_info)
+        # 자동 데이터 조회 (관측소별 동시 조회, 마감 시간까지)
+        if auto_fetch_data:
+            late = await self.fetch_current_data(
+                result["stations"], query_info["data_type"],
+                AUTO_FETCH_DEADLINE if deadline is None else deadline
+            )
+            if late:
+                result["partial"] = True
         
         return result
     
+    async def fetch_current_data(self, station_infos: List[Dict[str, Any]], data_type: str,
+                                 deadline: float) -> int:
+        """관측소 요약마다 current_data를 동시에 채움
+
+        deadline(초) 안에 끝나지 않은 관측소는 기다리지 않고 current_data=None, partial=True로
+        표시한다. 마감을 넘긴 관측소 수를 반환.
+        """
+        tasks = {
+            asyncio.ensure_future(self.get_station_data(info["code"], data_type)): info
+            for info in station_infos if info["code"]
+        }
+        if not tasks:
+            return 0
+        try:
+            done, pending = await asyncio.wait(tasks, timeout=max(deadline, 0))
+        finally:
+            for task in tasks:
+                task.cancel()
+        
+        for task in done:
+            try:
+                tasks[task]["current_data"] = task.result()
+            except Exception:
+                tasks[task]["current_data"] = "데이터 조회 실패"
+        for task in pending:
+            tasks[task]["current_data"] = None
+            tasks[task]["partial"] = True
+        return len(pending)
+    
+    @staticmethod
+    def station_summary(station: Dict) -> Dict[str, Any]:
+        """응답용 관측소 요약"""
+        return {
+            "code": station.get("wlobscd") or station.get("rfobscd") or station.get("damcd"),
+            "name": station.get("obsnm"),
+            "address": station.get("addr"),
+            "agency": station.get("agcnm")
+        }
+    
     async def get_station_data(self, obs_code: str, data_type: str = "waterlevel") -> Dict:
         """관측소 실시간 데이터 조회"""
+        url = f"{self.base_url}/{self.api_key}/{data_type}/data.json"
+        params = {"obs_code": obs_code, "time_type": "1H"}
+        
+        async def load():
+            response = await upstream.fetch(url, params=params, timeout=15)
+            if response.status_code != 200:
+                raise LookupError("데이터 없음")
+            return response.json()
+        
         try:
-            url = f"{self.base_url}/{self.api_key}/{data_type}/data.json"
-            params = {"obs_code": obs_code, "time_type": "1H"}
-            async with httpx.AsyncClient(timeout=15) as client:
-                response = await client.get(url, params=params)
-                if response.status_code == 200:
-                    return response.json()
-                else:
-                    return {"error": "데이터 없음"}
+            # 자주 조회되는 관측소는 다음 게시 시각까지 메모리에서 응답
+            return await hot_station_poller.serve((data_type, obs_code, "1H"), load)
+        except LookupError:
+            return {"error": "데이터 없음"}
         except:
             return {"error": "조회 실패"}
     
@@ -204,30 +404,86 @@ class SmartWaterSearch:
         
         return suggestions[:5]
     
+    async def resolve_location(self, location: str, hydro_type: str = "waterlevel") -> Optional[Dict[str, Any]]:
+        """지명 또는 "위도,경도" 문자열을 기준 좌표로 변환"""
+        match = re.fullmatch(r"\s*(-?\d+(?:\.\d+)?)\s*,\s*(-?\d+(?:\.\d+)?)\s*", location)
+        if match:
+            return {"lat": float(match.group(1)), "lon": float(match.group(2)), "source": "coordinates"}
+        
+        # 이름이 가장 비슷하면서 좌표가 있는 관측소를 기준점으로 사용
+        query_info = self.normalize_query(location)
+        for catalog_type in dict.fromkeys([hydro_type, "waterlevel"]):
+            index = await self.get_station_index(catalog_type)
+            spatial = await self.get_spatial_index(catalog_type)
+            if index is None or spatial is None:
+                continue
+            for station, score in self.rank_stations(index, query_info, 10):
+                station_id = spatial.position(station)
+                if station_id is not None and spatial.has_coordinates(station_id):
+                    lat, lon = spatial.location(station_id)
+                    return {"lat": lat, "lon": lon, "source": station.get("obsnm")}
+        return None
+    
     async def recommend_nearby_stations(self, location: str, radius: int = 20, 
-                                      priority: str = "distance") -> Dict[str, Any]:
-        """주변 관측소 추천"""
-        # 간단한 구현 - 실제로는 좌표 기반 거리 계산 필요
-        search_result = await self.search_stations_by_name(location, limit=10)
+                                      priority: str = "distance", limit: int = 5,
+                                      data_type: Optional[str] = None) -> Dict[str, Any]:
+        """주변 관측소 추천 (격자 색인 기반 반경 검색, radius <= 0이면 k-최근접)"""
+        hydro_type = data_type or self.normalize_query(location)["data_type"]
+        spatial = await self.get_spatial_index(hydro_type)
+        if spatial is None or not len(spatial):
+            return {"error": "관측소 데이터를 가져올 수 없습니다"}
         
-        if "error" in search_result:
-            return search_result
+        center = await self.resolve_location(location, hydro_type)
+        if center is None:
+            return {"error": f"'{location}'의 위치를 찾을 수 없습니다"}
+        
+        if radius and radius > 0:
+            in_radius = spatial.within(center["lat"], center["lon"], radius)
+            nearby = in_radius[:limit]
+            total = len(in_radius)
+        else:
+            nearby = spatial.nearest(center["lat"], center["lon"], limit)
+            total = len(nearby)
+        
+        recommendations = []
+        for station_id, distance in nearby:
+            station_info = self.station_summary(spatial.stations[station_id])
+            station_info["distance_km"] = round(distance, 2)
+            recommendations.append(station_info)
         
         return {
             "location": location,
+            "center": center,
+            "data_type": hydro_type,
             "radius_km": radius,
             "priority": priority,
-            "recommendations": search_result["stations"][:5]
+            "total_in_radius": total,
+            "recommendations": recommendations
         }
 
 # FastAPI 통합
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 
-app = FastAPI(title="Smart Water Search API", version="2.0.0")
+search_engine = SmartWaterSearch()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    warmup = asyncio.ensure_future(search_engine.warm_up())
+    hot_station_poller.start()
+    yield
+    warmup.cancel()
+    await hot_station_poller.stop()
+    await upstream.close_client()
+
+app = FastAPI(title="Smart Water Search API", version="2.0.0", lifespan=lifespan)
 app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"])
 
-search_engine = SmartWaterSearch()
+@app.get("/ready")
+async def ready_endpoint():
+    status = search_engine.readiness()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
 
 @app.get("/search/station")
 async def search_station_endpoint(location_name: str, data_type: str = "waterlevel", 
@@ -239,8 +495,9 @@ async def water_info_endpoint(query: str, limit: int = 5):
     return await search_engine.get_water_info_by_location(query, limit)
 
 @app.get("/search/nearby")
-async def nearby_stations_endpoint(location: str, radius: int = 20, priority: str = "distance"):
-    return await search_engine.recommend_nearby_stations(location, radius, priority)
+async def nearby_stations_endpoint(location: str, radius: int = 20, priority: str = "distance",
+                                   limit: int = 5, data_type: Optional[str] = None):
+    return await search_engine.recommend_nearby_stations(location, radius, priority, limit, data_type)
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Station Spatial Index
+관측소 위경도 격자(bucket grid) 색인 - 반경 검색과 k-최근접 검색
+"""
+import math
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from coordinate_utils import StationCoordinates, haversine_distances
+
+CELL_DEG = 0.1          # 격자 한 칸 (위도 약 11km)
+KM_PER_DEG = 111.195    # 위도 1도 거리 (km)
+MAX_RINGS = 32          # 이보다 멀리 확장해야 하면 전체 벡터 연산으로 전환
+
+
+class SpatialIndex:
+    """카탈로그 관측소 격자 색인
+
+    관측소를 CELL_DEG 크기 칸에 나눠 담고, 질의 지점 주변 칸만 골라 거리 계산한다.
+    카탈로그가 갱신되면 이전 색인의 좌표 변환 결과를 재사용해 바뀐 관측소만 다시 변환한다.
+    """
+
+    def __init__(self, stations: List[Dict[str, Any]], previous: Optional["SpatialIndex"] = None,
+                 cell_deg: float = CELL_DEG):
+        self.stations = stations
+        self.cell_deg = cell_deg
+        self.coords = StationCoordinates(stations, previous.coords if previous is not None else None)
+        self._position = {id(station): i for i, station in enumerate(stations)}
+        # k-최근접 질의 경로별 횟수와 거리 계산한 후보 수 (격자 효과 확인용)
+        self.stats = {"grid": 0, "fallback": 0, "candidates": 0}
+
+        ids = np.flatnonzero(self.coords.valid)
+        rows = np.floor(self.coords.lat[ids] / cell_deg).astype(np.int64)
+        cols = np.floor(self.coords.lon[ids] / cell_deg).astype(np.int64)
+        buckets: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+        for station_id, row, col in zip(ids.tolist(), rows.tolist(), cols.tolist()):
+            buckets[(row, col)].append(station_id)
+        self.buckets: Dict[Tuple[int, int], np.ndarray] = {
+            cell: np.array(members, dtype=np.int64) for cell, members in buckets.items()
+        }
+        if self.buckets:
+            self.row_range = (int(rows.min()), int(rows.max()))
+            self.col_range = (int(cols.min()), int(cols.max()))
+        else:
+            self.row_range = self.col_range = (0, -1)
+
+    def __len__(self) -> int:
+        return len(self.stations)
+
+    def position(self, station: Dict[str, Any]) -> Optional[int]:
+        """카탈로그 내 관측소 번호"""
+        return self._position.get(id(station))
+
+    def has_coordinates(self, station_id: int) -> bool:
+        return bool(self.coords.valid[station_id])
+
+    def location(self, station_id: int) -> Tuple[float, float]:
+        return float(self.coords.lat[station_id]), float(self.coords.lon[station_id])
+
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        return math.floor(lat / self.cell_deg), math.floor(lon / self.cell_deg)
+
+    def _gather(self, cells) -> np.ndarray:
+        members = [self.buckets[cell] for cell in cells if cell in self.buckets]
+        return np.concatenate(members) if members else np.empty(0, dtype=np.int64)
+
+    def _ranked(self, lat: float, lon: float, ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        distances = haversine_distances(lat, lon, self.coords.lat[ids], self.coords.lon[ids])
+        order = np.lexsort((ids, distances))
+        return ids[order], distances[order]
+
+    def within(self, lat: float, lon: float, radius_km: float,
+               limit: Optional[int] = None) -> List[Tuple[int, float]]:
+        """반경 radius_km 이내 관측소 [(관측소 번호, 거리 km)] (가까운 순)"""
+        if radius_km <= 0 or not self.buckets:
+            return []
+        dlat = radius_km / KM_PER_DEG
+        cos_lat = math.cos(math.radians(min(abs(lat) + dlat, 89.0)))
+        dlon = radius_km / (KM_PER_DEG * max(cos_lat, 1e-6))
+        row0, col0 = self._cell(lat - dlat, lon - dlon)
+        row1, col1 = self._cell(lat + dlat, lon + dlon)
+        row0, row1 = max(row0, self.row_range[0]), min(row1, self.row_range[1])
+        col0, col1 = max(col0, self.col_range[0]), min(col1, self.col_range[1])
+
+        if (row1 - row0 + 1) * (col1 - col0 + 1) > len(self.buckets):
+            cells = [c for c in self.buckets if row0 <= c[0] <= row1 and col0 <= c[1] <= col1]
+        else:
+            cells = [(r, c) for r in range(row0, row1 + 1) for c in range(col0, col1 + 1)]
+        ids, distances = self._ranked(lat, lon, self._gather(cells))
+        keep = distances <= radius_km
+        ids, distances = ids[keep], distances[keep]
+        if limit is not None:
+            ids, distances = ids[:limit], distances[:limit]
+        return list(zip(ids.tolist(), distances.tolist()))
+
+    def nearest(self, lat: float, lon: float, k: int = 5,
+                radius_km: Optional[float] = None) -> List[Tuple[int, float]]:
+        """가장 가까운 관측소 k개 [(관측소 번호, 거리 km)]
+
+        질의 칸에서 시작해 고리 모양으로 칸을 넓히며, 아직 보지 않은 칸까지의 최소 거리가
+        현재 k번째 거리보다 멀어지면 멈춘다. MAX_RINGS 고리까지 넓혀도 확정되지 않을 때만 전체 탐색.
+        """
+        if radius_km is not None:
+            return self.within(lat, lon, radius_km, limit=k)
+        if k <= 0 or not self.buckets:
+            return []
+        row, col = self._cell(lat, lon)
+        # 이 고리를 넘으면 색인의 모든 칸을 본 것
+        last_ring = max(row - self.row_range[0], self.row_range[1] - row,
+                        col - self.col_range[0], self.col_range[1] - col, 0)
+
+        found: List[np.ndarray] = []
+        for ring in range(min(last_ring, MAX_RINGS) + 1):
+            if ring == 0:
+                cells = [(row, col)]
+            else:
+                cells = [(row + dr, col + dc)
+                         for dr in range(-ring, ring + 1)
+                         for dc in (range(-ring, ring + 1) if abs(dr) == ring else (-ring, ring))]
+            found.append(self._gather(cells))
+            if ring < last_ring and sum(len(ids) for ids in found) < k:
+                continue
+            ids, distances = self._ranked(lat, lon, np.concatenate(found))
+            # 보지 않은 칸은 위도 또는 경도로 ring칸 이상 떨어져 있음
+            cos_lat = math.cos(math.radians(min(abs(lat) + (ring + 1) * self.cell_deg, 89.0)))
+            unseen_km = ring * self.cell_deg * KM_PER_DEG * cos_lat
+            if ring == last_ring or distances[k - 1] <= unseen_km:
+                self.stats["grid"] += 1
+                self.stats["candidates"] += len(ids)
+                return list(zip(ids[:k].tolist(), distances[:k].tolist()))
+
+        # MAX_RINGS 고리 안에서 k개가 확정되지 않음 (관측소가 드문 먼 바다 등)
+        self.stats["fallback"] += 1
+        self.stats["candidates"] += int(self.coords.valid.sum())
+        return self.coords.nearest(lat, lon, k)
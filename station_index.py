@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Station Name Index
+관측소명/주소 문자 n-gram(2,3) 역색인 - 질의마다 전체 관측소를 훑지 않도록 후보를 좁힘
+자모 분해형/초성형도 카탈로그 적재 시 미리 계산해 오타·초성 검색에 사용 (초성형도 n-gram 역색인)
+"""
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from hangul import chosung, decompose
+
+NGRAM_SIZES = (2, 3)
+JAMO_NGRAM_SIZES = (3,)
+# 초성열은 글자 종류가 적으므로 1-gram까지 색인 (한 글자 초성 질의도 색인으로 조회)
+CHOSUNG_NGRAM_SIZES = (1, 2)
+INDEX_FIELDS = ("obsnm", "addr")
+
+
+def ngrams(text: str, sizes: Iterable[int] = NGRAM_SIZES) -> Set[str]:
+    """문자 n-gram 집합"""
+    grams = set()
+    for n in sizes:
+        for i in range(len(text) - n + 1):
+            grams.add(text[i:i + n])
+    return grams
+
+
+class StationIndex:
+    """카탈로그 적재 시 한 번 만드는 관측소 n-gram 역색인"""
+
+    def __init__(self, stations: List[Dict[str, Any]], fields: Iterable[str] = INDEX_FIELDS):
+        self.stations = stations
+        self.fields = tuple(fields)
+        self.texts = [[station.get(field) or "" for field in self.fields] for station in stations]
+        self.jamo = [[decompose(t) for t in texts] for texts in self.texts]
+        self.chosung = [[chosung(t) for t in texts] for texts in self.texts]
+        width = len(self.fields)
+        postings: Dict[str, Set[int]] = defaultdict(set)
+        char_postings: Dict[str, Set[int]] = defaultdict(set)
+        jamo_postings: Dict[str, Set[int]] = defaultdict(set)
+        chosung_postings: Dict[str, Set[int]] = defaultdict(set)
+        for station_id, texts in enumerate(self.texts):
+            for text in texts:
+                for gram in ngrams(text):
+                    postings[gram].add(station_id)
+                for ch in text:
+                    char_postings[ch].add(station_id)
+            # 자모 3-gram은 필드별로 세야 필드마다 편집거리 하한을 구할 수 있음 (값: 관측소 번호 × 필드 수 + 필드)
+            for field, text in enumerate(self.jamo[station_id]):
+                for gram in ngrams(text, JAMO_NGRAM_SIZES):
+                    jamo_postings[gram].add(station_id * width + field)
+            for text in self.chosung[station_id]:
+                for gram in ngrams(text, CHOSUNG_NGRAM_SIZES):
+                    chosung_postings[gram].add(station_id)
+        self.postings: Dict[str, Set[int]] = dict(postings)
+        self.char_postings: Dict[str, Set[int]] = dict(char_postings)
+        self.jamo_postings: Dict[str, Set[int]] = dict(jamo_postings)
+        self.chosung_postings: Dict[str, Set[int]] = dict(chosung_postings)
+
+    def __len__(self) -> int:
+        return len(self.stations)
+
+    def lookup(self, term: str, field: Optional[int] = None) -> Set[int]:
+        """이름 또는 주소(field 지정 시 해당 필드)에 term을 포함하는 관측소 번호"""
+        if not term:
+            return set()
+        fields = range(len(self.fields)) if field is None else (field,)
+        if len(term) < 2:
+            lists = [self.char_postings.get(term, set())]
+        else:
+            lists = sorted((self.postings.get(gram, set()) for gram in ngrams(term, (2,))), key=len)
+        candidates = set(lists[0])
+        for ids in lists[1:]:
+            candidates &= ids
+            if not candidates:
+                return candidates
+        # bigram 교집합은 후보일 뿐이므로 실제 포함 여부 확인
+        return {i for i in candidates if any(term in self.texts[i][f] for f in fields)}
+
+    def overlap(self, text: str) -> Dict[int, int]:
+        """text와 n-gram을 공유하는 관측소별 공유 개수"""
+        counts: Dict[int, int] = defaultdict(int)
+        for gram in ngrams(text):
+            for station_id in self.postings.get(gram, ()):
+                counts[station_id] += 1
+        return counts
+
+    def jamo_overlap(self, query_jamo: str) -> Dict[Tuple[int, int], int]:
+        """query_jamo와 자모 3-gram을 공유하는 (관측소 번호, 필드)별 공유 개수"""
+        width = len(self.fields)
+        counts: Dict[int, int] = defaultdict(int)
+        for gram in ngrams(query_jamo, JAMO_NGRAM_SIZES):
+            for key in self.jamo_postings.get(gram, ()):
+                counts[key] += 1
+        return {divmod(key, width): count for key, count in counts.items()}
+
+    def lookup_chosung(self, query: str) -> Set[int]:
+        """초성열에 query를 포함하는 관측소 ("ㅎㄱ" → 한강대교, 한계교 ...)"""
+        if not query:
+            return set()
+        if len(query) < 2:
+            return set(self.chosung_postings.get(query, ()))
+        lists = sorted((self.chosung_postings.get(gram, set()) for gram in ngrams(query, (2,))), key=len)
+        candidates = set(lists[0])
+        for ids in lists[1:]:
+            candidates &= ids
+            if not candidates:
+                return candidates
+        # bigram 교집합은 후보일 뿐이므로 실제 포함 여부 확인
+        return {i for i in candidates if any(query in form for form in self.chosung[i])}
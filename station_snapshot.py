@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Station Catalog Snapshot
+번들 관측소 카탈로그 스냅샷 - 콜드 스타트 시 네트워크 없이 카탈로그 적재
+
+netlify/functions/data/*-stations.json을 열 기반 바이너리 파일 하나로 묶는다.
+(python station_snapshot.py 로 재생성)
+
+파일 구조 (little-endian):
+    b"HRFCOSNP" | u16 포맷 버전 | u16 섹션 수 | u32 메타 길이 | 메타(JSON)
+    섹션마다: u16 이름 길이 | 이름 | u32 행 수 | u16 열 수 | (u16 열 이름 길이 | 열 이름)...
+              | u32 데이터 길이 | zlib(열 순서대로 모든 값을 "\\0"으로 이은 UTF-8)
+"""
+import hashlib
+import json
+import os
+import struct
+import sys
+import time
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+MAGIC = b"HRFCOSNP"
+FORMAT_VERSION = 1
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SOURCE_DIR = os.path.join(BASE_DIR, "netlify", "functions", "data")
+SNAPSHOT_PATH = os.getenv('HRFCO_CATALOG_SNAPSHOT', os.path.join(BASE_DIR, "data", "stations.snapshot"))
+
+HYDRO_TYPES = ("waterlevel", "rainfall", "dam")
+
+# 업스트림 info.json 필드명으로 저장 (관측소 코드 필드는 hydro_type별로 다름)
+CODE_FIELDS = {"waterlevel": "wlobscd", "rainfall": "rfobscd", "dam": "damcd"}
+FIELD_MAP = {"obs_name": "obsnm", "address": "addr", "agency": "agcnm"}
+
+_cache: Dict[str, Any] = {}
+
+
+def _columns(hydro_type: str, records: List[Dict[str, Any]]) -> Dict[str, List[str]]:
+    """번들 JSON 레코드를 업스트림 필드명 기준 열로 변환
+
+    번들 JSON의 latitude/longitude는 정수(도 단위 절사)라 위치 검색에 쓸 수 없으므로
+    담지 않는다. 좌표는 업스트림 갱신 후부터 사용된다.
+    """
+    fields = {"obs_code": CODE_FIELDS[hydro_type], **FIELD_MAP}
+    return {
+        upstream_field: [str(record.get(field) or "") for record in records]
+        for field, upstream_field in fields.items()
+    }
+
+
+def _pack_str(value: str, size: str = "<H") -> bytes:
+    raw = value.encode("utf-8")
+    return struct.pack(size, len(raw)) + raw
+
+
+def build_snapshot(source_dir: str = SOURCE_DIR, path: str = SNAPSHOT_PATH) -> Dict[str, Any]:
+    """번들 JSON으로 스냅샷 파일 생성, 메타 정보 반환"""
+    sections = []
+    digest = hashlib.sha1()
+    counts = {}
+    for hydro_type in HYDRO_TYPES:
+        source = os.path.join(source_dir, f"{hydro_type}-stations.json")
+        with open(source, "rb") as f:
+            raw = f.read()
+        digest.update(raw)
+        columns = _columns(hydro_type, json.loads(raw))
+        rows = len(next(iter(columns.values())))
+        counts[hydro_type] = rows
+
+        if any("\0" in value for values in columns.values() for value in values):
+            raise ValueError(f"{hydro_type}: 값에 NUL 문자가 있습니다")
+        body = "\0".join(value for values in columns.values() for value in values)
+        blob = zlib.compress(body.encode("utf-8"), 9)
+        section = _pack_str(hydro_type) + struct.pack("<IH", rows, len(columns))
+        section += b"".join(_pack_str(name) for name in columns)
+        section += struct.pack("<I", len(blob)) + blob
+        sections.append(section)
+
+    meta = {
+        "version": digest.hexdigest()[:12],
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "source": "netlify/functions/data",
+        "stations": counts,
+    }
+    meta_raw = json.dumps(meta, ensure_ascii=False).encode("utf-8")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(MAGIC + struct.pack("<HHI", FORMAT_VERSION, len(sections), len(meta_raw)) + meta_raw)
+        f.write(b"".join(sections))
+    return meta
+
+
+def read_snapshot(path: str = SNAPSHOT_PATH) -> Tuple[Dict[str, Any], Dict[str, List[Dict[str, str]]]]:
+    """스냅샷 파일 읽기 → (메타, hydro_type별 관측소 목록)"""
+    with open(path, "rb") as f:
+        data = f.read()
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError("관측소 스냅샷 파일이 아닙니다")
+    offset = len(MAGIC)
+    version, section_count, meta_len = struct.unpack_from("<HHI", data, offset)
+    if version != FORMAT_VERSION:
+        raise ValueError(f"지원하지 않는 스냅샷 포맷 버전: {version}")
+    offset += 8
+    meta = json.loads(data[offset:offset + meta_len].decode("utf-8"))
+    offset += meta_len
+
+    def read_str() -> str:
+        nonlocal offset
+        (size,) = struct.unpack_from("<H", data, offset)
+        value = data[offset + 2:offset + 2 + size].decode("utf-8")
+        offset += 2 + size
+        return value
+
+    catalogs = {}
+    for _ in range(section_count):
+        hydro_type = read_str()
+        rows, column_count = struct.unpack_from("<IH", data, offset)
+        offset += 6
+        names = [read_str() for _ in range(column_count)]
+        (blob_len,) = struct.unpack_from("<I", data, offset)
+        offset += 4
+        values = zlib.decompress(data[offset:offset + blob_len]).decode("utf-8").split("\0")
+        offset += blob_len
+        if len(values) != rows * column_count:
+            raise ValueError(f"{hydro_type}: 스냅샷 데이터 크기가 맞지 않습니다")
+        columns = [values[i * rows:(i + 1) * rows] for i in range(column_count)]
+        catalogs[hydro_type] = [dict(zip(names, row)) for row in zip(*columns)]
+    return meta, catalogs
+
+
+def snapshot_meta() -> Optional[Dict[str, Any]]:
+    """적재한 스냅샷 메타 (없거나 읽지 못하면 None)"""
+    _load()
+    return _cache.get("meta")
+
+
+def load_stations(hydro_type: str) -> Optional[List[Dict[str, str]]]:
+    """스냅샷의 hydro_type 관측소 목록 (없으면 None)
+
+    stdio MCP 서버는 stdout을 프로토콜에 쓰므로 실패해도 출력하지 않고 None만 반환한다.
+    """
+    catalogs = _load()
+    stations = catalogs.get(hydro_type)
+    return list(stations) if stations else None
+
+
+def _load() -> Dict[str, List[Dict[str, str]]]:
+    if "catalogs" not in _cache:
+        try:
+            _cache["meta"], _cache["catalogs"] = read_snapshot(SNAPSHOT_PATH) if SNAPSHOT_PATH else (None, {})
+        except (OSError, ValueError, struct.error, zlib.error) as e:
+            _cache["meta"], _cache["catalogs"], _cache["error"] = None, {}, str(e)
+    return _cache["catalogs"]
+
+
+if __name__ == "__main__":
+    target = sys.argv[1] if len(sys.argv) > 1 else SNAPSHOT_PATH
+    meta = build_snapshot(SOURCE_DIR, target)
+    print(f"✅ 관측소 스냅샷 생성: {target} ({os.path.getsize(target):,} bytes)")
+    print(f"📦 버전 {meta['version']}: {meta['stations']}")
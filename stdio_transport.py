@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Stdio Transport for MCP
+asyncio StreamReader/StreamWriter 기반 줄 단위 JSON-RPC 입출력
+"""
+import asyncio
+import os
+import sys
+from typing import Optional
+
+# 한 메시지(한 줄) 최대 크기 - 큰 배치 요청도 받을 수 있도록 넉넉하게
+MCP_STDIO_LIMIT = int(os.getenv('MCP_STDIO_LIMIT', str(16 * 1024 * 1024)))
+
+
+class MessageTooLarge(Exception):
+    """한 줄이 읽기 버퍼 한도를 넘는 메시지"""
+
+
+class StdioTransport:
+    """stdin/stdout 파이프를 이벤트 루프에 직접 연결한 전송 계층
+
+    읽기마다 스레드 풀을 거치지 않고, 쓰기는 전송 버퍼에 쌓은 뒤 고수위선을 넘을 때만
+    drain()에서 기다린다. 버퍼 한도를 넘는 줄은 개행까지 버리고 MessageTooLarge를 알린다.
+    파이프로 연결할 수 없는 쪽(일반 파일 리다이렉트, Windows 콘솔 등)은 기존 방식으로 처리한다.
+    """
+
+    def __init__(self, reader: Optional[asyncio.StreamReader] = None,
+                 writer: Optional[asyncio.StreamWriter] = None, limit: int = MCP_STDIO_LIMIT):
+        self.reader = reader
+        self.writer = writer
+        self.limit = limit
+
+    @classmethod
+    async def open(cls, limit: int = MCP_STDIO_LIMIT) -> "StdioTransport":
+        """현재 프로세스의 stdin/stdout에 연결"""
+        loop = asyncio.get_running_loop()
+        reader = writer = None
+        try:
+            reader = asyncio.StreamReader(limit=limit)
+            await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+        except (ValueError, NotImplementedError, OSError):
+            reader = None
+        try:
+            transport, protocol = await loop.connect_write_pipe(asyncio.streams.FlowControlMixin, sys.stdout)
+            writer = asyncio.StreamWriter(transport, protocol, None, loop)
+        except (ValueError, NotImplementedError, OSError):
+            writer = None
+        return cls(reader, writer, limit)
+
+    async def read_line(self) -> Optional[bytes]:
+        """다음 줄 반환 (EOF면 None)"""
+        if self.reader is None:
+            line = await asyncio.get_running_loop().run_in_executor(None, sys.stdin.buffer.readline)
+            return line or None
+        try:
+            return await self.reader.readuntil(b"\n")
+        except asyncio.IncompleteReadError as e:
+            return e.partial or None
+        except asyncio.LimitOverrunError as e:
+            await self._discard_line(e.consumed)
+            raise MessageTooLarge(f"message exceeds {self.limit} bytes")
+
+    async def _discard_line(self, consumed: int):
+        """한도를 넘은 줄의 나머지를 개행까지 버림"""
+        while True:
+            await self.reader.read(consumed)
+            try:
+                await self.reader.readuntil(b"\n")
+                return
+            except asyncio.IncompleteReadError:
+                return
+            except asyncio.LimitOverrunError as e:
+                consumed = e.consumed
+
+    async def write(self, data: bytes):
+        if self.writer is None:
+            sys.stdout.buffer.write(data)
+            sys.stdout.buffer.flush()
+            return
+        self.writer.write(data)
+        await self.writer.drain()
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
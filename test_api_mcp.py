@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Vercel 서버리스 핸들러(api/mcp.py) 테스트 - 로컬 HTTP 서버로 실행 (업스트림 호출 없음)
+"""
+import http.server
+import importlib.util
+import json
+import os
+import threading
+import urllib.request
+
+spec = importlib.util.spec_from_file_location(
+    "api_mcp", os.path.join(os.path.dirname(os.path.abspath(__file__)), "api", "mcp.py"))
+api_mcp = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(api_mcp)
+
+
+def serve():
+    server = http.server.HTTPServer(("127.0.0.1", 0), api_mcp.handler)
+    server.RequestHandlerClass.log_message = lambda *args: None
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/mcp"
+
+
+def post(url, body):
+    request = urllib.request.Request(url, data=json.dumps(body).encode(),
+                                     headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request) as response:
+        raw = response.read()
+        return response.status, response.headers, json.loads(raw) if raw else None
+
+
+def test_handler_serves_tools_and_batches_with_latency_headers():
+    server, url = serve()
+    try:
+        status, headers, body = post(url, {"jsonrpc": "2.0", "id": 1, "method": "tools/list"})
+        assert status == 200 and headers["X-Cold-Start"] == "true"
+        names = {tool["name"] for tool in body["result"]["tools"]}
+        assert {"get_observatories", "get_waterlevel_data", "get_waterlevel_data_bulk",
+                "recommend_nearby_stations"} <= names
+
+        status, headers, body = post(url, [{"jsonrpc": "2.0", "id": 2, "method": "initialize"},
+                                           {"jsonrpc": "2.0", "method": "notifications/initialized"}])
+        assert headers["X-Cold-Start"] == "false" and headers["Server-Timing"].startswith("handler;dur=")
+        assert [r["id"] for r in body] == [2]
+
+        status, _, body = post(url, {"jsonrpc": "2.0", "method": "notifications/initialized"})
+        assert status == 202 and body is None
+
+        with urllib.request.urlopen(url) as response:
+            latency = json.loads(response.read())["latency"]
+        assert latency["invocations"] == 3 and latency["warm"]["count"] == 2
+    finally:
+        server.shutdown()
+    print("✅ 서버리스 핸들러 도구/배치 처리 및 지연 시간 기록")
+
+
+if __name__ == "__main__":
+    test_handler_serves_tools_and_batches_with_latency_headers()
+    print("\n🎉 서버리스 핸들러 테스트 완료!")
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+search_stations_by_name(auto_fetch_data=True) 동시 조회/마감 시간 테스트 (업스트림 호출 없음)
+"""
+import asyncio
+
+from catalog_cache import CatalogCache
+from smart_water_search import SmartWaterSearch
+from station_index import StationIndex
+
+STATIONS = [
+    {"wlobscd": "1018683", "obsnm": "서울시(한강대교)", "addr": "서울특별시 용산구"},
+    {"wlobscd": "1018680", "obsnm": "서울시(잠수교)", "addr": "서울특별시 서초구"},
+    {"wlobscd": "1018640", "obsnm": "서울시(행주대교)", "addr": "서울특별시 강서구"},
+]
+
+DELAYS = {"1018683": 0.1, "1018680": 0.1, "1018640": 1.0}
+
+
+def make_search() -> SmartWaterSearch:
+    async def loader(hydro_type):
+        return STATIONS
+
+    search = SmartWaterSearch()
+    search.catalog = CatalogCache(loader)
+    search.catalog.register_builder("name_index", StationIndex)
+
+    async def get_station_data(obs_code, data_type="waterlevel"):
+        await asyncio.sleep(DELAYS[obs_code])
+        return {"content": [{"wlobscd": obs_code, "wl": "1.0"}]}
+
+    search.get_station_data = get_station_data
+    return search
+
+
+def test_fetches_run_concurrently_and_late_stations_are_partial():
+    async def run():
+        search = make_search()
+        start = asyncio.get_running_loop().time()
+        result = await search.search_stations_by_name("서울", auto_fetch_data=True, limit=3, deadline=0.3)
+        return result, asyncio.get_running_loop().time() - start
+
+    result, elapsed = asyncio.run(run())
+    assert elapsed < 0.4  # 느린 관측소를 기다리지 않음
+    assert result["partial"] is True
+    by_code = {s["code"]: s for s in result["stations"]}
+    assert by_code["1018640"]["current_data"] is None and by_code["1018640"]["partial"] is True
+    for code in ("1018683", "1018680"):
+        assert by_code[code]["current_data"]["content"][0]["wlobscd"] == code
+        assert "partial" not in by_code[code]
+    print("✅ 동시 조회 및 마감 초과 관측소 partial 표시")
+
+
+def test_complete_results_are_not_partial():
+    async def run():
+        search = make_search()
+        return await search.search_stations_by_name("서울", auto_fetch_data=True, limit=3, deadline=2)
+
+    result = asyncio.run(run())
+    assert "partial" not in result
+    assert all(s["current_data"] for s in result["stations"])
+    print("✅ 마감 안에 끝나면 전체 결과")
+
+
+if __name__ == "__main__":
+    test_fetches_run_concurrently_and_late_stations_are_partial()
+    test_complete_results_are_not_partial()
+    print("\n🎉 자동 데이터 조회 테스트 완료!")
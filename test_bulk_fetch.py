@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+다중 관측소 동시 조회 테스트 (업스트림 호출 없음)
+"""
+import asyncio
+
+from bulk_fetch import fetch_bulk, normalize_codes
+
+
+async def fake_fetcher(obs_code, hydro_type, time_type):
+    await asyncio.sleep(0.1)
+    if obs_code == "bad":
+        raise ValueError("조회 실패")
+    if obs_code == "none":
+        return []
+    return [{"wlobscd": obs_code, "ymdhm": "202401010100", "wl": "1.5"},
+            {"wlobscd": obs_code, "ymdhm": "202401010000", "wl": "1.4", "fw": "10"}]
+
+
+def test_codes_are_deduplicated_in_order():
+    assert normalize_codes("1018683, 1018680,1018683") == ["1018683", "1018680"]
+    for bad in ([], "", None):
+        try:
+            normalize_codes(bad)
+            assert False, bad
+        except ValueError:
+            pass
+    print("✅ 관측소 코드 정리")
+
+
+def test_bulk_is_concurrent_with_per_station_status():
+    async def run():
+        start = asyncio.get_running_loop().time()
+        result = await fetch_bulk(["a", "bad", "none", "b"], fetcher=fake_fetcher)
+        return result, asyncio.get_running_loop().time() - start
+
+    result, elapsed = asyncio.run(run())
+    assert elapsed < 0.2  # 4개 관측소를 한 번의 지연 시간으로
+    assert result["stations"]["status"] == ["ok", "error", "empty", "ok"]
+    assert result["stations"]["rows"] == [2, 0, 0, 2]
+    assert result["stations"]["error"][1] == "조회 실패"
+    assert result["summary"] == {"ok": 2, "empty": 1, "error": 1}
+
+    data = result["data"]
+    assert list(data) == ["obs_code", "ymdhm", "wl", "fw"]
+    assert data["obs_code"] == ["a", "a", "b", "b"]
+    assert data["fw"] == [None, "10", None, "10"]
+    print("✅ 동시 조회 및 관측소별 상태/열 기반 결과")
+
+
+def test_semaphore_bounds_concurrency():
+    async def run():
+        start = asyncio.get_running_loop().time()
+        await fetch_bulk([str(i) for i in range(4)], max_concurrency=2, fetcher=fake_fetcher)
+        return asyncio.get_running_loop().time() - start
+
+    assert 0.2 <= asyncio.run(run()) < 0.3
+    print("✅ 동시 요청 수 상한 적용")
+
+
+if __name__ == "__main__":
+    test_codes_are_deduplicated_in_order()
+    test_bulk_is_concurrent_with_per_station_status()
+    test_semaphore_bounds_concurrency()
+    print("\n🎉 다중 관측소 조회 테스트 완료!")
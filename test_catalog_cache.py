@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+관측소 카탈로그 캐시 테스트 (업스트림 호출 없음)
+"""
+import asyncio
+
+from catalog_cache import CatalogCache
+
+
+def make_loader(results):
+    """호출 횟수를 기록하는 가짜 로더"""
+    calls = []
+
+    async def loader(hydro_type):
+        calls.append(hydro_type)
+        await asyncio.sleep(0.01)
+        result = results[min(len(calls), len(results)) - 1]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    return loader, calls
+
+
+def test_concurrent_cold_load_fetches_once():
+    loader, calls = make_loader([[{"obsnm": "한강대교"}]])
+    cache = CatalogCache(loader=loader)
+
+    async def run():
+        return await asyncio.gather(*(cache.get_stations("waterlevel") for _ in range(10)))
+
+    results = asyncio.run(run())
+    assert calls == ["waterlevel"]
+    assert all(r == [{"obsnm": "한강대교"}] for r in results)
+    print("✅ 동시 최초 조회 시 업스트림 1회 호출")
+
+
+def test_stale_entry_served_while_refreshing():
+    loader, calls = make_loader([[{"obsnm": "old"}], [{"obsnm": "new"}]])
+    cache = CatalogCache(loader=loader, ttl={"waterlevel": 0})
+
+    async def run():
+        first = await cache.get_stations("waterlevel")
+        stale = await cache.get_stations("waterlevel")
+        await asyncio.sleep(0.05)
+        fresh = await cache.get_stations("waterlevel")
+        return first, stale, fresh
+
+    first, stale, fresh = asyncio.run(run())
+    assert stale == [{"obsnm": "old"}]
+    assert fresh == [{"obsnm": "new"}]
+    print("✅ 만료 시 이전 데이터 반환 후 백그라운드 갱신")
+
+
+def test_failed_refresh_keeps_last_good_copy():
+    loader, calls = make_loader([[{"obsnm": "good"}], RuntimeError("upstream down")])
+    cache = CatalogCache(loader=loader, ttl={"waterlevel": 0}, min_backoff=60)
+
+    async def run():
+        await cache.get_stations("waterlevel")
+        await cache.get_stations("waterlevel")
+        await asyncio.sleep(0.05)
+        # 백오프 중에는 추가 갱신 시도 없음
+        for _ in range(3):
+            stations = await cache.get_stations("waterlevel")
+        await asyncio.sleep(0.05)
+        return stations
+
+    stations = asyncio.run(run())
+    assert stations == [{"obsnm": "good"}]
+    assert len(calls) == 2
+    assert cache.stats()["waterlevel"]["failures"] == 1
+    print("✅ 갱신 실패 시 마지막 정상 데이터 유지 및 백오프")
+
+
+if __name__ == "__main__":
+    test_concurrent_cold_load_fetches_once()
+    test_stale_entry_served_while_refreshing()
+    test_failed_refresh_keeps_last_good_copy()
+    print("\n🎉 카탈로그 캐시 테스트 완료!")
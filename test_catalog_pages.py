@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+관측소 카탈로그 페이지네이션 테스트 (번들 스냅샷 사용, 업스트림 호출 없음)
+"""
+import asyncio
+
+import station_snapshot
+from catalog_cache import CatalogCache
+from catalog_pages import paginate
+
+
+def make_entry(hydro_type="waterlevel"):
+    async def loader(name):
+        return station_snapshot.load_stations(name)
+
+    return asyncio.run(CatalogCache(loader=loader).get_entry(hydro_type))
+
+
+def walk(entry, **kwargs):
+    pages, cursor = [], None
+    while True:
+        page = paginate(entry, cursor=cursor, **kwargs)
+        pages.append(page)
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return pages
+
+
+def test_walk_all_stations():
+    entry = make_entry()
+    pages = walk(entry, limit=100)
+    codes = [s["wlobscd"] for page in pages for s in page["observatories"]]
+    assert len(codes) == len(entry.stations) == pages[0]["total_count"]
+    assert codes == sorted(set(codes))
+    assert all(page["returned_count"] == 100 for page in pages[:-1])
+    print(f"✅ 전체 {len(codes)}개 관측소를 {len(pages)}페이지로 순회")
+
+
+def test_filters_and_cursor():
+    entry = make_entry()
+    pages = walk(entry, limit=5, basin="한강", region="서울")
+    stations = [s for page in pages for s in page["observatories"]]
+    assert stations and all(s["wlobscd"].startswith("1") and s["addr"].startswith("서울") for s in stations)
+    assert len(stations) == pages[0]["total_count"]
+    assert paginate(entry, basin="1")["filters"]["basin"] == "한강"
+    agency = paginate(entry, agency="한국수자원공사", limit=500)
+    assert all("한국수자원공사" in s["agcnm"] for s in agency["observatories"])
+    for bad in ({"basin": "대동강"}, {"cursor": "!!"}, {"cursor": pages[0]["next_cursor"], "basin": "금강"}):
+        try:
+            paginate(entry, **bad)
+            raise AssertionError(f"{bad}는 거부해야 함")
+        except ValueError:
+            pass
+    print(f"✅ 수계/지역/기관 필터 ({len(stations)}개)")
+
+
+def test_cursor_survives_refresh():
+    entry = make_entry()
+    first = paginate(entry, limit=10)
+    cache = CatalogCache(loader=None)
+    # 이미 받은 관측소 하나가 빠진 새 카탈로그에서도 이어서 받음
+    refreshed = cache.put("waterlevel", [s for s in entry.stations if s is not first["observatories"][3]])
+    second = paginate(refreshed, limit=10, cursor=first["next_cursor"])
+    assert second["observatories"][0]["wlobscd"] > first["observatories"][-1]["wlobscd"]
+    assert paginate(entry, limit=10, cursor=first["next_cursor"])["observatories"] == second["observatories"]
+    print("✅ 카탈로그 갱신 후에도 커서 유지")
+
+
+if __name__ == "__main__":
+    test_walk_all_stations()
+    test_filters_and_cursor()
+    test_cursor_survives_refresh()
+    print("\n🎉 카탈로그 페이지네이션 테스트 완료!")
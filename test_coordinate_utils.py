@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+좌표 유틸리티 벡터 연산 테스트
+"""
+import numpy as np
+
+from coordinate_utils import (StationCoordinates, calculate_distance, distance_matrix,
+                              dms_to_decimal, dms_to_decimal_array, haversine_distances)
+
+STATIONS = [
+    {"obsnm": "서울시(한강대교)", "lat": "37-31-02", "lon": "126-57-29"},
+    {"obsnm": "서울시(잠수교)", "lat": "37-30-52", "lon": "126-59-46"},
+    {"obsnm": "부산시(대동낙동강교)", "lat": "35-14-29", "lon": "128-58-24"},
+    {"obsnm": "좌표 없음", "lat": " ", "lon": ""},
+]
+
+
+def test_bulk_dms_matches_scalar():
+    values = [s["lat"] for s in STATIONS[:3]]
+    bulk = dms_to_decimal_array(values)
+    assert np.allclose(bulk, [dms_to_decimal(v) for v in values])
+    assert np.isnan(dms_to_decimal_array([" ", None, "abc"])).all()
+    assert dms_to_decimal_array([37.5])[0] == 37.5
+    print("✅ 도-분-초 일괄 변환")
+
+
+def test_vectorized_distances_match_scalar():
+    coords = StationCoordinates(STATIONS)
+    lats, lons = coords.lat[:3], coords.lon[:3]
+    vector = haversine_distances(37.5665, 126.9780, lats, lons)
+    scalar = [calculate_distance(37.5665, 126.9780, a, b) for a, b in zip(lats, lons)]
+    assert np.allclose(vector, scalar)
+
+    matrix = distance_matrix(lats, lons)
+    assert matrix.shape == (3, 3)
+    assert np.allclose(np.diag(matrix), 0.0)
+    assert np.isclose(matrix[0, 2], calculate_distance(lats[0], lons[0], lats[2], lons[2]))
+    print("✅ 벡터 거리 = 스칼라 거리")
+
+
+def test_nearest_skips_missing_coordinates():
+    coords = StationCoordinates(STATIONS)
+    assert coords.lat.flags["C_CONTIGUOUS"] and coords.lat.dtype == np.float64
+    nearest = coords.nearest(37.5665, 126.9780, k=10)
+    assert [i for i, _ in nearest] == [0, 1, 2]
+    assert coords.nearest(37.5665, 126.9780, k=10, radius_km=20) == nearest[:2]
+    print("✅ 최근접 관측소 정렬")
+
+
+if __name__ == "__main__":
+    test_bulk_dms_matches_scalar()
+    test_vectorized_distances_match_scalar()
+    test_nearest_skips_missing_coordinates()
+    print("\n🎉 좌표 유틸리티 테스트 완료!")
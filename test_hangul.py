@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+한글 자모 분해 및 자모 편집거리 테스트
+"""
+import random
+
+import hangul
+
+
+def reference_distance(pattern, text):
+    """부분 문자열 편집거리 기준 구현 (동적 계획법)"""
+    prev = list(range(len(pattern) + 1))
+    best = len(pattern)
+    for ch in text:
+        cur = [0] * (len(pattern) + 1)
+        for i in range(1, len(pattern) + 1):
+            cost = 0 if pattern[i - 1] == ch else 1
+            cur[i] = min(prev[i - 1] + cost, prev[i] + 1, cur[i - 1] + 1)
+        best = min(best, cur[-1])
+        prev = cur
+    return best
+
+
+def test_decompose_and_chosung():
+    assert hangul.decompose("한강") == "ㅎㅏㄴㄱㅏㅇ"
+    filler = hangul.JONGSUNG_FILLER
+    assert hangul.decompose("서울 시") == f"ㅅㅓ{filler}ㅇㅜㄹㅅㅣ{filler}"
+    assert hangul.chosung("한강대교") == "ㅎㄱㄷㄱ"
+    assert hangul.chosung("서울시(한강대교)") == "ㅅㅇㅅ(ㅎㄱㄷㄱ)"
+    assert hangul.is_chosung_query("ㅎㄱ")
+    assert not hangul.is_chosung_query("한ㄱ")
+    assert not hangul.is_chosung_query("")
+    print("✅ 자모/초성 분해")
+
+
+def test_substring_distance_matches_reference():
+    rng = random.Random(7)
+    for _ in range(2000):
+        pattern = "".join(rng.choice("ㄱㄴㅏㅓ") for _ in range(rng.randint(1, 12)))
+        text = "".join(rng.choice("ㄱㄴㅏㅓ") for _ in range(rng.randint(0, 20)))
+        assert hangul.substring_distance(pattern, text) == reference_distance(pattern, text)
+    print("✅ 비트 병렬 편집거리 = 동적 계획법")
+
+
+def test_single_jamo_typo_costs_one_jamo():
+    target = hangul.decompose("서울시(한강대교)")
+    exact = hangul.similarity(hangul.decompose("한강대교"), target)
+    typo = hangul.similarity(hangul.decompose("한감대교"), target)
+    query = hangul.decompose("한감대교")
+    assert hangul.substring_distance(query, target) == 1
+    # 편집거리 후보 구간 안에서 자모 하나만큼 감점 (길이 비율은 편집 한 번보다 작은 차이만 냄)
+    ratio = hangul.length_ratio(query, target)
+    assert typo == hangul.SUBSTRING_FLOOR * (1 - 1 / len(query)) * (1 - (1 - ratio) / (2 * len(query)))
+    palm = hangul.decompose("팔당대교")
+    assert hangul.substring_distance(query, palm) > 1 and typo > hangul.similarity(query, palm)
+    assert exact > hangul.SUBSTRING_FLOOR > typo
+    print("✅ 자모 하나 오타는 자모 하나만큼 감점")
+
+
+def test_exact_and_prefix_rank_above_fuzzy():
+    query = hangul.decompose("평창")
+    scores = {name: hangul.similarity(query, hangul.decompose(name))
+              for name in ("평창", "평창군(평창교)", "강원도평창군", "강창1", "강창2")}
+    assert scores["평창"] == 1.0
+    assert scores["평창"] > scores["평창군(평창교)"] >= hangul.PREFIX_FLOOR
+    assert hangul.PREFIX_FLOOR > scores["강원도평창군"] >= hangul.SUBSTRING_FLOOR
+    assert hangul.SUBSTRING_FLOOR > scores["강창1"] == scores["강창2"]
+    # 점수 상한은 실제 점수 이상
+    for name, score in scores.items():
+        target = hangul.decompose(name)
+        distance = hangul.substring_distance(query, target)
+        assert hangul.similarity_bound(query, target, distance) >= score
+        assert hangul.similarity_bound(query, target) >= score
+    # 받침 없는 음절도 경계가 남으므로 "강"은 "가음"의 앞부분이 아님
+    query = hangul.decompose("강")
+    assert hangul.similarity(query, hangul.decompose("가음")) < hangul.SUBSTRING_FLOOR
+    assert hangul.similarity(query, hangul.decompose("한강")) >= hangul.SUBSTRING_FLOOR
+    print("✅ 정확히 포함/앞부분 일치가 편집거리 후보보다 앞섬")
+
+
+if __name__ == "__main__":
+    test_decompose_and_chosung()
+    test_substring_distance_matches_reference()
+    test_single_jamo_typo_costs_one_jamo()
+    test_exact_and_prefix_rank_above_fuzzy()
+    print("\n🎉 한글 자모 테스트 완료!")
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+인기 관측소 백그라운드 갱신 테스트 (업스트림 호출 없음)
+"""
+import asyncio
+import time
+from datetime import datetime
+
+from hot_stations import KST, HotStationPoller, next_publish
+
+
+def make_loader(name, calls):
+    async def loader():
+        calls.append(name)
+        return {"content": [{"wlobscd": name, "n": len(calls)}]}
+    return loader
+
+
+def test_next_publish_follows_cadence_boundary():
+    # 10:05에 조회하면 10:10 자료가 올라오는 10:12가 다음 게시 시각
+    assert next_publish(300, 600, delay=120) == 720
+    # 10:01이면 아직 10:00 자료 게시 전 (10:02)
+    assert next_publish(60, 600, delay=120) == 120
+    print("✅ 게시 주기 경계 계산")
+
+
+def test_served_from_memory_until_next_publish():
+    calls = []
+    poller = HotStationPoller()
+
+    async def run():
+        key = ("waterlevel", "1018683", "1H")
+        first = await poller.serve(key, make_loader("a", calls))
+        second = await poller.serve(key, make_loader("a", calls))
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert calls == ["a"] and first is second
+    assert poller.counters["hits"] == 1 and poller.counters["misses"] == 1
+    print("✅ 다음 게시 시각까지 메모리에서 응답")
+
+
+def test_late_publication_is_retried_soon():
+    poller = HotStationPoller(jitter=0, publish_delay=120, late_retry=30)
+    now = time.time()
+    expires = next_publish(now, 600, delay=120)
+    expected = expires - 120 - 600  # 이미 게시됐어야 할 10분 경계
+
+    def ymdhm(ts):
+        return datetime.fromtimestamp(ts, KST).strftime("%Y%m%d%H%M")
+
+    fresh, late = [("waterlevel", code, "10M") for code in ("fresh", "late")]
+    poller._store(fresh, poller._track(fresh, now), {"content": [{"ymdhm": ymdhm(expected)}]}, now)
+    poller._store(late, poller._track(late, now), {"content": [{"ymdhm": ymdhm(expected - 600)}]}, now)
+    # 최신 경계 자료는 다음 게시 시각까지, 한 주기 늦은 자료는 짧게 보관 후 다시 받음
+    assert poller._tracked[fresh].expires_at == expires
+    assert poller._tracked[late].expires_at == min(expires, now + 30)
+    assert poller._tracked[late].due_at == poller._tracked[late].expires_at
+    assert poller.counters["late"] == 1
+    # 관측 시각이 없는 응답은 기존처럼 다음 게시 시각까지
+    unknown = ("waterlevel", "unknown", "10M")
+    poller._store(unknown, poller._track(unknown, now), {"content": []}, now)
+    assert poller._tracked[unknown].expires_at == expires
+    print("✅ 게시가 늦은 자료는 짧은 간격으로 다시 확인")
+
+
+def test_poll_refreshes_hot_stations_within_budget():
+    calls = []
+    poller = HotStationPoller(min_score=1.5, rate_budget=1, jitter=0)
+    hot_a, hot_b, cold = [("waterlevel", code, "10M") for code in ("a", "b", "c")]
+
+    async def run():
+        for key, times in ((hot_a, 3), (hot_b, 2), (cold, 1)):
+            for _ in range(times):
+                await poller.serve(key, make_loader(key[1], calls))
+        assert poller.hot() == [hot_a, hot_b]
+        for key in (hot_a, hot_b, cold):
+            poller._tracked[key].due_at = 0  # 갱신 시각 도달
+        calls.clear()
+        refreshed = await poller.poll_once()
+        return refreshed
+
+    refreshed = asyncio.run(run())
+    assert refreshed == 1 and calls == ["a"]  # 예산 1회, 점수 높은 관측소부터
+    assert poller.counters["deferred"] == 1 and poller.counters["refreshes"] == 1
+    print("✅ 인기 관측소만 예산 안에서 갱신")
+
+
+if __name__ == "__main__":
+    test_next_publish_follows_cadence_boundary()
+    test_served_from_memory_until_next_publish()
+    test_late_publication_is_retried_soon()
+    test_poll_refreshes_hot_stations_within_budget()
+    print("\n🎉 인기 관측소 갱신 테스트 완료!")
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+stdio MCP 서버 동시 요청 처리 테스트 (업스트림 호출 없음)
+"""
+import asyncio
+import json
+
+from mcp_server import StdioDispatcher
+
+
+class SlowClient:
+    """get_waterlevel_data만 느린 가짜 클라이언트"""
+
+    async def get_waterlevel_data(self, obs_code, time_type="1H", hours=None, aggregate=None,
+                                  downsample=None, rate_of_change=False):
+        await asyncio.sleep(0.2)
+        return [{"obs_code": obs_code}]
+
+    async def get_observatories(self, hydro_type="waterlevel", *page_args):
+        return {"observatories": []}
+
+
+class RecordingDispatcher(StdioDispatcher):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.responses = []
+
+    async def write(self, response):
+        self.responses.append(response)
+
+
+def call(request_id, name, **arguments):
+    return json.dumps({"jsonrpc": "2.0", "id": request_id, "method": "tools/call",
+                       "params": {"name": name, "arguments": arguments}})
+
+
+def test_fast_requests_are_not_blocked_by_slow_ones():
+    async def run():
+        dispatcher = RecordingDispatcher(SlowClient())
+        dispatcher.dispatch(call(1, "get_waterlevel_data", obs_code="1018683"))
+        dispatcher.dispatch(json.dumps({"jsonrpc": "2.0", "id": 2, "method": "initialize"}))
+        dispatcher.dispatch(call(3, "get_observatories"))
+        await dispatcher.drain()
+        return [r["id"] for r in dispatcher.responses]
+
+    assert asyncio.run(run()) == [2, 3, 1]
+    print("✅ 느린 요청이 뒤 요청을 막지 않음 (완료 순서대로 응답)")
+
+
+def test_cancelled_request_gets_no_response():
+    async def run():
+        dispatcher = RecordingDispatcher(SlowClient())
+        dispatcher.dispatch(call(1, "get_waterlevel_data", obs_code="1018683"))
+        await asyncio.sleep(0.01)
+        dispatcher.dispatch(json.dumps({"jsonrpc": "2.0", "method": "notifications/cancelled",
+                                        "params": {"requestId": 1}}))
+        await dispatcher.drain()
+        return dispatcher.responses
+
+    assert asyncio.run(run()) == []
+    print("✅ 취소된 요청은 응답하지 않음")
+
+
+def test_concurrency_cap_and_parse_errors():
+    async def run():
+        dispatcher = RecordingDispatcher(SlowClient(), max_concurrency=2)
+        start = asyncio.get_running_loop().time()
+        for i in range(4):
+            dispatcher.dispatch(call(i, "get_waterlevel_data", obs_code=str(i)))
+        dispatcher.dispatch("{not json")
+        await dispatcher.drain()
+        return dispatcher.responses, asyncio.get_running_loop().time() - start
+
+    responses, elapsed = asyncio.run(run())
+    assert responses[0]["error"]["code"] == -32700
+    assert len(responses) == 5
+    assert 0.35 < elapsed < 0.6  # 2개씩 두 번
+    print("✅ 동시 실행 상한 적용 및 파싱 오류 응답")
+
+
+def test_batch_runs_concurrently_and_returns_one_array():
+    async def run():
+        dispatcher = RecordingDispatcher(SlowClient())
+        batch = [json.loads(call(i, "get_waterlevel_data", obs_code=str(i))) for i in range(5)]
+        batch.append({"jsonrpc": "2.0", "method": "notifications/initialized"})
+        batch.append(42)
+        start = asyncio.get_running_loop().time()
+        dispatcher.dispatch(json.dumps(batch))
+        dispatcher.dispatch("[]")
+        await dispatcher.drain()
+        return dispatcher.responses, asyncio.get_running_loop().time() - start
+
+    responses, elapsed = asyncio.run(run())
+    empty, batch = sorted(responses, key=len)
+    assert empty[0]["error"]["code"] == -32600
+    assert [r.get("id") for r in batch] == [0, 1, 2, 3, 4, None]
+    assert batch[-1]["error"]["code"] == -32600
+    assert elapsed < 0.35  # 5개 호출이 동시에 실행
+    print("✅ 배치 요청 동시 처리 및 단일 배열 응답")
+
+
+if __name__ == "__main__":
+    test_fast_requests_are_not_blocked_by_slow_ones()
+    test_cancelled_request_gets_no_response()
+    test_concurrency_cap_and_parse_errors()
+    test_batch_runs_concurrently_and_returns_one_array()
+    print("\n🎉 stdio 동시 처리 테스트 완료!")
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+/mcp 스트리밍 전송 테스트 - SSE/NDJSON 청크별 진행 알림, 완료 응답, Accept 선호도, 도중 오류 (번들 스냅샷 사용, 업스트림 호출 없음)
+"""
+import asyncio
+import json
+
+from fastapi.testclient import TestClient
+
+import http_mcp_server
+import station_snapshot
+from catalog_cache import catalog_cache
+from tool_registry import ToolDispatcher, ToolRegistry
+
+
+CALL = {"jsonrpc": "2.0", "id": 5, "method": "tools/call",
+        "params": {"name": "get_observatories", "arguments": {"basin": "한강"},
+                   "_meta": {"progressToken": "p1"}}}
+
+
+def make_client():
+    catalog_cache.put("waterlevel", station_snapshot.load_stations("waterlevel"))
+    http_mcp_server.hrfco_client.api_key = http_mcp_server.hrfco_client.api_key or "test-key"
+    return TestClient(http_mcp_server.app)
+
+
+def sse_events(text):
+    events = []
+    for block in text.split("\n\n"):
+        lines = [line[len("data: "):] for line in block.split("\n") if line.startswith("data: ")]
+        if lines:
+            # 이벤트마다 data 줄 하나 - 받는 즉시 파싱 가능
+            assert len(lines) == 1
+            events.append(json.loads(lines[0]))
+    return events
+
+
+def test_sse_stream_sends_chunks_early():
+    client = make_client()
+    with client.stream("POST", "/mcp", json=CALL, headers={"Accept": "text/event-stream"}) as response:
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = sse_events("".join(response.iter_text()))
+    *notices, result = events
+    assert len(notices) > 1 and all(n["method"] == "notifications/progress" for n in notices)
+    assert {n["params"]["progressToken"] for n in notices} == {"p1"}
+    progress = [n["params"]["progress"] for n in notices]
+    total = notices[0]["params"]["total"]
+    assert progress == sorted(set(progress)) and progress[-1] == total
+
+    # 행은 진행 알림으로 한 번만 보내고, 완료 응답에는 보낸 양만 담음
+    partial = [json.loads(n["params"]["content"][0]["text"]) for n in notices]
+    stations = [s for chunk in partial for s in chunk["observatories"]]
+    assert len(stations) == total and all(s["wlobscd"].startswith("1") for s in stations)
+    assert len(partial) == -(-total // http_mcp_server.STREAM_CHUNK)
+    summary = json.loads(result["result"]["content"][0]["text"])
+    assert result["id"] == 5 and len(result["result"]["content"]) == 1
+    assert summary == {"streamed": True, "chunks": len(partial), "sent_count": total, "total_count": total}
+    assert "observatories" not in json.dumps(result)
+    print(f"✅ SSE 스트리밍: 관측소 {total}개를 진행 알림 {len(notices)}개로 한 번씩 전송")
+
+
+def test_ndjson_stream_and_batch():
+    client = make_client()
+    # progressToken이 없어도 청크마다 한 줄 (토큰 대신 요청 id)
+    call = dict(CALL, params={"name": "get_observatories", "arguments": {}})
+    response = client.post("/mcp", json=call, headers={"Accept": "application/x-ndjson"})
+    lines = [json.loads(line) for line in response.text.strip().split("\n")]
+    assert len(lines) > 2 and all(line["method"] == "notifications/progress" for line in lines[:-1])
+    assert {line["params"]["progressToken"] for line in lines[:-1]} == {5}
+    count = sum(len(json.loads(line["params"]["content"][0]["text"])["observatories"]) for line in lines[:-1])
+    assert count == len(catalog_cache.peek("waterlevel").stations) == lines[-2]["params"]["progress"]
+    assert json.loads(lines[-1]["result"]["content"][0]["text"])["sent_count"] == count
+
+    batch = [{"jsonrpc": "2.0", "id": 1, "method": "tools/list"},
+             {"jsonrpc": "2.0", "method": "notifications/initialized"},
+             {"jsonrpc": "2.0", "id": 2, "method": "ping"}]
+    response = client.post("/mcp", json=batch, headers={"Accept": "application/x-ndjson"})
+    ids = sorted(json.loads(line)["id"] for line in response.text.strip().split("\n"))
+    assert ids == [1, 2]
+    # Accept가 없으면 기존처럼 한 번에 응답
+    assert client.post("/mcp", json=call).json()["result"]["content"]
+    print(f"✅ NDJSON 스트리밍/배치 응답 ({count}개 관측소, {len(lines)}줄)")
+
+
+def test_standard_accept_gets_budgeted_json():
+    client = make_client()
+    # 표준 MCP 클라이언트 헤더는 JSON을 먼저 적으므로 결과 크기 예산이 적용된 일반 응답
+    call = dict(CALL, params={"name": "get_observatories", "arguments": {}})
+    response = client.post("/mcp", json=call, headers={"Accept": "application/json, text/event-stream"})
+    assert response.headers["content-type"].startswith("application/json")
+    assert "budget" in response.json()["result"]["_meta"]
+    assert http_mcp_server.stream_media_type("text/event-stream, application/json") == "text/event-stream"
+    assert http_mcp_server.stream_media_type("application/json;q=0.5, text/event-stream") == "text/event-stream"
+    assert http_mcp_server.stream_media_type("text/event-stream;q=0.1, */*") is None
+    assert http_mcp_server.stream_media_type("") is None
+    print("✅ 스트리밍 형식을 가장 선호할 때만 스트리밍")
+
+
+def test_error_mid_stream():
+    registry = ToolRegistry()
+    registry.register("rows", "행 나눠 보내기", {"fail": {"type": "boolean"}})
+    tools = ToolDispatcher(registry)
+
+    @tools.tool("rows")
+    async def rows(context, args):
+        return [1, 2, 3]
+
+    @tools.stream("rows")
+    async def rows_stream(context, args):
+        yield [1, 2], 2, 3
+        if args.get("fail"):
+            raise RuntimeError("업스트림 끊김")
+        yield [3], 3, 3
+
+    async def collect(arguments):
+        call = {"name": "rows", "arguments": arguments, "_meta": {"progressToken": 7}}
+        messages = [json.loads(m) if isinstance(m, str) else m async for m in tools.iter_call(None, "r", call)]
+        *notices, result = messages
+        assert [n["params"]["progress"] for n in notices] == [2, 3][:len(notices)]
+        rows = [json.loads(n["params"]["content"][0]["text"]) for n in notices]
+        return rows, result
+
+    rows, ok = asyncio.run(collect({}))
+    assert rows == [[1, 2], [3]] and "isError" not in ok["result"]
+    assert json.loads(ok["result"]["content"][0]["text"])["sent_count"] == 3
+    rows, failed = asyncio.run(collect({"fail": True}))
+    assert rows == [[1, 2]] and failed["result"]["isError"] is True
+    assert json.loads(failed["result"]["content"][0]["text"])["sent_count"] == 2
+    assert "업스트림 끊김" in failed["result"]["content"][-1]["text"]
+    print("✅ 스트리밍 도중 오류는 isError 항목으로 종료")
+
+
+if __name__ == "__main__":
+    test_sse_stream_sends_chunks_early()
+    test_ndjson_stream_and_batch()
+    test_standard_accept_gets_budgeted_json()
+    test_error_mid_stream()
+    print("\n🎉 스트리밍 전송 테스트 완료!")
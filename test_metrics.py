@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+지표 테스트 - Prometheus 텍스트 형식, 업스트림/도구/캐시 계측, /metrics · stdio 덤프 (네트워크 호출 없음)
+"""
+import asyncio
+import json
+import os
+
+import httpx
+from fastapi.testclient import TestClient
+
+import station_snapshot
+import upstream
+from metrics import (CACHE_REQUESTS, SINGLE_FLIGHT, TOOL_ERRORS, TOOL_LATENCY, UPSTREAM_ERRORS,
+                     UPSTREAM_LATENCY, MetricsRegistry, endpoint_label)
+
+
+def test_text_format():
+    registry = MetricsRegistry()
+    latency = registry.histogram("demo_seconds", "데모 지연", ("tool",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 3.0):
+        latency.observe(value, tool="a")
+    registry.counter("demo_total", "데모 카운터", ("error",)).inc(error='say "hi"')
+    registry.gauge("demo_in_flight", "데모 게이지").set(2)
+    text = registry.render()
+    assert 'demo_seconds_bucket{tool="a",le="0.1"} 1' in text
+    assert 'demo_seconds_bucket{tool="a",le="1"} 3' in text
+    assert 'demo_seconds_bucket{tool="a",le="+Inf"} 4' in text
+    assert 'demo_seconds_count{tool="a"} 4' in text and 'demo_seconds_sum{tool="a"} 4.05' in text
+    assert 'demo_total{error="say \\"hi\\""} 1' in text and "demo_in_flight 2" in text
+    assert "# TYPE demo_seconds histogram" in text and registry.snapshot()["demo_seconds"]["a"]["count"] == 4
+    assert registry.histogram("demo_seconds", "다시 요청", ("tool",)) is latency
+
+    label = endpoint_label("http://api.hrfco.go.kr/0A1B2C3D-4E5F-6789-ABCD-EF0123456789/waterlevel/list/1H/1018683.json")
+    assert label == "api.hrfco.go.kr/{key}/waterlevel/list/1H/{code}"
+    # 분 단위 조회 구간 스탬프도 가려서 라벨 종류가 시간에 따라 늘지 않음
+    ranged = [endpoint_label(f"http://api.hrfco.go.kr/k/waterlevel/list/1H/1018683/2026101710{m:02d}.json")
+              for m in range(3)]
+    assert set(ranged) == {"api.hrfco.go.kr/{key}/waterlevel/list/1H/{code}/{code}"}
+    # 키 모양과 상관없이 HRFCO 호스트의 첫 경로 조각, 다른 호스트라도 설정된 키 값과 같은 조각은 가림
+    assert endpoint_label("http://api.hrfco.go.kr/k/waterlevel/1018683") == "api.hrfco.go.kr/{key}/waterlevel/{code}"
+    previous = os.environ.get("HRFCO_API_KEY")
+    os.environ["HRFCO_API_KEY"] = "my_key+1"
+    try:
+        assert endpoint_label("http://localhost:8080/proxy/my_key%2B1/waterlevel") == "localhost:8080/proxy/{key}/waterlevel"
+        assert endpoint_label("http://localhost:8080/proxy/other/waterlevel") == "localhost:8080/proxy/other/waterlevel"
+    finally:
+        if previous is None:
+            os.environ.pop("HRFCO_API_KEY")
+        else:
+            os.environ["HRFCO_API_KEY"] = previous
+    print("✅ Prometheus 텍스트 형식/엔드포인트 라벨")
+
+
+def test_upstream_instrumented():
+    def respond(request):
+        if request.url.path.endswith("-down"):
+            raise httpx.ConnectError("refused", request=request)
+        return httpx.Response(500 if request.url.path.endswith("-fail") else 200, json={"ok": True})
+
+    async def run():
+        client = httpx.AsyncClient(transport=httpx.MockTransport(respond))
+        original = upstream.get_client
+        upstream.get_client = lambda: client
+        try:
+            await asyncio.gather(*(upstream.fetch_json("http://test.local/metrics-ok") for _ in range(3)))
+            for path in ("fail", "down"):
+                try:
+                    await upstream.fetch_json(f"http://test.local/metrics-{path}")
+                except httpx.HTTPError:
+                    pass
+        finally:
+            upstream.get_client = original
+            await client.aclose()
+
+    joins = SINGLE_FLIGHT.value(result="join")
+    asyncio.run(run())
+    assert UPSTREAM_LATENCY.count(endpoint="test.local/metrics-ok") == 1
+    assert SINGLE_FLIGHT.value(result="join") - joins == 2
+    assert UPSTREAM_ERRORS.value(endpoint="test.local/metrics-fail", error="http_5xx") == 1
+    assert UPSTREAM_ERRORS.value(endpoint="test.local/metrics-down", error="ConnectError") == 1
+    print("✅ 업스트림 지연/오류 종류/요청 병합 계측")
+
+
+def test_tools_and_endpoints():
+    import http_mcp_server
+    import mcp_server
+    from catalog_cache import catalog_cache
+
+    class Client:
+        async def get_waterlevel_data(self, obs_code, *rest):
+            raise RuntimeError("업스트림 끊김")
+
+    calls = TOOL_LATENCY.count(tool="get_waterlevel_data")
+    request = {"jsonrpc": "2.0", "id": 1, "method": "tools/call",
+               "params": {"name": "get_waterlevel_data", "arguments": {"obs_code": "1018683"}}}
+    asyncio.run(mcp_server.handle_request(Client(), request))
+    assert TOOL_LATENCY.count(tool="get_waterlevel_data") == calls + 1
+    assert TOOL_ERRORS.value(tool="get_waterlevel_data", error="RuntimeError") >= 1
+
+    hits = CACHE_REQUESTS.value(cache="catalog", result="hit")
+    catalog_cache.put("waterlevel", station_snapshot.load_stations("waterlevel"))
+    asyncio.run(catalog_cache.get_entry("waterlevel"))
+    assert CACHE_REQUESTS.value(cache="catalog", result="hit") == hits + 1
+
+    client = TestClient(http_mcp_server.app)
+    client.get("/health")
+    client.get("/no-such-path/1018683")
+    response = client.get("/metrics")
+    assert response.status_code == 200 and response.headers["content-type"].startswith("text/plain")
+    text = response.text
+    for name in ("mcp_tool_duration_seconds_bucket", "hrfco_cache_requests_total", "http_requests_in_flight",
+                 "http_request_duration_seconds_count{method=\"GET\",path=\"/health\"}",
+                 "http_request_duration_seconds_count{method=\"GET\",path=\"other\"}"):
+        assert name in text, name
+
+    dump = asyncio.run(mcp_server.handle_request(None, {"jsonrpc": "2.0", "id": 9, "method": "metrics"}))
+    assert "mcp_tool_errors_total" in dump["result"]["text"]
+    assert json.dumps(dump["result"]["summary"])
+    print("✅ 도구/캐시 계측, /metrics · stdio metrics 덤프")
+
+
+if __name__ == "__main__":
+    test_text_format()
+    test_upstream_instrumented()
+    test_tools_and_endpoints()
+    print("\n🎉 지표 테스트 완료!")
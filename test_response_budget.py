@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+도구 결과 크기 예산 테스트 - columnar → 솎아내기 → 요약 + 커서 (번들 스냅샷 사용, 업스트림 호출 없음)
+"""
+import asyncio
+import json
+
+import station_snapshot
+from response_budget import Budget, fit, measure
+from tool_registry import INVALID_PARAMS, ToolDispatcher, ToolRegistry
+
+
+SERIES = {
+    "obs_code": "1018683",
+    "ymdhm": [f"2025010{1 + i // 1440}{(i // 60) % 24:02d}{i % 60:02d}" for i in range(3000)],
+    "values": {"wl": [round(1 + i * 0.001, 3) for i in range(3000)], "fw": [i * 0.5 for i in range(3000)]},
+}
+
+
+def steps(report):
+    return [step["step"] for step in report["steps"]]
+
+
+def test_columnar_then_downsample():
+    rows = {"content": [{"ymdhm": f"20250101{i:04d}", "wl": "1.23"} for i in range(200)]}
+    compact = measure(json.dumps(rows, separators=(",", ":")))["bytes"]
+    text, report = fit(rows, "compact", Budget(max_bytes=compact - 1, max_tokens=None))
+    assert steps(report) == ["encode", "columnar"] and report["fits"]
+    assert json.loads(text)["content"]["count"] == 200
+
+    text, report = fit(SERIES, "compact", Budget(max_bytes=20000, max_tokens=None))
+    body = json.loads(text)
+    assert steps(report) == ["encode", "columnar", "downsample"] and report["fits"]
+    assert len(text.encode("utf-8")) <= 20000 == report["limit"]["max_bytes"]
+    # 같은 길이의 배열은 같은 위치를 남김 (시각/값 정렬 유지, 처음/마지막 포함)
+    kept = body["ymdhm"]
+    assert len(kept) == len(body["values"]["wl"]) == len(body["values"]["fw"]) < 3000
+    assert kept[0] == SERIES["ymdhm"][0] and kept[-1] == SERIES["ymdhm"][-1]
+    index = SERIES["ymdhm"].index(kept[1])
+    assert body["values"]["wl"][1] == SERIES["values"]["wl"][index]
+    assert fit(SERIES, "compact", Budget(max_bytes=None, max_tokens=None))[1] is None
+    print(f"✅ columnar/솎아내기: 3000 → {len(kept)}행, 단계별 크기 {[s['bytes'] for s in report['steps']]}")
+
+
+def test_summary_cursor_walk():
+    stations = station_snapshot.load_stations("waterlevel")
+    result = {"hydro_type": "waterlevel", "content": stations}
+    budget = Budget(max_bytes=None, max_tokens=8000, downsample=False)
+    collected, cursor, pages = [], None, 0
+    while True:
+        text, report = fit(result, "compact", budget, cursor)
+        body = json.loads(text)
+        assert report["fits"] and measure(text)["tokens"] <= 8000
+        assert "downsample" not in steps(report)
+        page = body["content"]
+        if isinstance(page, dict):
+            page = [dict(zip(page["columns"], values)) for values in zip(*page["columns"].values())]
+        collected.extend(page)
+        pages += 1
+        cursor = report.get("next_cursor")
+        if cursor is None:
+            break
+        summary = body["_summary"]
+        assert summary["path"] == "content" and summary["next_cursor"] == cursor
+    assert pages > 1 and len(collected) == len(stations)
+    assert [s["wlobscd"] for s in collected] == [s["wlobscd"] for s in stations]
+
+    numbers = fit({"values": list(range(5000))}, "compact", Budget(max_bytes=2000, max_tokens=None,
+                                                                     downsample=False))
+    summary = json.loads(numbers[0])["_summary"]
+    assert (summary["min"], summary["max"], summary["count"]) == (0, 4999, 5000)
+    print(f"✅ 요약 + 커서: 관측소 {len(stations)}개를 {pages}번에 나눠 받음")
+
+
+def test_cursor_keeps_parallel_arrays_aligned():
+    budget = Budget(max_bytes=20000, max_tokens=None)
+    # 첫 페이지는 솎아내기 없이 요약 + 커서, 이후 커서 호출은 기본 예산(솎아내기 생략)으로 이어 받음
+    text, report = fit(SERIES, "compact", Budget(max_bytes=20000, max_tokens=None, downsample=False))
+    walked, cursor = 0, None
+    while True:
+        body = json.loads(text)
+        assert report["fits"] and len(text.encode("utf-8")) <= 20000
+        times, wl, fw = body["ymdhm"], body["values"]["wl"], body["values"]["fw"]
+        assert len(times) == len(wl) == len(fw) > 0
+        index = SERIES["ymdhm"].index(times[0])
+        assert index == walked and wl[0] == SERIES["values"]["wl"][index]
+        assert fw[-1] == SERIES["values"]["fw"][index + len(fw) - 1]
+        walked += len(times)
+        cursor = report.get("next_cursor")
+        if cursor is None:
+            break
+        assert body["_summary"]["aligned"]["values.wl"]["count"] == len(SERIES["ymdhm"]) - index
+        text, report = fit(SERIES, "compact", budget, cursor)
+    assert walked == len(SERIES["ymdhm"])
+    print("✅ 커서로 이어 받아도 시각/값 배열 길이와 위치가 맞음")
+
+
+def test_dispatcher_reports_budget():
+    registry = ToolRegistry()
+    registry.register("rows", "행 목록", {"n": {"type": "integer"}})
+    tools = ToolDispatcher(registry)
+
+    @tools.tool("rows", budget=Budget(max_bytes=3000, max_tokens=None, downsample=False))
+    async def rows(context, args):
+        return {"rows": [{"i": i, "name": f"행{i}"} for i in range(args.get("n", 10))]}
+
+    async def call(arguments):
+        return await tools.call(None, 1, {"name": "rows", "arguments": arguments})
+
+    small = asyncio.run(call({"n": 3}))
+    assert "_meta" not in small["result"]
+    large = asyncio.run(call({"n": 1000}))
+    report = large["result"]["_meta"]["budget"]
+    assert steps(report) == ["encode", "columnar", "summary"] and report["next_cursor"]
+    following = asyncio.run(call({"n": 1000, "result_cursor": report["next_cursor"]}))
+    assert following["result"]["_meta"]["budget"]["cursor"]["offset"] == report["steps"][-1]["rows"]
+    assert asyncio.run(call({"result_cursor": "!!"}))["error"]["code"] == INVALID_PARAMS
+    assert "result_cursor" in tools.tools_list().data["tools"][0]["inputSchema"]["properties"]
+    print("✅ 디스패처가 예산 보고서를 _meta.budget에 기록")
+
+
+if __name__ == "__main__":
+    test_columnar_then_downsample()
+    test_summary_cursor_walk()
+    test_cursor_keeps_parallel_arrays_aligned()
+    test_dispatcher_reports_budget()
+    print("\n🎉 결과 크기 예산 테스트 완료!")
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+도구 결과 직렬화 형식 테스트 (업스트림 호출 없음)
+"""
+import asyncio
+import json
+
+import response_encoding
+from response_encoding import columnar, dumps, pop_encoding, with_encoding
+
+
+STATIONS = [{"wlobscd": f"10{i:05d}", "obsnm": f"관측소{i}", "addr": "서울특별시", "lat": None}
+            for i in range(50)]
+
+
+def test_modes_round_trip():
+    compact = dumps(STATIONS, "compact")
+    pretty = dumps(STATIONS, "pretty")
+    packed = dumps(STATIONS, "columnar")
+    assert json.loads(compact) == json.loads(pretty) == STATIONS
+    assert "관측소1" in compact and "\n" not in compact and "\n" in pretty
+    decoded = json.loads(packed)
+    assert decoded["count"] == 50 and decoded["columns"]["obsnm"][3] == "관측소3"
+    assert len(packed) < len(compact) < len(pretty)
+    print(f"✅ 형식별 크기: pretty {len(pretty):,} / compact {len(compact):,} / columnar {len(packed):,}")
+
+
+def test_columnar_nested_and_ragged():
+    value = {"summary": {"ok": 2}, "rows": [{"a": 1}, {"a": 2, "b": [{"x": 1}, {"x": 2}]}], "one": [{"a": 1}]}
+    assert columnar(value) == {
+        "summary": {"ok": 2},
+        "rows": {"count": 2, "columns": {"a": [1, 2], "b": [None, {"count": 2, "columns": {"x": [1, 2]}}]}},
+        "one": [{"a": 1}],
+    }
+    print("✅ 중첩/누락 필드 열 변환")
+
+
+def test_arguments_and_schema():
+    args, mode = pop_encoding({"obs_code": "1", "encoding": "COLUMNAR"})
+    assert args == {"obs_code": "1"} and mode == "columnar"
+    assert pop_encoding(None)[1] == response_encoding.RESPONSE_ENCODING
+    assert pop_encoding({"encoding": "yaml"})[1] == response_encoding.RESPONSE_ENCODING
+    tools = [{"name": "t", "inputSchema": {"type": "object", "properties": {"q": {"type": "string"}}}}]
+    listed = with_encoding(tools)
+    assert set(listed[0]["inputSchema"]["properties"]) == {"q", "encoding"}
+    assert "encoding" not in tools[0]["inputSchema"]["properties"]
+    print("✅ 도구 인자/스키마 encoding")
+
+
+def test_tool_call_encoding():
+    from mcp_server import handle_request
+
+    class Client:
+        async def get_observatories(self, hydro_type="waterlevel", *page_args):
+            return {"observatories": STATIONS}
+
+    async def call(arguments):
+        request = {"jsonrpc": "2.0", "id": 1, "method": "tools/call",
+                   "params": {"name": "get_observatories", "arguments": arguments}}
+        response = await handle_request(Client(), request)
+        return response["result"]["content"][0]["text"]
+
+    default = asyncio.run(call({}))
+    packed = asyncio.run(call({"encoding": "columnar"}))
+    assert json.loads(default)["observatories"] == STATIONS
+    assert json.loads(packed)["observatories"]["count"] == 50
+    print("✅ 도구 호출별 형식 선택")
+
+
+if __name__ == "__main__":
+    test_modes_round_trip()
+    test_columnar_nested_and_ragged()
+    test_arguments_and_schema()
+    test_tool_call_encoding()
+    print("\n🎉 결과 직렬화 테스트 완료!")
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+시계열 집계/다운샘플 테스트 (업스트림 호출 없음)
+"""
+import asyncio
+import json
+
+import numpy as np
+
+import series_ops
+from timeseries_store import SeriesService, SeriesStore, series_payload
+from test_timeseries_store import make_fetcher
+
+
+def hourly(count, start=202407010000):
+    minutes = series_ops.to_minutes(np.array([start])) + np.arange(count) * 60
+    return series_ops.from_minutes(minutes)
+
+
+def test_timestamp_round_trip():
+    timestamps = np.array([202402282350, 202402290000, 202412312359, 202501010000])
+    minutes = series_ops.to_minutes(timestamps)
+    assert np.diff(minutes).tolist() == [10, 1440 * 306 + 1439, 1]
+    assert series_ops.from_minutes(minutes).tolist() == timestamps.tolist()
+    assert series_ops.parse_window("3h") == 180 and series_ops.parse_window("1D") == 1440
+    try:
+        series_ops.parse_window("0H")
+        raise AssertionError("0시간 구간은 거부해야 함")
+    except ValueError:
+        pass
+    print("✅ 시각 변환/구간 해석")
+
+
+def test_window_aggregate():
+    timestamps = hourly(48)
+    values = np.column_stack([np.arange(48, dtype=float), np.full(48, np.nan)])
+    values[5, 0] = np.nan
+    body = series_ops.transform(timestamps, values, ("wl", "fw"), aggregate_window="6H")
+    assert body["ymdhm"][:2] == ["202407010000", "202407010600"] and len(body["ymdhm"]) == 8
+    wl = body["values"]["wl"]
+    assert wl["min"][0] == 0 and wl["max"][0] == 4 and wl["mean"][0] == 2.0
+    assert wl["mean"][1] == 8.5 and body["counts"][0] == 5
+    assert body["values"]["fw"]["mean"] == [None] * 8
+    print("✅ 구간별 min/max/mean")
+
+
+def test_lttb_keeps_peak():
+    timestamps = hourly(24 * 30)
+    level = 1.0 + 0.01 * np.sin(np.arange(len(timestamps)) / 5)
+    level[400] = 6.5
+    values = np.column_stack([level, level * 10])
+    body = series_ops.transform(timestamps, values, ("wl", "fw"), downsample=50)
+    assert len(body["ymdhm"]) == 50 and body["downsampled_from"] == len(timestamps)
+    assert body["ymdhm"][0] == str(timestamps[0]) and body["ymdhm"][-1] == str(timestamps[-1])
+    assert max(body["values"]["wl"]) == 6.5 and str(timestamps[400]) in body["ymdhm"]
+    assert body["values"]["fw"][body["values"]["wl"].index(6.5)] == 65.0
+    raw = json.dumps(series_payload(("waterlevel", "1", "1H"), ("wl", "fw"), timestamps, values))
+    small = json.dumps(series_payload(("waterlevel", "1", "1H"), ("wl", "fw"), timestamps, values, downsample=50))
+    assert len(small) * 10 < len(raw)
+    print(f"✅ LTTB 다운샘플 첨두 보존 ({len(raw):,} → {len(small):,} bytes)")
+
+
+def test_rate_of_change():
+    timestamps = np.array([202407010000, 202407010100, 202407010300])
+    values = np.array([[1.0], [1.5], [2.5]])
+    body = series_ops.transform(timestamps, values, ("wl",), include_rate=True)
+    assert body["rate_per_hour"]["wl"] == [None, 0.5, 0.5]
+    print("✅ 시간당 변화율")
+
+
+def test_service_options():
+    fetcher, _ = make_fetcher()
+    service = SeriesService(SeriesStore(":memory:"), fetcher, recheck_interval=0)
+    result = asyncio.run(service.get_series("1018683", hours=48, aggregate="1D", rate_of_change=True))
+    assert result["window"] == "1D" and result["points"] >= 48
+    assert set(result["values"]["wl"]) == {"min", "max", "mean"}
+    assert len(result["rate_per_hour"]["wl"]) == len(result["ymdhm"])
+    print("✅ 시계열 서비스 집계 옵션")
+
+
+def test_invalid_options_are_rejected():
+    from tool_registry import compile_schema, mcp_tools
+
+    timestamps = hourly(10)
+    values = np.column_stack([np.arange(10.0)])
+    for n in (0, 1, 2):
+        try:
+            series_ops.transform(timestamps, values, ("wl",), downsample=n)
+            assert False, n
+        except ValueError:
+            pass
+    fetcher, calls = make_fetcher()
+    service = SeriesService(SeriesStore(":memory:"), fetcher, recheck_interval=0)
+    for hours in (0, -6):
+        try:
+            asyncio.run(service.get_series("1018683", hours=hours))
+            assert False, hours
+        except ValueError:
+            pass
+    assert calls == []
+    # 공개 스키마도 같은 범위를 검사
+    validate = compile_schema(mcp_tools.get("get_waterlevel_data").schema())
+    assert "3 이상" in validate({"obs_code": "1", "downsample": 2})
+    assert "0보다 커야" in validate({"obs_code": "1", "hours": 0})
+    assert validate({"obs_code": "1", "hours": 0.5, "downsample": 3}) is None
+    print("✅ downsample 3 미만, hours 0 이하는 거부")
+
+
+if __name__ == "__main__":
+    test_timestamp_round_trip()
+    test_window_aggregate()
+    test_lttb_keeps_peak()
+    test_rate_of_change()
+    test_service_options()
+    test_invalid_options_are_rejected()
+    print("\n🎉 시계열 집계 테스트 완료!")
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+관측소 격자 공간 색인 테스트 (업스트림 호출 없음)
+"""
+import asyncio
+import random
+
+import numpy as np
+
+from catalog_cache import CatalogCache
+from smart_water_search import SmartWaterSearch
+from spatial_index import SpatialIndex
+
+
+def to_dms(value):
+    degrees = int(value)
+    minutes = int((value - degrees) * 60)
+    seconds = round(((value - degrees) * 60 - minutes) * 60)
+    return f"{degrees}-{minutes:02d}-{seconds:02d}"
+
+
+def random_stations(count, seed=3):
+    rng = random.Random(seed)
+    stations = []
+    for i in range(count):
+        lat, lon = rng.uniform(33.2, 38.5), rng.uniform(125.0, 129.5)
+        stations.append({"wlobscd": str(1000000 + i), "obsnm": f"관측소{i}", "addr": "",
+                         "lat": to_dms(lat), "lon": to_dms(lon)})
+    stations.append({"wlobscd": "9999999", "obsnm": "좌표없음", "addr": "", "lat": "", "lon": ""})
+    return stations
+
+
+def test_queries_match_full_scan():
+    index = SpatialIndex(random_stations(2000))
+    rng = random.Random(11)
+    for _ in range(50):
+        lat, lon = rng.uniform(33.0, 38.7), rng.uniform(124.8, 129.8)
+        expected = index.coords.nearest(lat, lon, 7)
+        assert [i for i, _ in index.nearest(lat, lon, 7)] == [i for i, _ in expected]
+
+        radius = rng.uniform(5, 60)
+        distances = index.coords.distances(lat, lon)
+        inside = set(np.flatnonzero(distances <= radius).tolist())
+        within = index.within(lat, lon, radius)
+        assert {i for i, _ in within} == inside
+        assert all(a[1] <= b[1] for a, b in zip(within, within[1:]))
+    print("✅ 반경/k-최근접 결과가 전체 탐색과 동일")
+
+
+def test_nearest_uses_grid():
+    stations = random_stations(2000)
+    index = SpatialIndex(stations)
+    cities = [(37.5665, 126.9780), (35.1796, 129.0756), (36.3504, 127.3845), (35.1595, 126.8526)]
+    for lat, lon in cities:
+        before = index.stats["candidates"]
+        result = index.nearest(lat, lon, 5)
+        assert [i for i, _ in result] == [i for i, _ in index.coords.nearest(lat, lon, 5)]
+        # 전체(2000개)가 아니라 주변 칸의 관측소만 거리 계산
+        assert index.stats["candidates"] - before < 200
+    assert index.stats["grid"] == len(cities) and index.stats["fallback"] == 0
+    print(f"✅ 도시 {len(cities)}곳 k-최근접이 격자 경로 사용 (후보 {index.stats['candidates']}개)")
+
+
+def test_incremental_rebuild_on_catalog_refresh():
+    stations = random_stations(200)
+    refreshed = [dict(s) for s in stations]
+    refreshed[0]["lat"], refreshed[0]["lon"] = "37-31-02", "126-57-29"
+    results = [stations, refreshed]
+
+    async def loader(hydro_type):
+        return results.pop(0)
+
+    cache = CatalogCache(loader=loader, ttl={"waterlevel": 0})
+    cache.register_builder("spatial_index", SpatialIndex, incremental=True)
+
+    async def run():
+        first = await cache.get_entry("waterlevel")
+        await cache.get_entry("waterlevel")
+        await asyncio.sleep(0.01)
+        return first, cache.peek("waterlevel")
+
+    first, second = asyncio.run(run())
+    old_index = first.derived("spatial_index", SpatialIndex)
+    new_index = second.derived("spatial_index", SpatialIndex)
+    assert new_index is not old_index
+    assert np.isclose(new_index.coords.lat[0], 37 + 31 / 60 + 2 / 3600)
+    assert np.array_equal(new_index.coords.lat[1:], old_index.coords.lat[1:], equal_nan=True)
+    print("✅ 카탈로그 갱신 시 공간 색인 재생성")
+
+
+def test_recommend_reports_distances():
+    stations = random_stations(300)
+    stations.append({"wlobscd": "1018683", "obsnm": "서울시(한강대교)", "addr": "서울특별시 용산구",
+                     "lat": "37-31-02", "lon": "126-57-29"})
+    search = SmartWaterSearch()
+    search.catalog = CatalogCache(loader=lambda hydro_type: asyncio.sleep(0, stations))
+    search.catalog.register_builder("spatial_index", SpatialIndex, incremental=True)
+
+    result = asyncio.run(search.recommend_nearby_stations("한강대교", radius=30, limit=3))
+    assert result["center"]["source"] == "서울시(한강대교)"
+    assert result["recommendations"][0]["code"] == "1018683"
+    assert result["recommendations"][0]["distance_km"] == 0
+    distances = [r["distance_km"] for r in result["recommendations"]]
+    assert distances == sorted(distances) and all(d <= 30 for d in distances)
+
+    by_coords = asyncio.run(search.recommend_nearby_stations("37.5172,126.9581", radius=0, limit=1))
+    assert by_coords["recommendations"][0]["code"] == "1018683"
+    print("✅ 주변 관측소 추천에 거리 포함")
+
+
+if __name__ == "__main__":
+    test_queries_match_full_scan()
+    test_nearest_uses_grid()
+    test_incremental_rebuild_on_catalog_refresh()
+    test_recommend_reports_distances()
+    print("\n🎉 공간 색인 테스트 완료!")
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+관측소 n-gram 색인 검색 테스트 (업스트림 호출 없음)
+"""
+from smart_water_search import MATCH_TIER, SmartWaterSearch
+from station_index import StationIndex
+
+STATIONS = [
+    {"wlobscd": "1018683", "obsnm": "서울시(한강대교)", "addr": "서울특별시 용산구"},
+    {"wlobscd": "1018680", "obsnm": "서울시(잠수교)", "addr": "서울특별시 서초구"},
+    {"wlobscd": "1007601", "obsnm": "여주시(남한강교)", "addr": "경기도 여주시"},
+    {"wlobscd": "2022510", "obsnm": "부산시(대동낙동강교)", "addr": "부산광역시 강서구"},
+    {"wlobscd": "3008670", "obsnm": "청주시(대청댐)", "addr": "충청북도 청주시"},
+]
+
+
+def brute_force(search, query_info, limit):
+    """색인 없이 전체 관측소를 점수화하던 기존 방식"""
+    scored = [(s, search.calculate_similarity(s, query_info)) for s in STATIONS]
+    scored = [item for item in scored if item[1] > 0.1]
+    scored.sort(key=lambda x: x[1], reverse=True)
+    return scored[:limit]
+
+
+def test_lookup_finds_substring_matches():
+    index = StationIndex(STATIONS)
+    assert index.lookup("한강") == {0, 2}
+    assert index.lookup("서울특별시") == {0, 1}
+    assert index.lookup("영산강") == set()
+    print("✅ 부분 문자열 색인 조회")
+
+
+def test_ranking_matches_full_scan():
+    search = SmartWaterSearch()
+    index = StationIndex(STATIONS)
+    for query in ["한강", "서울 수위", "부산 낙동강", "잠수교", "교", "강"]:
+        query_info = search.normalize_query(query)
+        expected = brute_force(search, query_info, 3)
+        actual = search.rank_stations(index, query_info, 3)
+        assert [(s["wlobscd"], round(v, 6)) for s, v in actual] == \
+               [(s["wlobscd"], round(v, 6)) for s, v in expected], query
+    print("✅ 색인 검색 결과가 전체 탐색과 동일")
+
+
+def test_typo_and_chosung_queries():
+    search = SmartWaterSearch()
+    index = StationIndex(STATIONS)
+    for query in ["한감대교", "ㅎㄱㄷㄱ"]:
+        ranked = search.rank_stations(index, search.normalize_query(query), 1)
+        assert ranked and ranked[0][0]["wlobscd"] == "1018683", query
+    print("✅ 자모 오타/초성 질의 검색")
+
+
+def test_exact_match_ranks_above_fuzzy_names():
+    search = SmartWaterSearch()
+    stations = [
+        {"wlobscd": "1", "obsnm": "강창1", "addr": ""},
+        {"wlobscd": "2", "obsnm": "강창2", "addr": ""},
+        {"wlobscd": "3", "obsnm": "평창군(평창교)", "addr": "강원특별자치도 평창군"},
+        {"wlobscd": "4", "obsnm": "서울시(한강대교)", "addr": "서울특별시 용산구"},
+    ]
+    index = StationIndex(stations)
+    ranked = search.rank_stations(index, search.normalize_query("평창"), 3)
+    assert [s["wlobscd"] for s, _ in ranked][0] == "3"
+    # 힌트(서울, 한강) 점수가 더 많이 붙은 편집거리 후보도 포함 일치보다 앞서지 않음
+    stations.append({"wlobscd": "5", "obsnm": "광진교", "addr": "서울한강공원"})
+    index = StationIndex(stations)
+    ranked = search.rank_stations(index, search.normalize_query("서울 한강"), 2)
+    assert [s["wlobscd"] for s, _ in ranked][0] == "5"
+    print("✅ 질의를 그대로 포함한 관측소가 짧은 오타 후보보다 앞섬")
+
+
+def test_one_jamo_typo_beats_worse_fuzzy_matches():
+    search = SmartWaterSearch()
+    stations = [
+        {"wlobscd": "1", "obsnm": "팔당대교", "addr": "경기도 남양주시"},
+        {"wlobscd": "2", "obsnm": "남한강", "addr": "강원도 원주시"},
+        {"wlobscd": "3", "obsnm": "여주시(남한강교)", "addr": "경기도 여주시"},
+        {"wlobscd": "4", "obsnm": "서울시(한강대교)", "addr": "서울특별시 용산구"},
+    ]
+    index = StationIndex(stations)
+    # 자모 하나 오타(ㄴ→ㅁ)가 세 번 고쳐야 하는 짧은 이름보다 앞섬
+    ranked = search.rank_stations(index, search.normalize_query("함강대교"), 3)
+    codes = [s["wlobscd"] for s, _ in ranked]
+    assert codes[0] == "4" and codes.index("4") < codes.index("1")
+    # 힌트(한강)만 맞는 관측소는 상한에 걸려 자모 하나 오타와 같은 점수로 묶이지 않고 그 아래에 옴
+    ranked = search.rank_stations(index, search.normalize_query("한강대꾜"), 3)
+    (first, top), *rest = ranked
+    assert first["wlobscd"] == "4" and MATCH_TIER / 2 <= top < MATCH_TIER
+    assert rest and all(score < MATCH_TIER / 2 for _, score in rest)
+    print("✅ 자모 하나 오타가 편집거리가 더 큰 후보보다 앞섬")
+
+
+def test_short_queries_use_character_index():
+    search = SmartWaterSearch()
+    stations = STATIONS + [
+        {"wlobscd": "1", "obsnm": "정선1", "addr": "강원특별자치도 정선군"},
+        {"wlobscd": "2", "obsnm": "가음", "addr": "경상남도 거창군 가조면"},
+    ]
+    index = StationIndex(stations)
+    for query in ["가", "1", "교", "시"]:
+        expected = {i for i, texts in enumerate(index.texts) if any(query in text for text in texts)}
+        assert index.lookup(query) == expected, query
+    # n-gram도 자모 3-gram도 없는 한 글자 질의도 후보가 비지 않음
+    for query, code in [("가", "2"), ("1", "1")]:
+        ranked = search.rank_stations(index, search.normalize_query(query), 3)
+        assert ranked and ranked[0][0]["wlobscd"] == code, query
+    print("✅ 한 글자 질의는 글자 색인으로 검색")
+
+
+def test_chosung_lookup_uses_postings():
+    index = StationIndex(STATIONS)
+    for query in ["ㅎㄱ", "ㅎㄱㄷㄱ", "ㅅ", "ㄷㅊㄷ", "ㅋㅋ"]:
+        expected = {i for i, forms in enumerate(index.chosung) if any(query in form for form in forms)}
+        assert index.lookup_chosung(query) == expected, query
+    assert index.lookup_chosung("ㅎㄱ") == {0, 2}
+    print("✅ 초성 질의도 n-gram 역색인으로 조회")
+
+
+if __name__ == "__main__":
+    test_lookup_finds_substring_matches()
+    test_ranking_matches_full_scan()
+    test_typo_and_chosung_queries()
+    test_exact_match_ranks_above_fuzzy_names()
+    test_one_jamo_typo_beats_worse_fuzzy_matches()
+    test_short_queries_use_character_index()
+    test_chosung_lookup_uses_postings()
+    print("\n🎉 관측소 색인 테스트 완료!")
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+번들 관측소 스냅샷 테스트 (업스트림 호출 없음)
+"""
+import asyncio
+import json
+import os
+import tempfile
+
+from catalog_cache import CatalogCache
+from station_snapshot import SOURCE_DIR, build_snapshot, read_snapshot
+
+
+def test_snapshot_round_trip_matches_bundled_json():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "stations.snapshot")
+        meta = build_snapshot(SOURCE_DIR, path)
+        loaded_meta, catalogs = read_snapshot(path)
+        size = os.path.getsize(path)
+
+    assert loaded_meta["version"] == meta["version"]
+    with open(os.path.join(SOURCE_DIR, "waterlevel-stations.json"), encoding="utf-8") as f:
+        source = json.load(f)
+    stations = catalogs["waterlevel"]
+    assert len(stations) == len(source) == meta["stations"]["waterlevel"]
+    assert stations[0] == {"wlobscd": source[0]["obs_code"], "obsnm": source[0]["obs_name"],
+                           "addr": source[0]["address"], "agcnm": source[0]["agency"]}
+    assert set(catalogs["dam"][0]) == {"damcd", "obsnm", "addr", "agcnm"}
+    assert size < 100_000
+    print(f"✅ 스냅샷 왕복 변환 ({size:,} bytes)")
+
+
+def test_seeded_catalog_is_served_then_reconciled():
+    calls = []
+
+    async def loader(hydro_type):
+        calls.append(hydro_type)
+        await asyncio.sleep(0.01)
+        return [{"wlobscd": "1018683", "obsnm": "서울시(한강대교)", "lat": "37-31-02", "lon": "126-58-58"}]
+
+    def seed(hydro_type):
+        return [{"wlobscd": "1018683", "obsnm": "서울시(한강대교)"}] if hydro_type == "waterlevel" else None
+
+    cache = CatalogCache(loader=loader, seed=seed)
+
+    async def run():
+        first = await cache.get_entry("waterlevel")
+        source = first.source
+        await asyncio.sleep(0.05)
+        return source, await cache.get_entry("waterlevel")
+
+    source, refreshed = asyncio.run(run())
+    assert source == "snapshot"
+    assert calls == ["waterlevel"]
+    assert refreshed.source == "upstream" and "lat" in refreshed.stations[0]
+    print("✅ 스냅샷으로 즉시 응답 후 백그라운드로 업스트림 반영")
+
+
+if __name__ == "__main__":
+    test_snapshot_round_trip_matches_bundled_json()
+    test_seeded_catalog_is_served_then_reconciled()
+    print("\n🎉 관측소 스냅샷 테스트 완료!")
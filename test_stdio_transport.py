@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+stdio 전송 계층 줄 읽기 테스트 (실제 stdin 없이 StreamReader 사용)
+"""
+import asyncio
+
+from stdio_transport import MessageTooLarge, StdioTransport
+
+
+def make_transport(data: bytes, limit: int) -> StdioTransport:
+    reader = asyncio.StreamReader(limit=limit)
+    reader.feed_data(data)
+    reader.feed_eof()
+    return StdioTransport(reader, None, limit)
+
+
+def test_reads_lines_and_last_line_without_newline():
+    async def run():
+        transport = make_transport(b'{"id": 1}\n{"id": 2}', limit=64)
+        return [await transport.read_line() for _ in range(3)]
+
+    assert asyncio.run(run()) == [b'{"id": 1}\n', b'{"id": 2}', None]
+    print("✅ 줄 단위 읽기 및 EOF 처리")
+
+
+def test_oversized_line_is_discarded():
+    async def run():
+        transport = make_transport(b"x" * 200 + b"\n" + b'{"id": 3}\n', limit=16)
+        results = []
+        try:
+            await transport.read_line()
+        except MessageTooLarge:
+            results.append("too large")
+        results.append(await transport.read_line())
+        return results
+
+    assert asyncio.run(run()) == ["too large", b'{"id": 3}\n']
+    print("✅ 한도 초과 메시지는 버리고 다음 줄부터 계속 읽음")
+
+
+def test_large_message_within_limit():
+    async def run():
+        payload = b'{"data": "' + b"a" * 1_000_000 + b'"}\n'
+        transport = make_transport(payload, limit=2 * 1024 * 1024)
+        return await transport.read_line(), payload
+
+    line, payload = asyncio.run(run())
+    assert line == payload
+    print("✅ 한도 이내의 큰 메시지 읽기")
+
+
+if __name__ == "__main__":
+    test_reads_lines_and_last_line_without_newline()
+    test_oversized_line_is_discarded()
+    test_large_message_within_limit()
+    print("\n🎉 stdio 전송 계층 테스트 완료!")
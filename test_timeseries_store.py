@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+관측 시계열 저장소 테스트 (업스트림 호출 없음)
+"""
+import asyncio
+import os
+import tempfile
+import threading
+from datetime import timedelta
+
+from timeseries_store import SeriesService, SeriesStore, format_ts, parse_ts
+
+
+def make_fetcher():
+    """요청 구간의 매시 정각 수위를 돌려주는 가짜 업스트림 (최신순)"""
+    calls = []
+
+    async def fetcher(hydro_type, time_type, obs_code, start, end):
+        calls.append((start, end))
+        t = parse_ts(start).replace(minute=0)
+        if t < parse_ts(start):
+            t += timedelta(hours=1)
+        records = []
+        while t <= parse_ts(end):
+            records.append({"wlobscd": obs_code, "ymdhm": format_ts(t), "wl": f"{t.hour / 10:.2f}", "fw": " "})
+            t += timedelta(hours=1)
+        return records[::-1]
+
+    return fetcher, calls
+
+
+def test_append_is_deduplicated_and_ordered():
+    store = SeriesStore(":memory:", retention_days=0)
+    key = ("waterlevel", "1018683", "1H")
+    records = [{"ymdhm": "202401010100", "wl": "1.5", "fw": "10"},
+               {"ymdhm": "202401010000", "wl": "1.4", "fw": "-"}]
+    assert store.append(key, records) == 2
+    assert store.append(key, records) == 0
+    timestamps, values = store.window(key)
+    assert timestamps.tolist() == [202401010000, 202401010100]
+    assert values[:, 0].tolist() == [1.4, 1.5]
+    assert store.last_timestamp(key) == 202401010100
+    print("✅ 중복 없는 추가 전용 저장")
+
+
+def test_only_missing_tail_is_fetched():
+    fetcher, calls = make_fetcher()
+    store = SeriesStore(":memory:")
+    service = SeriesService(store, fetcher, recheck_interval=0)
+    key = ("waterlevel", "1018683", "1H")
+
+    async def run():
+        first = await service.get_series("1018683", hours=24)
+        unchanged = await service.get_series("1018683", hours=24)
+        # 최근 3시간이 아직 저장되지 않은 상황
+        with store.conn:
+            store.conn.execute("DELETE FROM points WHERE ts > ?", (int(first["ymdhm"][-4]),))
+        tail = await service.get_series("1018683", hours=24)
+        longer = await service.get_series("1018683", hours=48)
+        return first, unchanged, tail, longer
+
+    first, unchanged, tail, longer = asyncio.run(run())
+    assert first["points"] >= 24 and first["fetched"] == first["points"]
+    assert first["values"]["fw"][0] is None
+    # 새 관측이 없으면 업스트림 호출 없음
+    assert unchanged["fetched"] == 0 and len(calls) == 3
+    # 마지막 저장 시각 다음부터만 요청
+    assert tail["fetched"] == 3 and tail["ymdhm"] == first["ymdhm"]
+    assert parse_ts(calls[1][0]) == parse_ts(first["ymdhm"][-4]) + timedelta(hours=1)
+    # 조회 구간이 넓어지면 앞쪽도 채움
+    assert longer["points"] >= 48
+    print("✅ 누락된 꼬리 구간만 업스트림 조회")
+
+
+def test_wider_window_fetches_only_missing_head():
+    fetcher, calls = make_fetcher()
+    service = SeriesService(SeriesStore(":memory:"), fetcher, recheck_interval=0)
+
+    async def run():
+        first = await service.get_series("1018683", hours=24)
+        longer = await service.get_series("1018683", hours=48)
+        return first, longer
+
+    first, longer = asyncio.run(run())
+    # 48시간 전체가 아니라 저장 구간 바로 앞까지의 머리만 (시각이 넘어가면 새 꼬리도)
+    oldest = parse_ts(first["ymdhm"][0])
+    head = [(start, end) for start, end in calls[1:] if parse_ts(end) < oldest]
+    assert len(head) == 1 and oldest - timedelta(hours=1) < parse_ts(head[0][1]) < oldest
+    assert all(parse_ts(start) > parse_ts(first["ymdhm"][-1]) for start, _ in calls[1:] if (start, _) not in head)
+    # 머리와 기존 구간 사이에 빠진 시각이 없음
+    stamps = [parse_ts(ts) for ts in longer["ymdhm"]]
+    assert len(stamps) >= 48 and all(b - a == timedelta(hours=1) for a, b in zip(stamps, stamps[1:]))
+    assert longer["fetched"] == len(stamps) - first["points"]
+    print("✅ 넓어진 구간은 빠진 머리만 업스트림 조회")
+
+
+def test_plain_waterlevel_call_uses_series_store():
+    import http_mcp_server
+    import http_server
+
+    fetcher, calls = make_fetcher()
+    service = SeriesService(SeriesStore(":memory:"), fetcher, recheck_interval=60)
+    originals = http_server.series_service, http_mcp_server.series_service
+    http_server.series_service = http_mcp_server.series_service = service
+    rest_client = http_server.HRFCOClient()
+    rest_client.api_key = "test"
+    mcp_client = http_mcp_server.HRFCOClient("test")
+
+    async def run():
+        # 옵션 없는 호출도 기본 24시간 시계열을 저장소에서 (두 서버가 같은 저장 구간 재사용)
+        return (await rest_client.get_waterlevel_data("plain-0001"),
+                await mcp_client.get_waterlevel_data("plain-0001"))
+
+    try:
+        rest, mcp = asyncio.run(run())
+    finally:
+        http_server.series_service, http_mcp_server.series_service = originals
+    assert rest["obs_code"] == mcp["obs_code"] == "plain-0001"
+    assert rest["points"] >= 24 and rest["ymdhm"] == mcp["ymdhm"]
+    assert len(calls) == 1
+    print("✅ 옵션 없는 수위 조회도 시계열 저장소 사용")
+
+
+def test_recheck_interval_skips_upstream():
+    fetcher, calls = make_fetcher()
+    service = SeriesService(SeriesStore(":memory:"), fetcher, recheck_interval=60)
+
+    async def run():
+        await service.get_series("1018683", hours=6)
+        await asyncio.gather(*(service.get_series("1018683", hours=6) for _ in range(5)))
+
+    asyncio.run(run())
+    assert len(calls) == 1
+    print("✅ 재확인 간격 안에는 저장소에서 바로 응답")
+
+
+def test_coverage_survives_restart():
+    fetcher, calls = make_fetcher()
+    threads = set()
+
+    class RecordingStore(SeriesStore):
+        def window(self, *args):
+            threads.add(threading.current_thread().name)
+            return super().window(*args)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "series.sqlite3")
+
+        async def run(store):
+            return await SeriesService(store, fetcher, recheck_interval=0).get_series("1018683", hours=24)
+
+        first_store = RecordingStore(path)
+        first = asyncio.run(run(first_store))
+        first_store.close()
+        # 재시작: 새 저장소/서비스 인스턴스가 같은 파일에서 coverage를 읽어 꼬리만 확인
+        second_store = RecordingStore(path)
+        second = asyncio.run(run(second_store))
+        assert second_store.covered_from(("waterlevel", "1018683", "1H")) <= int(first["ymdhm"][0])
+        second_store.close()
+
+    assert second["ymdhm"] == first["ymdhm"] and second["fetched"] == 0
+    assert len(calls) == 1 or parse_ts(calls[1][0]) > parse_ts(first["ymdhm"][-1])
+    # SQLite 작업은 이벤트 루프 스레드가 아닌 저장소 전용 스레드에서 실행
+    assert threads and all(name.startswith("series-store") for name in threads)
+    print("✅ 재시작 후에도 저장된 coverage로 꼬리만 조회")
+
+
+if __name__ == "__main__":
+    test_append_is_deduplicated_and_ordered()
+    test_only_missing_tail_is_fetched()
+    test_wider_window_fetches_only_missing_head()
+    test_plain_waterlevel_call_uses_series_store()
+    test_recheck_interval_skips_upstream()
+    test_coverage_survives_restart()
+    print("\n🎉 시계열 저장소 테스트 완료!")
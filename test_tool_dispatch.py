@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+도구 디스패처 테스트 - 스키마 검사, 시간 제한, 도구별 동시 실행 제한 (업스트림 호출 없음)
+"""
+import asyncio
+import json
+
+from metrics import IGNORED_ARGUMENTS
+from tool_registry import (INVALID_PARAMS, METHOD_NOT_FOUND, TOOL_TIMEOUT_ERROR, ToolDispatcher,
+                           ToolRegistry, compile_schema)
+
+
+def make_dispatcher():
+    registry = ToolRegistry()
+    registry.register("echo", "인자 그대로 반환", {
+        "text": {"type": "string"},
+        "count": {"type": "integer", "minimum": 1, "maximum": 3},
+        "mode": {"type": "string", "enum": ["a", "b"]},
+        "codes": {"type": "array", "items": {"type": "string"}},
+    }, required=["text"])
+    registry.register("slow", "느린 도구", {"delay": {"type": "number"}})
+    registry.register("unbound", "처리 함수 없음", {})
+    tools = ToolDispatcher(registry)
+    state = {"running": 0, "peak": 0}
+
+    @tools.tool("echo")
+    async def echo(context, args):
+        return {"context": context, "args": args}
+
+    @tools.tool("slow", timeout=0.2, max_concurrency=2)
+    async def slow(context, args):
+        state["running"] += 1
+        state["peak"] = max(state["peak"], state["running"])
+        try:
+            await asyncio.sleep(args.get("delay", 0.05))
+        finally:
+            state["running"] -= 1
+        return "done"
+
+    return tools, state
+
+
+def call(tools, name, arguments, request_id=1):
+    return tools.call("ctx", request_id, {"name": name, "arguments": arguments})
+
+
+def test_schema_validation():
+    validate = compile_schema({"type": "object", "properties": {"n": {"type": "integer"}},
+                               "required": ["n"], "additionalProperties": False})
+    assert validate({"n": 1}) is None
+    assert "필수" in validate({}) and "integer" in validate({"n": True}) and "알 수 없는" in validate({"n": 1, "x": 2})
+
+    tools, _ = make_dispatcher()
+
+    async def run():
+        bad = [{}, {"text": 1}, {"text": "a", "count": 5}, {"text": "a", "mode": "c"},
+               {"text": "a", "codes": [1]}]
+        for arguments in bad:
+            response = await call(tools, "echo", arguments)
+            assert response["error"]["code"] == INVALID_PARAMS, arguments
+        ok = await call(tools, "echo", {"text": "가", "count": None, "encoding": "pretty"})
+        unknown = await call(tools, "unbound", {})
+        return ok, unknown
+
+    ok, unknown = asyncio.run(run())
+    text = ok["result"]["content"][0]["text"]
+    assert "\n" in text and json.loads(text) == {"context": "ctx", "args": {"text": "가"}}
+    assert unknown["error"]["code"] == METHOD_NOT_FOUND
+    assert tools.names() == ("echo", "slow")
+    print("✅ 스키마 검사/알 수 없는 도구")
+
+
+def test_unknown_arguments_are_ignored():
+    tools, _ = make_dispatcher()
+    before = IGNORED_ARGUMENTS.value(tool="echo")
+    response = asyncio.run(call(tools, "echo", {"text": "a", "other": 1, "verbose": True}))
+    # 예전 서버처럼 모르는 인자는 거절하지 않고 처리 함수에 넘기지도 않음
+    assert json.loads(response["result"]["content"][0]["text"])["args"] == {"text": "a"}
+    assert IGNORED_ARGUMENTS.value(tool="echo") == before + 2
+    # 알려진 인자의 형식 오류는 그대로 거절
+    assert asyncio.run(call(tools, "echo", {"text": 1, "other": 1}))["error"]["code"] == INVALID_PARAMS
+    # 공개 스키마도 모르는 인자를 금지한다고 알리지 않음
+    assert "additionalProperties" not in tools.tools_list().data["tools"][0]["inputSchema"]
+    print("✅ 스키마에 없는 인자는 무시")
+
+
+def test_timeout_and_concurrency():
+    tools, state = make_dispatcher()
+
+    async def run():
+        fast = [call(tools, "slow", {"delay": 0.05}, i) for i in range(6)]
+        results = await asyncio.gather(*fast, call(tools, "slow", {"delay": 1.0}, 99))
+        return results
+
+    results = asyncio.run(run())
+    assert all("result" in r for r in results[:6])
+    assert results[-1]["error"]["code"] == TOOL_TIMEOUT_ERROR
+    assert state["peak"] == 2
+    # 이벤트 루프가 바뀌어도 세마포어를 새로 만들어 동작
+    assert "result" in asyncio.run(call(tools, "slow", {"delay": 0}))
+    print("✅ 도구별 시간 제한/동시 실행 제한")
+
+
+def test_servers_route_through_dispatcher():
+    import mcp_server
+
+    class Client:
+        async def get_waterlevel_data(self, obs_code, *rest):
+            return {"obs_code": obs_code, "rest": list(rest)}
+
+    request = {"jsonrpc": "2.0", "id": 3, "method": "tools/call",
+               "params": {"name": "get_waterlevel_data", "arguments": {"obs_code": "1018683", "hours": 6}}}
+    response = asyncio.run(mcp_server.handle_request(Client(), request))
+    assert json.loads(response["result"]["content"][0]["text"])["rest"][:2] == ["1H", 6]
+    request["params"]["arguments"] = {"hours": 6}
+    assert asyncio.run(mcp_server.handle_request(Client(), request))["error"]["code"] == INVALID_PARAMS
+    assert [t["name"] for t in mcp_server.TOOLS_LIST.data["tools"]] == list(mcp_server.tools.names())
+    print("✅ stdio 서버 도구 호출이 디스패처를 거침")
+
+
+if __name__ == "__main__":
+    test_schema_validation()
+    test_unknown_arguments_are_ignored()
+    test_timeout_and_concurrency()
+    test_servers_route_through_dispatcher()
+    print("\n🎉 도구 디스패처 테스트 완료!")
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+도구 레지스트리/미리 직렬화한 응답 테스트 (업스트림 호출 없음)
+"""
+import asyncio
+import json
+
+from fastapi.testclient import TestClient
+
+from tool_registry import encode_message, mcp_tools
+
+
+def test_rendered_once_and_spliced():
+    first = mcp_tools.tools_list(("get_observatories", "get_waterlevel_data"))
+    again = mcp_tools.tools_list(("get_observatories", "get_waterlevel_data"))
+    assert first is again and json.loads(first.body) == first.data
+    names = [tool["name"] for tool in first.data["tools"]]
+    assert names == ["get_observatories", "get_waterlevel_data"]
+    assert "encoding" in first.data["tools"][0]["inputSchema"]["properties"]
+
+    response = {"jsonrpc": "2.0", "id": "abc", "result": first.data}
+    assert json.loads(encode_message(response)) == response
+    assert encode_message(response) == first.envelope("abc")
+    batch = [response, {"jsonrpc": "2.0", "id": 2, "error": {"code": -32601, "message": "x"}}]
+    assert json.loads(encode_message(batch)) == batch
+    # 같은 내용이라도 다른 객체면 일반 직렬화
+    copied = {"jsonrpc": "2.0", "id": 1, "result": json.loads(first.body)}
+    assert json.loads(encode_message(copied)) == copied
+    print(f"✅ tools/list 한 번 직렬화 ({len(first.body):,} bytes, ETag {first.etag})")
+
+
+def test_servers_share_registry():
+    from mcp_server import TOOLS_LIST, handle_request
+
+    response = asyncio.run(handle_request(None, {"jsonrpc": "2.0", "id": 7, "method": "tools/list"}))
+    assert response["result"] is TOOLS_LIST.data
+    init = asyncio.run(handle_request(None, {"jsonrpc": "2.0", "id": 8, "method": "initialize"}))
+    assert init["result"]["serverInfo"]["name"] == "hrfco-mcp"
+
+    import http_mcp_server
+
+    client = TestClient(http_mcp_server.app)
+    tools = client.get("/tools")
+    assert tools.status_code == 200 and tools.headers["etag"] == http_mcp_server.TOOLS_LIST.etag
+    assert client.get("/tools", headers={"If-None-Match": tools.headers["etag"]}).status_code == 304
+    listed = client.post("/mcp", json={"jsonrpc": "2.0", "id": 1, "method": "tools/list"}).json()
+    assert listed["result"] == tools.json()
+    assert {t["name"] for t in tools.json()["tools"]} >= {t["name"] for t in TOOLS_LIST.data["tools"]}
+    print("✅ stdio/HTTP 서버가 같은 도구 정의 사용, /tools ETag 재검증")
+
+
+if __name__ == "__main__":
+    test_rendered_once_and_spliced()
+    test_servers_share_registry()
+    print("\n🎉 도구 레지스트리 테스트 완료!")
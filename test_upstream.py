@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+업스트림 single-flight 테스트 (네트워크 호출 없음)
+"""
+import asyncio
+
+import upstream
+from upstream import SingleFlight, request_key
+
+
+def test_concurrent_identical_calls_share_one_fetch():
+    flight = SingleFlight()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"content": [{"wl": "1.23"}]}
+
+    async def run():
+        key = request_key("http://api.hrfco.go.kr/k/waterlevel/data.json",
+                          {"obs_code": "1018683", "time_type": "1H"})
+        return await asyncio.gather(*(flight.do(key, fetch) for _ in range(20)))
+
+    results = asyncio.run(run())
+    assert len(calls) == 1
+    assert len(results) == 20 and all(r is results[0] for r in results)
+    assert flight.leaders == 1 and flight.joins == 19
+    assert flight.inflight() == 0
+    print("✅ 동시 동일 요청 20건 → 업스트림 1회")
+
+
+def test_errors_fan_out_and_do_not_stick():
+    flight = SingleFlight()
+    attempts = []
+
+    async def failing():
+        attempts.append(1)
+        await asyncio.sleep(0.01)
+        raise RuntimeError("throttled")
+
+    async def run():
+        results = await asyncio.gather(*(flight.do("k", failing) for _ in range(5)),
+                                       return_exceptions=True)
+        again = await asyncio.gather(flight.do("k", failing), return_exceptions=True)
+        return results, again
+
+    results, again = asyncio.run(run())
+    assert all(isinstance(r, RuntimeError) for r in results + again)
+    assert len(attempts) == 2
+    print("✅ 오류는 모든 대기자에게 전달되고 다음 요청은 새로 시도")
+
+
+def test_cancelled_waiter_does_not_cancel_shared_fetch():
+    flight = SingleFlight()
+
+    async def slow():
+        await asyncio.sleep(0.05)
+        return "ok"
+
+    async def run():
+        first = asyncio.ensure_future(flight.do("k", slow))
+        second = asyncio.ensure_future(flight.do("k", slow))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(run()) == "ok"
+    print("✅ 대기자 취소가 공유 요청을 취소하지 않음")
+
+
+def test_request_key_ignores_param_order():
+    a = request_key("u", {"obs_code": "1", "time_type": "1H"})
+    b = request_key("u", {"time_type": "1H", "obs_code": "1"})
+    assert a == b
+    assert a != request_key("u", {"obs_code": "2", "time_type": "1H"})
+
+
+def test_shared_client_follows_event_loop():
+    async def twice():
+        first = upstream.get_client()
+        await asyncio.sleep(0)
+        return first, upstream.get_client()
+
+    async def close():
+        client = upstream.get_client()
+        await upstream.close_client()
+        return client
+
+    async def reopen():
+        return upstream.get_client()
+
+    first, again = asyncio.run(twice())
+    # 같은 루프 안에서는 커넥션 풀 하나를 재사용
+    assert first is again and not first.is_closed
+    # 새 이벤트 루프에서는 이전 루프에 묶인 풀을 쓰지 않고 새로 만듦
+    other, _ = asyncio.run(twice())
+    assert other is not first
+    # close_client 후에는 닫힌 클라이언트를 버리고 다음 호출에서 새로 만듦
+    closed = asyncio.run(close())
+    assert closed.is_closed and upstream._client is None and upstream._client_loop is None
+    reopened = asyncio.run(reopen())
+    assert reopened is not closed and not reopened.is_closed
+    asyncio.run(upstream.close_client())
+    print("✅ 공유 클라이언트 재사용/루프 변경 시 재생성/종료 후 초기화")
+
+
+if __name__ == "__main__":
+    test_concurrent_identical_calls_share_one_fetch()
+    test_errors_fan_out_and_do_not_stick()
+    test_cancelled_waiter_does_not_cancel_shared_fetch()
+    test_request_key_ignores_param_order()
+    test_shared_client_follows_event_loop()
+    print("\n🎉 single-flight 테스트 완료!")
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+검색 엔진 워밍업/준비 상태 테스트 (업스트림 호출 없음)
+"""
+import asyncio
+
+from catalog_cache import CatalogCache
+from catalog_pages import paginate
+from smart_water_search import SmartWaterSearch
+from station_index import StationIndex
+
+STATIONS = [{"wlobscd": "1018683", "obsnm": "서울시(한강대교)", "addr": "서울특별시 용산구"}]
+
+
+def make_search(fail_types=(), seed=None):
+    async def loader(hydro_type):
+        if hydro_type in fail_types:
+            raise ConnectionError("upstream down")
+        return STATIONS
+
+    search = SmartWaterSearch()
+    search.catalog = CatalogCache(loader, min_backoff=0, max_backoff=0, seed=seed)
+    search.catalog.register_builder("name_index", StationIndex)
+    return search
+
+
+def test_warm_up_preloads_catalogs_and_indexes():
+    async def run():
+        search = make_search()
+        before = search.readiness()
+        after = await search.warm_up()
+        return search, before, after
+
+    search, before, after = asyncio.run(run())
+    assert before["ready"] is False
+    assert after["ready"] is True
+    assert set(after["catalogs"]) == {"waterlevel", "rainfall", "dam"}
+    assert "name_index" in search.catalog.peek("waterlevel")._derived
+    print("✅ 워밍업 시 카탈로그와 색인 미리 적재")
+
+
+def test_failed_catalog_keeps_not_ready_until_loaded():
+    async def run():
+        search = make_search(fail_types=("dam",))
+        status = await search.warm_up()
+        search.catalog.put("dam", STATIONS)
+        return status, search.readiness()
+
+    status, later = asyncio.run(run())
+    assert status["ready"] is False
+    assert status["catalogs"]["dam"]["status"] == "error"
+    assert later["ready"] is True
+    print("✅ 실패한 카탈로그가 적재되면 ready로 전환")
+
+
+def test_snapshot_only_is_degraded_not_ready():
+    async def run():
+        search = make_search(fail_types=("waterlevel", "rainfall", "dam"), seed=lambda hydro_type: STATIONS)
+        status = await search.warm_up()
+        await asyncio.sleep(0)
+        page = paginate(search.catalog.peek("waterlevel"), limit=1)
+        search.catalog.put("waterlevel", STATIONS)
+        return status, page, search.readiness()
+
+    status, page, later = asyncio.run(run())
+    # 스냅샷으로 응답은 하지만 업스트림 데이터가 아니므로 준비 완료가 아님
+    assert status["ready"] is False and status["degraded"] is True
+    assert status["catalogs"]["waterlevel"] == {"status": "ok", "stations": 1, "loaded": False, "source": "snapshot"}
+    assert page["source"] == "snapshot"
+    assert later["catalogs"]["waterlevel"]["source"] == "upstream" and later["ready"] is False
+    print("✅ 스냅샷만 있는 카탈로그는 degraded, ready 아님")
+
+
+if __name__ == "__main__":
+    test_warm_up_preloads_catalogs_and_indexes()
+    test_failed_catalog_keeps_not_ready_until_loaded()
+    test_snapshot_only_is_degraded_not_ready()
+    print("\n🎉 워밍업 테스트 완료!")
@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+Observation Time-Series Store
+관측 시계열 로컬 저장소 (SQLite) - (hydro_type, obs_code, time_type)별 중복 없는 추가 전용 저장,
+조회 시 업스트림에서는 저장된 마지막 시각 이후(누락된 꼬리)와 저장 구간보다 앞선 부분(머리)만 받아온다.
+이미 받아 둔 구간의 시작 시각(coverage)도 저장하므로 재시작 후에도 꼬리만 받는다.
+SQLite 작업은 이벤트 루프를 막지 않도록 저장소 전용 스레드 하나에서 순서대로 실행한다.
+"""
+import array
+import asyncio
+import os
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+import series_ops
+import upstream
+from catalog_cache import HRFCO_BASE_URL
+from metrics import CACHE_REQUESTS
+
+SERIES_DB = os.getenv('HRFCO_SERIES_DB', os.path.join(tempfile.gettempdir(), "hrfco_series.sqlite3"))
+RETENTION_DAYS = float(os.getenv('HRFCO_SERIES_RETENTION_DAYS', '30'))
+# 같은 시계열을 이 간격 안에 다시 묻으면 업스트림 확인 없이 저장소에서 응답 (초)
+RECHECK_INTERVAL = float(os.getenv('HRFCO_SERIES_RECHECK', '60'))
+# 집계/다운샘플 옵션만 주고 hours를 생략했을 때의 조회 구간 (시간)
+DEFAULT_HOURS = 24.0
+
+KST = timezone(timedelta(hours=9))
+TS_FORMAT = "%Y%m%d%H%M"
+TIME_STEPS = {"10M": timedelta(minutes=10), "1H": timedelta(hours=1), "1D": timedelta(days=1)}
+
+# hydro_type별 숫자 관측값 필드
+VALUE_FIELDS = {
+    "waterlevel": ("wl", "fw"),
+    "rainfall": ("rf",),
+    "dam": ("swl", "inf", "sfw", "ecpc", "tototf"),
+}
+
+SeriesKey = Tuple[str, str, str]
+Fetcher = Callable[[str, str, str, str, str], Awaitable[List[Dict[str, Any]]]]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS series (
+    id INTEGER PRIMARY KEY,
+    hydro_type TEXT NOT NULL,
+    obs_code TEXT NOT NULL,
+    time_type TEXT NOT NULL,
+    fields TEXT NOT NULL,
+    UNIQUE (hydro_type, obs_code, time_type)
+);
+CREATE TABLE IF NOT EXISTS points (
+    series_id INTEGER NOT NULL,
+    ts INTEGER NOT NULL,
+    vals BLOB NOT NULL,
+    PRIMARY KEY (series_id, ts)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS coverage (
+    series_id INTEGER PRIMARY KEY,
+    covered_from INTEGER NOT NULL
+);
+"""
+
+
+def parse_ts(value: str) -> datetime:
+    return datetime.strptime(str(value)[:12], TS_FORMAT).replace(tzinfo=KST)
+
+
+def format_ts(value: datetime) -> str:
+    return value.astimezone(KST).strftime(TS_FORMAT)
+
+
+def to_float(value: Any) -> float:
+    try:
+        return float(str(value).strip())
+    except (TypeError, ValueError):
+        return float("nan")
+
+
+class SeriesStore:
+    """SQLite 시계열 저장소
+
+    관측값은 시각(yyyymmddHHMM 정수)마다 float64 배열 하나를 BLOB으로 저장하고,
+    (시계열, 시각) 기본 키로 중복 저장을 막는다.
+    """
+
+    def __init__(self, path: str = SERIES_DB, retention_days: float = RETENTION_DAYS):
+        self.path = path
+        self.retention_days = retention_days
+        # SeriesService는 저장소 전용 스레드에서 쓰므로 생성한 스레드 밖에서도 사용 허용
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        if path != ":memory:":
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self._series: Dict[SeriesKey, Tuple[int, Tuple[str, ...]]] = {}
+
+    def close(self):
+        self.conn.close()
+
+    def _series_id(self, key: SeriesKey, fields: Optional[Sequence[str]] = None) -> Optional[Tuple[int, Tuple[str, ...]]]:
+        if key in self._series:
+            return self._series[key]
+        row = self.conn.execute(
+            "SELECT id, fields FROM series WHERE hydro_type=? AND obs_code=? AND time_type=?", key
+        ).fetchone()
+        if row is None:
+            if fields is None:
+                return None
+            cursor = self.conn.execute(
+                "INSERT INTO series (hydro_type, obs_code, time_type, fields) VALUES (?, ?, ?, ?)",
+                (*key, ",".join(fields)))
+            row = (cursor.lastrowid, ",".join(fields))
+        self._series[key] = (row[0], tuple(row[1].split(",")))
+        return self._series[key]
+
+    def fields(self, key: SeriesKey) -> Tuple[str, ...]:
+        series = self._series_id(key)
+        return series[1] if series else VALUE_FIELDS.get(key[0], ())
+
+    def last_timestamp(self, key: SeriesKey) -> Optional[int]:
+        series = self._series_id(key)
+        if series is None:
+            return None
+        row = self.conn.execute("SELECT MAX(ts) FROM points WHERE series_id=?", (series[0],)).fetchone()
+        return row[0]
+
+    def covered_from(self, key: SeriesKey) -> Optional[int]:
+        """업스트림에서 빠짐없이 받아 둔 구간의 시작 시각 (그 이후는 마지막 저장 시각까지 조회 완료)"""
+        series = self._series_id(key)
+        if series is None:
+            return None
+        row = self.conn.execute("SELECT covered_from FROM coverage WHERE series_id=?", (series[0],)).fetchone()
+        return row[0] if row else None
+
+    def mark_covered(self, key: SeriesKey, start: int):
+        """start 이후를 받아 두었다고 기록 (기존 기록보다 앞설 때만 앞당김)"""
+        series_id, _ = self._series_id(key, self.fields(key))
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO coverage (series_id, covered_from) VALUES (?, ?) "
+                "ON CONFLICT (series_id) DO UPDATE SET covered_from=MIN(covered_from, excluded.covered_from)",
+                (series_id, start))
+
+    def append(self, key: SeriesKey, records: List[Dict[str, Any]]) -> int:
+        """업스트림 레코드 추가 (이미 있는 시각은 무시), 새로 저장한 행 수 반환"""
+        fields = VALUE_FIELDS.get(key[0]) or tuple(
+            k for k in (records[0] if records else {}) if k != "ymdhm" and not k.endswith("obscd"))
+        series_id, fields = self._series_id(key, fields)
+        rows = []
+        for record in records:
+            ts = record.get("ymdhm")
+            if not ts:
+                continue
+            values = array.array("d", (to_float(record.get(field)) for field in fields))
+            rows.append((series_id, int(str(ts)[:12]), values.tobytes()))
+        with self.conn:
+            before = self.conn.total_changes
+            self.conn.executemany("INSERT OR IGNORE INTO points (series_id, ts, vals) VALUES (?, ?, ?)", rows)
+            inserted = self.conn.total_changes - before
+            if inserted and self.retention_days > 0:
+                cutoff = int(format_ts(datetime.now(KST) - timedelta(days=self.retention_days)))
+                self.conn.execute("DELETE FROM points WHERE series_id=? AND ts<?", (series_id, cutoff))
+                # 보존 기간 밖으로 지운 구간은 다시 받아야 하므로 coverage도 뒤로 미룸
+                self.conn.execute("UPDATE coverage SET covered_from=? WHERE series_id=? AND covered_from<?",
+                                  (cutoff, series_id, cutoff))
+        return inserted
+
+    def window(self, key: SeriesKey, start: Optional[int] = None,
+               end: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """[start, end] 구간 시계열 → (시각 int64 배열, (N, 필드 수) float64 배열), 시각 오름차순"""
+        series = self._series_id(key)
+        width = len(self.fields(key))
+        if series is None:
+            return np.empty(0, dtype=np.int64), np.empty((0, width))
+        rows = self.conn.execute(
+            "SELECT ts, vals FROM points WHERE series_id=? AND ts>=? AND ts<=? ORDER BY ts",
+            (series[0], start if start is not None else 0, end if end is not None else 999999999999),
+        ).fetchall()
+        timestamps = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+        values = np.frombuffer(b"".join(row[1] for row in rows), dtype=np.float64).reshape(len(rows), width)
+        return timestamps, values
+
+    def stats(self) -> Dict[str, Any]:
+        series, points = self.conn.execute(
+            "SELECT (SELECT COUNT(*) FROM series), (SELECT COUNT(*) FROM points)").fetchone()
+        return {"path": self.path, "series": series, "points": points}
+
+
+async def fetch_range(hydro_type: str, time_type: str, obs_code: str, start: str, end: str) -> List[Dict[str, Any]]:
+    """업스트림 기간 조회 (list/{시간단위}/{관측소}/{시작}/{종료}.json)"""
+    api_key = os.getenv('HRFCO_API_KEY', '')
+    if not api_key:
+        raise ValueError("API 키가 필요합니다. HRFCO_API_KEY 환경변수를 설정해주세요.")
+    url = f"{HRFCO_BASE_URL}/{api_key}/{hydro_type}/list/{time_type}/{obs_code}/{start}/{end}.json"
+    data = await upstream.fetch_json(url)
+    return data.get("content", []) if isinstance(data, dict) else []
+
+
+class SeriesService:
+    """시계열 조회 - 저장소에 없는 머리/꼬리 구간만 업스트림에서 받아 채운 뒤 저장소에서 응답"""
+
+    def __init__(self, store: Optional[SeriesStore] = None, fetcher: Optional[Fetcher] = None,
+                 recheck_interval: float = RECHECK_INTERVAL):
+        self._store = store
+        self.fetcher = fetcher or fetch_range
+        self.recheck_interval = recheck_interval
+        self._checked_at: Dict[SeriesKey, float] = {}
+        self._locks: Dict[SeriesKey, asyncio.Lock] = {}
+        # SQLite 연결 하나를 쓰므로 작업을 스레드 하나에서 순서대로 실행
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="series-store")
+
+    @property
+    def store(self) -> SeriesStore:
+        # 저장소 파일은 처음 쓸 때 연다
+        if self._store is None:
+            self._store = SeriesStore()
+        return self._store
+
+    async def _db(self, method: str, *args: Any) -> Any:
+        """저장소 메서드를 저장소 전용 스레드에서 실행"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, lambda: getattr(self.store, method)(*args))
+
+    async def sync(self, key: SeriesKey, start: datetime, end: datetime) -> int:
+        """[start, end] 중 저장소에 없는 머리/꼬리 구간을 업스트림에서 받아 저장, 새로 저장한 행 수 반환"""
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            covered_from = await self._db("covered_from", key)
+            covered = covered_from is not None and covered_from <= int(format_ts(start))
+            if covered and time.time() - self._checked_at.get(key, 0.0) < self.recheck_interval:
+                CACHE_REQUESTS.inc(cache="series", result="hit")
+                return 0
+            # 저장된 구간이 있으면 그 앞(머리)과 마지막 저장 시각 이후(꼬리)만 받음 (partial), 없으면 전체 (miss)
+            CACHE_REQUESTS.inc(cache="series", result="miss" if covered_from is None else "partial")
+            hydro_type, obs_code, time_type = key
+            step = TIME_STEPS.get(time_type, timedelta(hours=1))
+            ranges = []
+            if covered_from is None:
+                ranges.append((start, end))
+            else:
+                # 머리는 [start, covered_from) - 저장 구간 바로 앞까지 받아야 coverage가 끊기지 않음
+                head_end = parse_ts(str(covered_from)) - timedelta(minutes=1)
+                if start <= head_end:
+                    ranges.append((start, head_end))
+                last = await self._db("last_timestamp", key)
+                tail_from = start if last is None else max(start, parse_ts(str(last)) + step)
+                if tail_from <= end:
+                    ranges.append((tail_from, end))
+            inserted = 0
+            for fetch_from, fetch_to in ranges:
+                records = await self.fetcher(hydro_type, time_type, obs_code,
+                                             format_ts(fetch_from), format_ts(fetch_to))
+                inserted += await self._db("append", key, records)
+            await self._db("mark_covered", key, int(format_ts(start)))
+            self._checked_at[key] = time.time()
+            return inserted
+
+    async def _window(self, key: SeriesKey, start: datetime, end: datetime) -> Tuple[np.ndarray, np.ndarray, Tuple[str, ...]]:
+        timestamps, values = await self._db("window", key, int(format_ts(start)), int(format_ts(end)))
+        return timestamps, values, await self._db("fields", key)
+
+    async def get_series(self, obs_code: str, hydro_type: str = "waterlevel", time_type: str = "1H",
+                         hours: float = DEFAULT_HOURS, aggregate: Optional[str] = None,
+                         downsample: Optional[int] = None, rate_of_change: bool = False) -> Dict[str, Any]:
+        """최근 hours시간 시계열 (열 기반, 집계/다운샘플/변화율은 series_ops 참고)"""
+        if hours <= 0:
+            raise ValueError(f"hours는 0보다 커야 합니다: {hours}")
+        key = (hydro_type, str(obs_code), time_type)
+        end = datetime.now(KST).replace(second=0, microsecond=0)
+        start = end - timedelta(hours=hours)
+        fetched = await self.sync(key, start, end)
+        timestamps, values, fields = await self._window(key, start, end)
+        return series_payload(key, fields, timestamps, values, fetched,
+                              aggregate=aggregate, downsample=downsample, rate_of_change=rate_of_change)
+
+    async def iter_series(self, obs_code: str, hydro_type: str = "waterlevel", time_type: str = "1H",
+                          hours: float = DEFAULT_HOURS, chunk: int = 500):
+        """최근 hours시간 시계열을 chunk개 시각씩 나눠 → (응답 dict, 지금까지 보낸 수, 전체 수), 스트리밍 응답용"""
+        if hours <= 0:
+            raise ValueError(f"hours는 0보다 커야 합니다: {hours}")
+        key = (hydro_type, str(obs_code), time_type)
+        end = datetime.now(KST).replace(second=0, microsecond=0)
+        start = end - timedelta(hours=hours)
+        fetched = await self.sync(key, start, end)
+        timestamps, values, fields = await self._window(key, start, end)
+        total = len(timestamps)
+        for offset in range(0, max(total, 1), max(1, chunk)):
+            stop = min(offset + chunk, total)
+            yield (series_payload(key, fields, timestamps[offset:stop], values[offset:stop],
+                                  fetched if offset == 0 else 0), stop, total)
+
+
+def series_payload(key: SeriesKey, fields: Sequence[str], timestamps: np.ndarray,
+                   values: np.ndarray, fetched: int = 0, aggregate: Optional[str] = None,
+                   downsample: Optional[int] = None, rate_of_change: bool = False) -> Dict[str, Any]:
+    """시계열 배열 → 응답 dict (NaN은 None)"""
+    hydro_type, obs_code, time_type = key
+    payload = {
+        "obs_code": obs_code,
+        "hydro_type": hydro_type,
+        "time_type": time_type,
+        "points": len(timestamps),
+        "fetched": fetched,
+    }
+    payload.update(series_ops.transform(timestamps, values, fields, aggregate_window=aggregate,
+                                        downsample=downsample, include_rate=rate_of_change))
+    return payload
+
+
+# 프로세스 전역 인스턴스
+series_service = SeriesService()
@@ -0,0 +1,575 @@
+#!/usr/bin/env python3
+"""
+Tool Registry
+도구 정의를 한 곳에 선언하고, tools/list · /tools · /openai/functions · initialize 응답을
+처음 한 번만 직렬화(bytes + ETag)해 재사용한다.
+
+각 서버는 ToolDispatcher에 데코레이터로 처리 함수를 연결하고, 연결한 도구만 목록에 노출한다.
+tools/call은 미리 컴파일한 스키마 검사 → 도구별 동시 실행 제한/시간 제한 → 결과 크기 예산(response_budget) 적용 순으로 처리한다.
+"""
+import asyncio
+import hashlib
+import os
+import sys
+import time
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple, Union
+
+from catalog_pages import PAGE_PROPERTIES
+from jsonrpc_batch import error_response
+from metrics import IGNORED_ARGUMENTS, TOOL_ERRORS, TOOL_IN_FLIGHT, TOOL_LATENCY, TOOL_RESPONSE_BYTES
+from response_budget import RESULT_CURSOR_PROPERTY, Budget, decode_cursor, fit
+from response_encoding import ENCODING_PROPERTY, dumps, pop_encoding, with_encoding
+
+PROTOCOL_VERSION = "2024-11-05"
+
+# 도구 실행 시간 기본 상한 (초), 도구별로 dispatcher.tool(timeout=...)으로 바꿀 수 있음
+TOOL_TIMEOUT = float(os.getenv('MCP_TOOL_TIMEOUT', '30'))
+# 스트리밍 전송 시 content 항목 하나에 담는 행 수 (관측소 수, 시계열 시각 수)
+STREAM_CHUNK = int(os.getenv('MCP_STREAM_CHUNK', '200'))
+
+# JSON-RPC 오류 코드
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+TOOL_TIMEOUT_ERROR = -32001
+
+Validator = Callable[[Dict[str, Any]], Optional[str]]
+Handler = Callable[[Any, Dict[str, Any]], Awaitable[Any]]
+StreamHandler = Callable[[Any, Dict[str, Any]], AsyncIterator[Tuple[Any, int, int]]]
+
+
+class Tool:
+    """도구 하나의 이름/설명/입력 스키마"""
+
+    __slots__ = ("name", "description", "properties", "required")
+
+    def __init__(self, name: str, description: str, properties: Dict[str, Any],
+                 required: Sequence[str] = ()):
+        self.name = name
+        self.description = description
+        self.properties = properties
+        self.required = list(required)
+
+    def schema(self) -> Dict[str, Any]:
+        # additionalProperties는 적지 않음 - 디스패처는 스키마에 없는 인자를 거절하지 않고 버림
+        schema: Dict[str, Any] = {"type": "object", "properties": self.properties}
+        if self.required:
+            schema["required"] = self.required
+        return schema
+
+
+_TYPES = {
+    "string": (str,),
+    "integer": (int,),
+    "number": (int, float),
+    "boolean": (bool,),
+    "array": (list,),
+    "object": (dict,),
+}
+
+
+def _compile_property(name: str, spec: Dict[str, Any]) -> Callable[[Any], Optional[str]]:
+    """속성 스키마 하나 → 값 검사 함수 (type, enum, minimum/maximum, exclusiveMinimum/exclusiveMaximum, items.type)"""
+    types = _TYPES.get(spec.get("type", ""))
+    enum = spec.get("enum")
+    low, high = spec.get("minimum"), spec.get("maximum")
+    above, below = spec.get("exclusiveMinimum"), spec.get("exclusiveMaximum")
+    item_types = _TYPES.get((spec.get("items") or {}).get("type", ""))
+
+    def check(value: Any) -> Optional[str]:
+        if types is not None and (not isinstance(value, types) or (bool not in types and isinstance(value, bool))):
+            return f"{name}: {spec['type']} 형식이어야 합니다"
+        if enum is not None and value not in enum:
+            return f"{name}: {', '.join(map(str, enum))} 중 하나여야 합니다"
+        if low is not None and value < low:
+            return f"{name}: {low} 이상이어야 합니다"
+        if high is not None and value > high:
+            return f"{name}: {high} 이하여야 합니다"
+        if above is not None and value <= above:
+            return f"{name}: {above}보다 커야 합니다"
+        if below is not None and value >= below:
+            return f"{name}: {below}보다 작아야 합니다"
+        if item_types is not None and any(not isinstance(item, item_types) for item in value):
+            return f"{name}: 항목은 {spec['items']['type']} 형식이어야 합니다"
+        return None
+
+    return check
+
+
+def compile_schema(schema: Dict[str, Any]) -> Validator:
+    """inputSchema → 인자 검사 함수 (오류 메시지 또는 None), 도구 연결 시 한 번만 만든다
+
+    값이 null인 인자는 생략한 것으로 본다.
+    """
+    checks = {name: _compile_property(name, spec) for name, spec in (schema.get("properties") or {}).items()}
+    required = tuple(schema.get("required") or ())
+    closed = schema.get("additionalProperties") is False
+
+    def validate(arguments: Dict[str, Any]) -> Optional[str]:
+        for name in required:
+            if arguments.get(name) is None:
+                return f"{name}: 필수 인자입니다"
+        for name, value in arguments.items():
+            check = checks.get(name)
+            if check is None:
+                if closed:
+                    return f"{name}: 알 수 없는 인자입니다"
+                continue
+            if value is not None:
+                error = check(value)
+                if error:
+                    return error
+        return None
+
+    return validate
+
+
+class RenderedPayload:
+    """미리 직렬화한 응답 본문 (data는 공유 객체이므로 수정하지 않는다)"""
+
+    __slots__ = ("data", "body", "etag")
+
+    def __init__(self, data: Dict[str, Any]):
+        self.data = data
+        self.body = dumps(data, "compact").encode("utf-8")
+        self.etag = '"' + hashlib.sha1(self.body).hexdigest()[:16] + '"'
+        _RENDERED[id(data)] = self
+
+    def envelope(self, request_id: Any) -> bytes:
+        """JSON-RPC 응답 bytes (id만 끼워 넣음)"""
+        return (b'{"jsonrpc":"2.0","id":' + dumps(request_id, "compact").encode("utf-8")
+                + b',"result":' + self.body + b"}")
+
+    def matches(self, if_none_match: Optional[str]) -> bool:
+        """If-None-Match 헤더가 현재 ETag와 같은지 (304 응답 여부)"""
+        if not if_none_match:
+            return False
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in tags or self.etag in tags or f"W/{self.etag}" in tags
+
+    def http_response(self, if_none_match: Optional[str] = None):
+        """FastAPI 응답 (If-None-Match가 같으면 304)"""
+        from fastapi import Response
+        headers = {"ETag": self.etag, "Cache-Control": "no-cache"}
+        if self.matches(if_none_match):
+            return Response(status_code=304, headers=headers)
+        return Response(self.body, media_type="application/json", headers=headers)
+
+
+def _with_result_cursor(schema: Dict[str, Any]) -> Dict[str, Any]:
+    return dict(schema, properties=dict(schema["properties"], result_cursor=RESULT_CURSOR_PROPERTY))
+
+
+# id(data) → RenderedPayload (레지스트리 캐시가 객체를 붙잡고 있으므로 id가 재사용되지 않음)
+_RENDERED: Dict[int, RenderedPayload] = {}
+
+
+class ToolRegistry:
+    """도구 선언 모음, 렌더링 결과는 (종류, 도구 이름들)별로 캐시"""
+
+    def __init__(self):
+        self._tools: "OrderedDict[str, Tool]" = OrderedDict()
+        self._rendered: Dict[Tuple[Any, ...], RenderedPayload] = {}
+
+    def register(self, name: str, description: str, properties: Dict[str, Any],
+                 required: Sequence[str] = ()) -> Tool:
+        tool = self._tools[name] = Tool(name, description, properties, required)
+        self._rendered.clear()
+        return tool
+
+    def get(self, name: str) -> Optional[Tool]:
+        return self._tools.get(name)
+
+    def names(self) -> List[str]:
+        return list(self._tools)
+
+    def _select(self, names: Optional[Iterable[str]]) -> List[Tool]:
+        if names is None:
+            return list(self._tools.values())
+        return [self._tools[name] for name in names]
+
+    def _cached(self, key: Tuple[Any, ...], build) -> RenderedPayload:
+        payload = self._rendered.get(key)
+        if payload is None:
+            payload = self._rendered[key] = RenderedPayload(build())
+        return payload
+
+    def tools_list(self, names: Optional[Sequence[str]] = None) -> RenderedPayload:
+        """MCP tools/list 결과 (/tools 응답과 같음)"""
+        key = ("tools/list", tuple(names) if names is not None else None)
+        return self._cached(key, lambda: {"tools": with_encoding([
+            {"name": tool.name, "description": tool.description, "inputSchema": _with_result_cursor(tool.schema())}
+            for tool in self._select(names)
+        ])})
+
+    def openai_functions(self, names: Optional[Sequence[str]] = None,
+                         extra: Optional[Dict[str, Any]] = None) -> RenderedPayload:
+        """OpenAI function calling 정의 목록"""
+        key = ("openai", tuple(names) if names is not None else None, dumps(extra or {}, "compact"))
+        return self._cached(key, lambda: dict({"functions": [
+            {"name": tool.name, "description": tool.description, "parameters": tool.schema()}
+            for tool in self._select(names)
+        ]}, **(extra or {})))
+
+    def initialize(self, server_name: str, version: str,
+                   capabilities: Optional[Dict[str, Any]] = None) -> RenderedPayload:
+        """MCP initialize 결과"""
+        capabilities = capabilities or {"tools": {}}
+        key = ("initialize", server_name, version, dumps(capabilities, "compact"))
+        return self._cached(key, lambda: {
+            "protocolVersion": PROTOCOL_VERSION,
+            "capabilities": capabilities,
+            "serverInfo": {"name": server_name, "version": version},
+        })
+
+
+class _Binding:
+    """도구 하나에 연결된 처리 함수와 실행 설정"""
+
+    __slots__ = ("handler", "stream", "validate", "timeout", "max_concurrency", "budget", "known", "_semaphores")
+
+    def __init__(self, handler: Handler, validate: Validator, timeout: Optional[float],
+                 max_concurrency: Optional[int], budget: Budget, known: Iterable[str] = ()):
+        self.handler = handler
+        self.stream: Optional[StreamHandler] = None
+        self.validate = validate
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.budget = budget
+        # 스키마에 선언된 인자 이름 (나머지는 처리 함수에 넘기지 않음)
+        self.known = frozenset(known)
+        self._semaphores: Dict[int, asyncio.Semaphore] = {}
+
+    def semaphore(self) -> Optional[asyncio.Semaphore]:
+        # 세마포어는 이벤트 루프에 묶이므로 루프별로 만든다 (테스트/서버리스에서 루프가 바뀜)
+        if not self.max_concurrency:
+            return None
+        loop_id = id(asyncio.get_event_loop())
+        semaphore = self._semaphores.get(loop_id)
+        if semaphore is None:
+            self._semaphores.clear()
+            semaphore = self._semaphores[loop_id] = asyncio.Semaphore(self.max_concurrency)
+        return semaphore
+
+
+class ToolDispatcher:
+    """도구 이름 → 비동기 처리 함수 (if/elif 분기 없이 dict 조회 한 번)
+
+        tools = ToolDispatcher(mcp_tools)
+
+        @tools.tool("get_waterlevel_data_bulk", timeout=60, max_concurrency=2)
+        async def waterlevel_bulk(client, args):
+            return await client.get_waterlevel_data_bulk(args["obs_codes"])
+
+    처리 함수는 (context, arguments)를 받는다. context는 서버가 call()에 넘긴 값(클라이언트 등).
+    """
+
+    def __init__(self, registry: "ToolRegistry"):
+        self.registry = registry
+        self._bindings: Dict[str, _Binding] = {}
+        self._ignored: Set[Tuple[str, str]] = set()
+
+    def tool(self, name: str, timeout: Optional[float] = TOOL_TIMEOUT, max_concurrency: Optional[int] = None,
+             budget: Optional[Budget] = None) -> Callable[[Handler], Handler]:
+        """처리 함수 연결 - budget을 생략하면 기본 결과 크기 예산 (MCP_RESPONSE_MAX_BYTES/TOKENS)"""
+        spec = self.registry.get(name)
+        if spec is None:
+            raise KeyError(f"레지스트리에 없는 도구: {name}")
+        schema = spec.schema()
+        schema["properties"] = dict(schema["properties"], encoding=ENCODING_PROPERTY,
+                                    result_cursor=RESULT_CURSOR_PROPERTY)
+        validate = compile_schema(schema)
+
+        def decorator(handler: Handler) -> Handler:
+            self._bindings[name] = _Binding(handler, validate, timeout, max_concurrency, budget or Budget(),
+                                            schema["properties"])
+            return handler
+
+        return decorator
+
+    def stream(self, name: str) -> Callable[[StreamHandler], StreamHandler]:
+        """스트리밍 전송 시 쓸 비동기 제너레이터 연결 (tool()로 먼저 연결한 도구만)
+
+        제너레이터는 (청크, 지금까지 처리한 수, 전체 수)를 내보낸다. 청크마다 content 항목이 하나씩 생긴다.
+        """
+        binding = self._bindings[name]
+
+        def decorator(handler: StreamHandler) -> StreamHandler:
+            binding.stream = handler
+            return handler
+
+        return decorator
+
+    def names(self) -> Tuple[str, ...]:
+        """연결된 도구 이름 (레지스트리 선언 순서)"""
+        return tuple(name for name in self.registry.names() if name in self._bindings)
+
+    def tools_list(self) -> RenderedPayload:
+        return self.registry.tools_list(self.names())
+
+    def budgets(self) -> Dict[str, Budget]:
+        """도구별 결과 크기 예산"""
+        return {name: self._bindings[name].budget for name in self.names()}
+
+    def _ignore(self, name: str, keys: List[str]):
+        """스키마에 없는 인자는 버리고 (도구, 인자)마다 처음 한 번만 stderr에 기록"""
+        IGNORED_ARGUMENTS.inc(len(keys), tool=name)
+        new = [key for key in keys if (name, key) not in self._ignored]
+        if new:
+            self._ignored.update((name, key) for key in new)
+            print(f"⚠️ {name}: 알 수 없는 인자 무시 ({', '.join(new)})", file=sys.stderr)
+
+    def _prepare(self, request_id: Any, params: Dict[str, Any]):
+        """도구 조회 + 인자 검사 → (binding, 인자, encoding, result_cursor) 또는 오류 응답"""
+        name = params.get("name")
+        binding = self._bindings.get(name)
+        if binding is None:
+            return error_response(request_id, METHOD_NOT_FOUND, f"Unknown tool: {name}")
+        arguments = params.get("arguments") or {}
+        if not isinstance(arguments, dict):
+            return error_response(request_id, INVALID_PARAMS, "Invalid params: arguments는 객체여야 합니다")
+        problem = binding.validate(arguments)
+        if problem:
+            return error_response(request_id, INVALID_PARAMS, f"Invalid params: {problem}")
+        unknown = [key for key in arguments if key not in binding.known]
+        if unknown:
+            self._ignore(name, unknown)
+        arguments, encoding = pop_encoding({k: v for k, v in arguments.items()
+                                            if v is not None and k in binding.known})
+        cursor = arguments.pop("result_cursor", None)
+        if cursor is not None:
+            try:
+                decode_cursor(cursor)
+            except ValueError as e:
+                return error_response(request_id, INVALID_PARAMS, f"Invalid params: {str(e)}")
+        return binding, arguments, encoding, cursor
+
+    async def call(self, context: Any, request_id: Any, params: Dict[str, Any]) -> Dict[str, Any]:
+        """tools/call 처리 → JSON-RPC 응답"""
+        prepared = self._prepare(request_id, params)
+        if isinstance(prepared, dict):
+            return prepared
+        binding, arguments, encoding, cursor = prepared
+        name = params.get("name")
+
+        started = time.perf_counter()
+        try:
+            with TOOL_IN_FLIGHT.track(tool=name):
+                response = await self._invoke(binding, context, request_id, name, arguments, encoding, cursor)
+        finally:
+            TOOL_LATENCY.observe(time.perf_counter() - started, tool=name)
+        return response
+
+    async def _invoke(self, binding: _Binding, context: Any, request_id: Any, name: str,
+                      arguments: Dict[str, Any], encoding: str, cursor: Optional[str]) -> Dict[str, Any]:
+        semaphore = binding.semaphore()
+        try:
+            if semaphore is None:
+                result = await asyncio.wait_for(binding.handler(context, arguments), binding.timeout)
+            else:
+                async with semaphore:
+                    result = await asyncio.wait_for(binding.handler(context, arguments), binding.timeout)
+        except asyncio.TimeoutError:
+            TOOL_ERRORS.inc(tool=name, error="timeout")
+            return error_response(request_id, TOOL_TIMEOUT_ERROR, f"Tool timeout: {name} ({binding.timeout:g}s)")
+        except Exception as e:
+            TOOL_ERRORS.inc(tool=name, error=type(e).__name__)
+            return error_response(request_id, INTERNAL_ERROR, f"Internal error: {str(e)}")
+        # 예산을 넘으면 columnar → 솎아내기 → 요약 + 커서 순으로 줄이고 단계별 크기를 _meta에 기록
+        try:
+            text, report = fit(result, encoding, binding.budget, cursor)
+        except ValueError as e:
+            TOOL_ERRORS.inc(tool=name, error="invalid_params")
+            return error_response(request_id, INVALID_PARAMS, f"Invalid params: {str(e)}")
+        TOOL_RESPONSE_BYTES.observe(len(text.encode("utf-8")), tool=name)
+        body: Dict[str, Any] = {"content": [{"type": "text", "text": text}]}
+        if report is not None:
+            body["_meta"] = {"budget": report}
+        return {"jsonrpc": "2.0", "id": request_id, "result": body}
+
+    async def iter_call(self, context: Any, request_id: Any,
+                        params: Dict[str, Any]) -> AsyncIterator[Union[Dict[str, Any], str]]:
+        """tools/call을 청크 단위로 처리 (스트리밍 전송용)
+
+        완결된 JSON-RPC 메시지를 하나씩 내보낸다 (dict, 또는 이미 직렬화한 JSON 문자열).
+        스트리밍 처리 함수가 연결된 도구는 청크마다 notifications/progress(progress: 지금까지 처리한 수,
+        total: 전체 수, content: 그 청크의 항목)를 만드는 즉시 보내고, 청크는 보낸 뒤 들고 있지 않는다.
+        progressToken이 없으면 요청 id를 토큰으로 쓴다.
+        마지막 응답에는 내용을 반복하지 않고 보낸 청크/행 수만 담는다
+        (청크 크기가 정해져 있으므로 결과 크기 예산은 적용하지 않음).
+        """
+        prepared = self._prepare(request_id, params)
+        if isinstance(prepared, dict):
+            yield prepared
+            return
+        binding, arguments, encoding, cursor = prepared
+        if binding.stream is None or cursor is not None:
+            yield await self.call(context, request_id, params)
+            return
+
+        name = params.get("name")
+        token = (params.get("_meta") or {}).get("progressToken")
+        loop = asyncio.get_event_loop()
+        deadline = loop.time() + binding.timeout if binding.timeout else None
+        notice = ('{"jsonrpc":"2.0","method":"notifications/progress","params":{"progressToken":'
+                  + dumps(request_id if token is None else token, "compact"))
+        summary: Dict[str, Any] = {"streamed": True, "chunks": 0, "sent_count": 0, "total_count": None}
+        size = 0
+        started = time.perf_counter()
+        semaphore = binding.semaphore()
+        if semaphore is not None:
+            await semaphore.acquire()
+        chunks = binding.stream(context, arguments)
+        TOOL_IN_FLIGHT.inc(tool=name)
+        try:
+            while True:
+                remaining = None if deadline is None else max(0.0, deadline - loop.time())
+                try:
+                    chunk, progress, total = await asyncio.wait_for(chunks.__anext__(), remaining)
+                except StopAsyncIteration:
+                    break
+                item = dumps({"type": "text", "text": dumps(chunk, encoding)}, "compact")
+                message = f'{notice},"progress":{progress},"total":{total},"content":[{item}]}}}}'
+                size += len(message.encode("utf-8"))
+                summary.update(chunks=summary["chunks"] + 1, sent_count=progress, total_count=total)
+                yield message
+            result: Dict[str, Any] = {"content": [{"type": "text", "text": dumps(summary, encoding)}]}
+        except Exception as e:
+            if isinstance(e, asyncio.TimeoutError):
+                code, message = TOOL_TIMEOUT_ERROR, f"Tool timeout: {name} ({binding.timeout:g}s)"
+            else:
+                code, message = INTERNAL_ERROR, f"Internal error: {str(e)}"
+            TOOL_ERRORS.inc(tool=name, error="timeout" if code == TOOL_TIMEOUT_ERROR else type(e).__name__)
+            if not summary["chunks"]:
+                yield error_response(request_id, code, message)
+                return
+            # 이미 일부를 보냈으면 보낸 양과 오류를 담아 isError로 끝냄
+            result = {"content": [{"type": "text", "text": dumps(summary, encoding)},
+                                  {"type": "text", "text": message}], "isError": True}
+        finally:
+            await chunks.aclose()
+            if semaphore is not None:
+                semaphore.release()
+            TOOL_IN_FLIGHT.dec(tool=name)
+            TOOL_LATENCY.observe(time.perf_counter() - started, tool=name)
+        response = {"jsonrpc": "2.0", "id": request_id, "result": result}
+        TOOL_RESPONSE_BYTES.observe(size + len(encode_message(response)), tool=name)
+        yield response
+
+
+def encode_message(message: Union[Dict[str, Any], List[Any], str]) -> bytes:
+    """JSON-RPC 응답(또는 배치) → bytes, 미리 렌더링한 result와 이미 직렬화한 문자열은 다시 직렬화하지 않음"""
+    if isinstance(message, str):
+        return message.encode("utf-8")
+    if isinstance(message, list):
+        return b"[" + b",".join(encode_message(item) for item in message) + b"]"
+    if isinstance(message, dict) and len(message) == 3 and "result" in message:
+        payload = _RENDERED.get(id(message["result"]))
+        if payload is not None and payload.data is message["result"]:
+            return payload.envelope(message.get("id"))
+    return dumps(message, "compact").encode("utf-8")
+
+
+# MCP 도구 (서버별로 필요한 이름만 렌더링)
+mcp_tools = ToolRegistry()
+
+mcp_tools.register(
+    "get_observatories",
+    "홍수통제소 관측소 정보 조회 (limit/cursor로 페이지 단위, 기관/지역/수계 필터)",
+    {
+        "hydro_type": {"type": "string", "description": "수문 유형 (waterlevel, rainfall, dam)",
+                       "default": "waterlevel"},
+        **PAGE_PROPERTIES,
+    },
+)
+mcp_tools.register(
+    "get_waterlevel_data",
+    "수위 데이터 조회",
+    {
+        "obs_code": {"type": "string", "description": "관측소 코드"},
+        "time_type": {"type": "string", "description": "시간 유형 (10M, 1H, 1D)", "default": "1H"},
+        "hours": {"type": "number", "exclusiveMinimum": 0, "description": "최근 N시간 시계열 (생략 시 24시간)"},
+        "aggregate": {"type": "string", "description": "구간별 min/max/mean 집계 (예: 30M, 3H, 1D)"},
+        "downsample": {"type": "integer", "minimum": 3, "description": "첨두를 보존하며 N개 점으로 축소 (LTTB, 3 이상)"},
+        "rate_of_change": {"type": "boolean", "description": "시간당 변화율 포함", "default": False},
+    },
+    required=["obs_code"],
+)
+mcp_tools.register(
+    "get_waterlevel_data_bulk",
+    "여러 관측소 수위 데이터 동시 조회 (열 기반 결과, 관측소별 상태)",
+    {
+        "obs_codes": {"type": "array", "items": {"type": "string"}, "description": "관측소 코드 목록"},
+        "time_type": {"type": "string", "description": "시간 유형 (10M, 1H, 1D)", "default": "1H"},
+    },
+    required=["obs_codes"],
+)
+mcp_tools.register(
+    "get_weather_data",
+    "날씨 데이터 조회",
+    {
+        "nx": {"type": "integer", "description": "격자 X 좌표"},
+        "ny": {"type": "integer", "description": "격자 Y 좌표"},
+    },
+    required=["nx", "ny"],
+)
+mcp_tools.register(
+    "recommend_nearby_stations",
+    "지명 또는 좌표 주변 관측소 검색 (거리 포함)",
+    {
+        "location": {"type": "string", "description": "기준 위치 (지명 또는 \"위도,경도\")"},
+        "radius": {"type": "integer", "description": "반경 (km), 0이면 가장 가까운 관측소", "default": 20},
+        "limit": {"type": "integer", "description": "추천 관측소 수", "default": 5},
+        "data_type": {"type": "string", "description": "수문 유형 (waterlevel, rainfall, dam)"},
+    },
+    required=["location"],
+)
+
+# OpenAI function calling (openai_api_server REST 엔드포인트 인자와 같음)
+openai_functions = ToolRegistry()
+
+openai_functions.register(
+    "search_water_station_by_name",
+    "지역명이나 강 이름으로 관측소를 검색하고 실시간 데이터까지 조회",
+    {
+        "location_name": {"type": "string", "description": "서울, 한강, 낙동강, 부산 등 자연어 입력"},
+        "data_type": {"type": "string", "enum": ["waterlevel", "rainfall", "dam"],
+                      "description": "waterlevel 또는 rainfall", "default": "waterlevel"},
+        "auto_fetch_data": {"type": "boolean", "description": "검색 후 자동으로 실시간 데이터 조회 여부",
+                            "default": False},
+        "limit": {"type": "integer", "minimum": 1, "maximum": 10, "default": 5},
+    },
+    required=["location_name"],
+)
+openai_functions.register(
+    "get_water_info_by_location",
+    "한 번의 요청으로 지역 검색부터 실시간 데이터까지 모든 것을 처리",
+    {
+        "query": {"type": "string", "description": "한강 수위, 서울 강우량, 부산 낙동강 등 자연어 질의"},
+        "limit": {"type": "integer", "minimum": 1, "maximum": 10, "description": "결과 개수 제한", "default": 5},
+    },
+    required=["query"],
+)
+openai_functions.register(
+    "get_waterlevel_data_bulk",
+    "여러 관측소의 실시간 수위를 한 번에 조회 (관측소별 상태 포함)",
+    {
+        "obs_codes": {"type": "string", "description": "쉼표로 구분한 관측소 코드 (예: 1018683,1018680)"},
+        "time_type": {"type": "string", "description": "시간 유형 (10M, 1H, 1D)", "default": "1H"},
+    },
+    required=["obs_codes"],
+)
+openai_functions.register(
+    "recommend_nearby_stations",
+    "입력된 지역 주변의 관련 관측소들을 추천",
+    {
+        "location": {"type": "string", "description": "기준 위치 (지명 또는 \"위도,경도\")"},
+        "radius": {"type": "integer", "description": "반경 (km), 0이면 반경 없이 가장 가까운 관측소",
+                   "default": 20},
+        "limit": {"type": "integer", "minimum": 1, "maximum": 20, "description": "추천 관측소 수", "default": 5},
+        "priority": {"type": "string", "enum": ["distance", "data_quality"],
+                     "description": "distance(거리순) 또는 data_quality(데이터 품질순)", "default": "distance"},
+    },
+    required=["location"],
+)
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+HRFCO Upstream HTTP Client
+프로세스 전역 업스트림 커넥션 풀 (keep-alive, 선택적 HTTP/2)
+동일 요청 동시 호출은 하나의 업스트림 요청으로 합침 (single-flight)
+"""
+import asyncio
+import os
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+import httpx
+
+from metrics import SINGLE_FLIGHT, UPSTREAM_ERRORS, UPSTREAM_LATENCY, endpoint_label
+
+# 풀 설정 (환경변수로 조정)
+UPSTREAM_TIMEOUT = float(os.getenv('HRFCO_UPSTREAM_TIMEOUT', '30'))
+POOL_MAX_CONNECTIONS = int(os.getenv('HRFCO_POOL_MAX_CONNECTIONS', '100'))
+POOL_MAX_KEEPALIVE = int(os.getenv('HRFCO_POOL_MAX_KEEPALIVE', '20'))
+POOL_KEEPALIVE_EXPIRY = float(os.getenv('HRFCO_POOL_KEEPALIVE_EXPIRY', '30'))
+HTTP2_ENABLED = os.getenv('HRFCO_HTTP2', 'false').lower() in ('1', 'true', 'yes')
+
+_client: Optional[httpx.AsyncClient] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _http2_supported() -> bool:
+    """HTTP/2 사용 가능 여부 (h2 패키지 필요)"""
+    if not HTTP2_ENABLED:
+        return False
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def get_client() -> httpx.AsyncClient:
+    """공유 AsyncClient 반환 (필요 시 생성)
+
+    커넥션 풀은 이벤트 루프에 묶이므로 루프가 바뀌면 새로 만든다.
+    HTTP/2는 TLS(ALPN) 연결에서만 협상되며, http:// 업스트림은 HTTP/1.1 keep-alive를 사용한다.
+    """
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client.is_closed or _client_loop is not loop:
+        _client = httpx.AsyncClient(
+            timeout=UPSTREAM_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=POOL_MAX_CONNECTIONS,
+                max_keepalive_connections=POOL_MAX_KEEPALIVE,
+                keepalive_expiry=POOL_KEEPALIVE_EXPIRY
+            ),
+            http2=_http2_supported()
+        )
+        _client_loop = loop
+    return _client
+
+
+class SingleFlight:
+    """동일 키의 동시 호출이 하나의 진행 중 작업을 공유하도록 합침
+
+    첫 호출자가 작업을 태스크로 시작하고, 이후 호출자는 같은 태스크 결과를 기다린다.
+    대기자 하나가 취소되어도 공유 태스크는 취소되지 않는다 (asyncio.shield).
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.leaders = 0
+        self.joins = 0
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        if task is None:
+            self.leaders += 1
+            SINGLE_FLIGHT.inc(result="leader")
+            task = asyncio.ensure_future(func())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._done(key, t))
+        else:
+            self.joins += 1
+            SINGLE_FLIGHT.inc(result="join")
+        return await asyncio.shield(task)
+
+    def _done(self, key: Hashable, task: asyncio.Task):
+        self._inflight.pop(key, None)
+        # 모든 대기자가 취소된 경우에도 예외 미확인 경고가 나지 않도록 소비
+        if not task.cancelled():
+            task.exception()
+
+    def inflight(self) -> int:
+        return len(self._inflight)
+
+
+_single_flight = SingleFlight()
+
+
+def request_key(url: str, params: Optional[Dict[str, Any]] = None) -> Tuple:
+    """요청 식별 키 (파라미터 순서 무관)"""
+    items = tuple(sorted((str(k), str(v)) for k, v in (params or {}).items()))
+    return ("GET", url, items)
+
+
+async def fetch(url: str, params: Optional[Dict[str, Any]] = None,
+                timeout: Optional[float] = None) -> httpx.Response:
+    """공유 풀을 통한 GET 요청 (동일 요청 동시 호출 시 응답 공유)
+
+    실제 업스트림 요청마다 엔드포인트별 지연 시간과 오류(예외 클래스, HTTP 상태 계열)를 기록한다.
+    """
+    endpoint = endpoint_label(url)
+
+    async def _get() -> httpx.Response:
+        try:
+            with UPSTREAM_LATENCY.time(endpoint=endpoint):
+                response = await get_client().get(url, params=params, timeout=timeout or UPSTREAM_TIMEOUT)
+        except Exception as e:
+            UPSTREAM_ERRORS.inc(endpoint=endpoint, error=type(e).__name__)
+            raise
+        if response.status_code >= 400:
+            UPSTREAM_ERRORS.inc(endpoint=endpoint, error=f"http_{response.status_code // 100}xx")
+        return response
+
+    return await _single_flight.do(request_key(url, params), _get)
+
+
+async def fetch_json(url: str, params: Optional[Dict[str, Any]] = None,
+                     timeout: Optional[float] = None) -> Any:
+    """GET 요청 후 JSON 반환 (HTTP 오류 시 httpx.HTTPStatusError)
+
+    공유된 응답이라도 JSON은 호출자마다 따로 파싱하므로 결과 객체를 수정해도 안전하다.
+    """
+    response = await fetch(url, params=params, timeout=timeout)
+    response.raise_for_status()
+    return response.json()
+
+
+async def close_client():
+    """공유 클라이언트 종료 (lifespan/shutdown 훅에서 호출)"""
+    global _client, _client_loop
+    if _client is not None and not _client.is_closed:
+        try:
+            await _client.aclose()
+        except RuntimeError:
+            # 이미 닫힌 이벤트 루프에 묶인 풀
+            pass
+    _client = None
+    _client_loop = None